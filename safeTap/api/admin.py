@@ -5,7 +5,7 @@ from .models import (
     Division, District, Thana, ProductFeature, UserProfile, ServiceRequest,
     ServiceRequestImage, ServiceRequestVideo, TechStage, SmartFeature,
     FAQCategory, FAQ, Review, WhyChoosePoint, HowItWorksStep, PricingPlan,
-    ProductInfo, ComparisonPoint,
+    ProductInfo, ComparisonPoint, OutboundEmail,
 )
 
 # Register your models here.
@@ -51,7 +51,14 @@ class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'phone', 'role', 'is_phone_verified', 'is_email_verified')
     list_filter = ('role', 'is_phone_verified', 'is_email_verified')
     search_fields = ('user__username', 'user__email', 'phone')
-    readonly_fields = ('qr_code',)
+    readonly_fields = ('qr_image',)
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
 
 @admin.register(ServiceRequest)
 class ServiceRequestAdmin(admin.ModelAdmin):
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Importing api.cache also registers its system check (api.W001)
+        from .cache import connect_signals
+        connect_signals()
@@ -0,0 +1,131 @@
+"""
+Work assignment lifecycle.
+
+TRANSITIONS lists the status changes an assignment may go through. Every
+change is applied in one transaction together with its AssignmentHistory
+row and the technician bookkeeping:
+
+- While an assignment is pending, assigned or in progress it holds its
+  technician. The technician is claimed with a conditional
+  UPDATE ... WHERE is_available, so two dispatchers can't book the same
+  technician, and neither has to lock anything while checking.
+- Completing an assignment frees the technician and bumps completed_jobs
+  with an F() expression. Cancelling, reassigning or deleting it only frees
+  the technician.
+- The assignment row is locked (SELECT ... FOR UPDATE) while a change is
+  applied. Concurrent updates of the same assignment queue up, each one
+  checked against the status the previous one left; updates of other
+  assignments are not blocked.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssignmentHistory, UserProfile, WorkAssignment
+
+TRANSITIONS = {
+    'pending': {'assigned', 'in_progress', 'cancelled'},
+    'assigned': {'pending', 'in_progress', 'completed', 'cancelled'},
+    'in_progress': {'assigned', 'completed', 'cancelled'},
+    'completed': set(),
+    'cancelled': {'pending'},
+}
+
+# Statuses in which an assignment keeps its technician busy
+ACTIVE_STATUSES = ('pending', 'assigned', 'in_progress')
+
+
+class TransitionError(Exception):
+    """The requested status change is not allowed"""
+
+
+class TechnicianUnavailable(Exception):
+    """The technician is already busy with another assignment"""
+
+
+def _claim_technician(technician):
+    if not UserProfile.objects.filter(pk=technician.pk, is_available=True).update(is_available=False):
+        raise TechnicianUnavailable(f'Technician {technician.pk} is not available')
+    technician.is_available = False
+
+
+def _release_technician(technician):
+    UserProfile.objects.filter(pk=technician.pk).update(is_available=True)
+    technician.is_available = True
+
+
+def create_assignment(serializer, user):
+    """Save a validated WorkAssignmentCreateSerializer, claiming its technician"""
+    technician = serializer.validated_data.get('assigned_to')
+    with transaction.atomic():
+        if technician and serializer.validated_data.get('status', 'pending') in ACTIVE_STATUSES:
+            _claim_technician(technician)
+        assignment = serializer.save(assigned_by=user)
+        AssignmentHistory.objects.create(
+            assignment=assignment,
+            changed_by=user,
+            old_status='',
+            new_status=assignment.status,
+            notes='Assignment created'
+        )
+    return assignment
+
+
+def update_assignment(assignment_id, serializer, user, notes=''):
+    """
+    Apply a validated (partial) WorkAssignmentCreateSerializer to an
+    assignment. Raises TransitionError or TechnicianUnavailable, in which
+    case nothing is written.
+    """
+    data = serializer.validated_data
+    with transaction.atomic():
+        assignment = (
+            WorkAssignment.objects.select_for_update()
+            .select_related('assigned_to')
+            .get(pk=assignment_id)
+        )
+        old_status = assignment.status
+        new_status = data.get('status', old_status)
+        if new_status != old_status and new_status not in TRANSITIONS[old_status]:
+            raise TransitionError(f"Cannot change status from '{old_status}' to '{new_status}'")
+
+        technician = data['assigned_to'] if 'assigned_to' in data else assignment.assigned_to
+        held = assignment.assigned_to if old_status in ACTIVE_STATUSES else None
+        wanted = technician if new_status in ACTIVE_STATUSES else None
+
+        if held and (wanted is None or wanted.pk != held.pk):
+            if new_status == 'completed':
+                held.record_completed_job()
+            else:
+                _release_technician(held)
+        if wanted and (held is None or wanted.pk != held.pk):
+            _claim_technician(wanted)
+
+        if new_status == 'completed' and old_status != 'completed':
+            assignment.completed_at = timezone.now()
+
+        # Save onto the locked row so a stale copy can't overwrite other fields
+        serializer.instance = assignment
+        assignment = serializer.save()
+
+        if new_status != old_status:
+            AssignmentHistory.objects.create(
+                assignment=assignment,
+                changed_by=user,
+                old_status=old_status,
+                new_status=new_status,
+                notes=notes
+            )
+    return assignment
+
+
+def delete_assignment(assignment_id):
+    """Delete an assignment, freeing its technician if it still held one"""
+    with transaction.atomic():
+        assignment = (
+            WorkAssignment.objects.select_for_update()
+            .select_related('assigned_to')
+            .get(pk=assignment_id)
+        )
+        if assignment.assigned_to and assignment.status in ACTIVE_STATUSES:
+            _release_technician(assignment.assigned_to)
+        assignment.delete()
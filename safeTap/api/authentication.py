@@ -0,0 +1,185 @@
+"""
+Resolving the user behind a request.
+
+Clients authenticate with a Firebase ID token or a DRF token, both sent as
+`Authorization: Bearer <token>`, or with DRF's own `Token <key>` header.
+resolve_request_user() turns any of these into a User whose profile is
+already joined in, using at most one query, and remembers the answer on the
+request so DRF's authentication classes and the view never resolve it twice.
+"""
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+
+_UNRESOLVED = object()
+
+
+class AuthenticationError(Exception):
+    """Raised when a request can't be tied to a user; response() renders the API error"""
+
+    def __init__(self, error, status_code=status.HTTP_401_UNAUTHORIZED, message=None):
+        super().__init__(error)
+        self.error = error
+        self.status_code = status_code
+        self.message = message
+
+    def response(self):
+        data = {'error': self.error}
+        if self.message:
+            data['message'] = self.message
+        return Response(data, status=self.status_code)
+
+
+class ProfileTokenAuthentication(TokenAuthentication):
+    """DRF token authentication that loads the user's profile in the same query"""
+
+    def authenticate_credentials(self, key):
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user__profile').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
+
+
+def get_bearer_token(request):
+    auth_header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    return auth_header[7:]  # Remove 'Bearer ' prefix
+
+
+def _http_request(request):
+    # DRF's Request wraps the HttpRequest; memoize on the one both layers share
+    return getattr(request, '_request', request)
+
+
+def _lookup_firebase_user(token):
+    from .firebase_auth import get_or_create_user, token_cache, verify_firebase_token
+
+    # A token seen before maps straight to its user: no signature check
+    entry = token_cache.get(token)
+    if entry is not None and entry['user_id']:
+        user = User.objects.select_related('profile').filter(pk=entry['user_id']).first()
+        if user:
+            return user
+
+    decoded_token = verify_firebase_token(token)
+    if not decoded_token:
+        return None
+
+    firebase_uid = decoded_token.get('uid')
+    email = decoded_token.get('email')
+
+    # Firebase UID first, then email - both answered by one joined query
+    user = None
+    lookup = Q()
+    if firebase_uid:
+        lookup |= Q(profile__firebase_uid=firebase_uid)
+    if email:
+        lookup |= Q(email=email)
+    if lookup:
+        candidates = list(User.objects.select_related('profile').filter(lookup).order_by('id'))
+        for candidate in candidates:
+            profile = getattr(candidate, 'profile', None)
+            if firebase_uid and profile is not None and profile.firebase_uid == firebase_uid:
+                user = candidate
+                break
+        else:
+            user = candidates[0] if candidates else None
+
+    if user is None:
+        user = get_or_create_user(firebase_uid, email, decoded_token.get('name'))
+        if user is None:
+            print(f"Failed to create or retrieve user for Firebase UID {firebase_uid} and email {email}")
+            # A genuine Firebase token, so don't fall back to DRF tokens
+            raise exceptions.AuthenticationFailed('Failed to authenticate user')
+
+    token_cache.set(token, {'claims': decoded_token, 'user_id': user.id}, decoded_token.get('exp'))
+    return user
+
+
+def resolve_firebase_user(request, token):
+    """
+    Return the user for a Firebase ID token, or None when it isn't one.
+
+    Raises AuthenticationFailed for a verified token that can't be mapped
+    to a user. Either outcome is memoized on the request.
+    """
+    http_request = _http_request(request)
+    user = getattr(http_request, '_firebase_user', _UNRESOLVED)
+    if user is _UNRESOLVED:
+        try:
+            user = _lookup_firebase_user(token)
+        except exceptions.AuthenticationFailed as e:
+            user = e
+        except Exception as e:
+            print(f"Firebase authentication error: {str(e)}")
+            user = None
+        http_request._firebase_user = user
+    if isinstance(user, exceptions.AuthenticationFailed):
+        raise user
+    return user
+
+
+def _token_user(key):
+    token = Token.objects.select_related('user__profile').filter(key=key).first()
+    return token.user if token else None
+
+
+def _resolve(request):
+    token = get_bearer_token(request)
+
+    # No Bearer token: use whoever DRF already authenticated (e.g. "Token <key>")
+    if token is None:
+        if request.user and request.user.is_authenticated:
+            return request.user
+        raise AuthenticationError('Authentication credentials were not provided.')
+
+    from .firebase_config import is_firebase_available
+    firebase_available = is_firebase_available()
+    if firebase_available:
+        try:
+            user = resolve_firebase_user(request, token)
+        except exceptions.AuthenticationFailed:
+            raise AuthenticationError('Failed to create or retrieve user from Firebase token')
+        if user:
+            return user
+    elif request.user and request.user.is_authenticated:
+        return request.user
+
+    # Not a Firebase token: it may be a DRF token sent as Bearer
+    user = _token_user(token)
+    if user:
+        return user
+
+    if not firebase_available:
+        raise AuthenticationError(
+            'Firebase authentication is not available on the server.',
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            'Firebase is not configured or credentials are invalid.',
+        )
+    raise AuthenticationError('Invalid authentication token')
+
+
+def resolve_request_user(request):
+    """
+    Return the authenticated User for a request, with `profile` select_related.
+
+    Raises AuthenticationError when the request carries no usable
+    credentials. The result is cached on the request.
+    """
+    http_request = _http_request(request)
+    user = getattr(http_request, '_api_user', None)
+    if user is None:
+        user = _resolve(request)
+        http_request._api_user = user
+    return user
@@ -0,0 +1,180 @@
+"""
+Versioned caching helpers for read-heavy API responses.
+
+Every cached entry embeds the version of the namespace it belongs to in its
+key. Model signals bump that version whenever a contributing row is saved or
+deleted, which makes all older entries unreachable at once - invalidation
+never has to enumerate keys, and it works the same on locmem, Redis or
+memcached backends.
+
+Each model listed in VERSIONED_MODELS also has a namespace of its own
+(model_namespace()), which the content viewsets use as a cheap collection
+version for ETag/Last-Modified validators.
+
+Versions only invalidate what every worker can see: with a per-process
+cache (the locmem default) a write bumps the version in one worker and the
+others keep serving their old entries until they time out. Check api.W001
+flags that configuration outside DEBUG.
+"""
+import hashlib
+import time
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+CITY_PAGE_NAMESPACE = 'city_page'
+GEOGRAPHY_NAMESPACE = 'geography'
+ASSIGNMENT_STATS_NAMESPACE = 'assignment_stats'
+
+# Models whose rows feed each cached namespace
+NAMESPACE_MODELS = {
+    CITY_PAGE_NAMESPACE: (
+        'City', 'CitySlide', 'CityStats', 'ProductFeature', 'TechSpecification',
+        'SmartFeature', 'TechStage', 'FAQCategory', 'FAQ', 'Review',
+        'WhyChoosePoint', 'HowItWorksStep', 'PricingPlan', 'ProductInfo',
+        'ComparisonPoint',
+    ),
+    GEOGRAPHY_NAMESPACE: ('Division', 'District', 'Thana'),
+    ASSIGNMENT_STATS_NAMESPACE: (
+        'WorkAssignment', 'AssignmentHistory', 'UserProfile', 'WorkCategory',
+        'Customer',
+    ),
+}
+
+# Models with a per-model version namespace (see ConditionalGetMixin)
+VERSIONED_MODELS = (
+    'City', 'CitySlide', 'CityStats', 'ProductFeature', 'TechSpecification',
+    'SmartFeature', 'TechStage', 'FAQCategory', 'FAQ', 'Review',
+    'WhyChoosePoint', 'HowItWorksStep', 'PricingPlan', 'ProductInfo',
+    'ComparisonPoint', 'TechSpec', 'Division', 'District', 'Thana',
+)
+
+
+def get_cache():
+    """Return the cache backend used for API responses"""
+    return caches[getattr(settings, 'API_CACHE_ALIAS', 'default')]
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def _new_version():
+    # Millisecond timestamp plus a random suffix: unique across workers and
+    # still tells us when the namespace last changed.
+    return f'{int(time.time() * 1000)}.{uuid.uuid4().hex[:8]}'
+
+
+def get_version(namespace):
+    """Get the current version of a namespace, creating it if missing"""
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        # add() keeps whichever version another worker may have stored first
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key) or version
+    return version
+
+
+def bump_version(namespace):
+    """Invalidate every cached entry of a namespace"""
+    get_cache().set(_version_key(namespace), _new_version(), timeout=None)
+
+
+def version_timestamp(version):
+    """Return the time (in seconds) at which a version was created"""
+    return int(version.split('.', 1)[0]) / 1000.0
+
+
+def model_namespace(model_name):
+    """Namespace versioning the rows of a single model"""
+    return f'model:{model_name}'
+
+
+def _namespaces_for(model_name):
+    namespaces = [
+        namespace for namespace, model_names in NAMESPACE_MODELS.items()
+        if model_name in model_names
+    ]
+    if model_name in VERSIONED_MODELS:
+        namespaces.append(model_namespace(model_name))
+    return namespaces
+
+
+def invalidate_models(*model_names):
+    """
+    Bump every namespace fed by the given models once the transaction
+    commits. Signals do this for save()/delete(); bulk writes and
+    queryset updates call it themselves.
+    """
+    namespaces = sorted({namespace for name in model_names for namespace in _namespaces_for(name)})
+
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+
+    # Bump after commit so a concurrent reader can't cache pre-commit data
+    # under the new version.
+    transaction.on_commit(bump)
+
+
+def _invalidate_namespaces(sender, **kwargs):
+    invalidate_models(sender.__name__)
+
+
+def connect_signals():
+    """Connect invalidation receivers for every model in NAMESPACE_MODELS and VERSIONED_MODELS"""
+    model_names = {name for names in NAMESPACE_MODELS.values() for name in names}
+    model_names.update(VERSIONED_MODELS)
+    for name in model_names:
+        model = apps.get_model('api', name)
+        post_save.connect(_invalidate_namespaces, sender=model, dispatch_uid=f'cache_save_{name}')
+        post_delete.connect(_invalidate_namespaces, sender=model, dispatch_uid=f'cache_delete_{name}')
+
+
+def get_or_render(namespace, key_parts, render, timeout=None):
+    """
+    Return a cached rendered entry, rendering and storing it on a miss.
+
+    `render` must return the response body as bytes. The returned entry is a
+    dict with `content`, `etag` and `last_modified` (seconds since epoch).
+    """
+    cache = get_cache()
+    version = get_version(namespace)
+    digest = hashlib.md5('|'.join(str(part) for part in key_parts).encode('utf-8')).hexdigest()
+    key = f'{namespace}:{version}:{digest}'
+
+    entry = cache.get(key)
+    if entry is None:
+        content = render()
+        entry = {
+            'content': content,
+            'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+            'last_modified': version_timestamp(version),
+        }
+        cache.set(key, entry, timeout)
+    return entry
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when the API cache can't be seen by other processes"""
+    alias = getattr(settings, 'API_CACHE_ALIAS', 'default')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if settings.DEBUG or not backend.endswith(('LocMemCache', 'DummyCache')):
+        return []
+    return [checks.Warning(
+        f"The '{alias}' API cache is not shared between processes. Phone verification codes and the "
+        "version keys that invalidate cached city pages, geography, assignment statistics and ETags "
+        "would differ per worker, so workers would reject valid codes and serve stale data.",
+        hint='Point CACHE_BACKEND/CACHE_LOCATION at Redis or memcached when running more than one worker.',
+        obj=alias,
+        id='api.W001',
+    )]
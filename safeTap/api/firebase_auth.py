@@ -3,9 +3,9 @@ import os
 import json
 import uuid
 from django.conf import settings
-from .firebase_config import get_firebase_app, is_firebase_available, verify_firebase_token
-from .firebase_config import get_firebase_app
-from .firebase_config import is_firebase_available
+from .firebase_config import get_firebase_app, is_firebase_available
+from .firebase_config import verify_firebase_token as _verify_firebase_token
+from .token_cache import TokenCache
 
 
 # Initialize Firebase Admin SDK
@@ -18,6 +18,34 @@ if is_firebase_available():
 else:
     print("Firebase Admin SDK is not available. Firebase authentication will not work.")
 
+# Verified Firebase ID tokens, keyed by SHA-256 fingerprint. Signing keys are
+# already cached by firebase_admin, whose HTTP session honors the
+# Cache-Control max-age Google sends with them.
+token_cache = TokenCache(
+    maxsize=getattr(settings, 'FIREBASE_TOKEN_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'FIREBASE_TOKEN_CACHE_TTL', 300),
+    shared_alias=getattr(settings, 'FIREBASE_TOKEN_CACHE_ALIAS', None),
+    prefix='firebase-token',
+)
+
+
+def verify_firebase_token(id_token):
+    """
+    Verify a Firebase ID token and return the decoded token.
+
+    Tokens verified before (and not yet expired) are answered from
+    token_cache without repeating the signature check.
+    """
+    entry = token_cache.get(id_token)
+    if entry is not None:
+        return dict(entry['claims'])
+
+    decoded_token = _verify_firebase_token(id_token)
+    if decoded_token:
+        token_cache.set(id_token, {'claims': decoded_token, 'user_id': None}, decoded_token.get('exp'))
+    return decoded_token
+
+
 def get_or_create_user(firebase_uid, email, display_name=None, photo_url=None):
     """
     Get an existing user or create a new one based on Firebase UID.
@@ -49,7 +77,7 @@ def get_or_create_user(firebase_uid, email, display_name=None, photo_url=None):
                 profile, created = UserProfile.objects.get_or_create(user=user)
                 if not profile.firebase_uid:
                     profile.firebase_uid = firebase_uid
-                    profile.save()
+                    profile.save_changes()
                     print("Updated existing profile with Firebase UID")
                 return user
             except User.DoesNotExist:
@@ -107,7 +135,7 @@ def get_or_create_user(firebase_uid, email, display_name=None, photo_url=None):
         profile.firebase_uid = firebase_uid
         if not getattr(profile, 'role', None):
             profile.role = 'customer'
-        profile.save()
+        profile.save_changes()
         print(f"Created/updated profile for new user")
 
         return user
@@ -135,24 +163,11 @@ class FirebaseAuthentication(BaseAuthentication):
             
         token = auth_header[7:]  # Remove 'Bearer ' prefix
         
-        # Verify the Firebase token
-        decoded_token = verify_firebase_token(token)
-        if not decoded_token:
+        # Shared with the views through the request, so a token is only
+        # resolved once per request (see api/authentication.py)
+        from .authentication import resolve_firebase_user
+        user = resolve_firebase_user(request, token)
+        if not user:
             return None
-            
-        # Get user info from token
-        firebase_uid = decoded_token.get('uid')
-        email = decoded_token.get('email')
-        
-        # Get user from email
-        try:
-            user = User.objects.get(email=email)
-            return (user, None)  # Return user and auth (None for Firebase)
-        except User.DoesNotExist:
-            # If user doesn't exist, try to create them
-            user = get_or_create_user(firebase_uid, email, decoded_token.get('name'))
-            if user:
-                return (user, None)
-            else:
-                raise AuthenticationFailed('Failed to authenticate user')
+        return (user, None)  # Return user and auth (None for Firebase)
             
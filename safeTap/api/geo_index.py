@@ -0,0 +1,118 @@
+"""
+In-memory id -> name and parent-id index for Division, District and Thana.
+
+Signup and profile updates only need to turn submitted ids into names and
+check that a thana belongs to the district and the district to the division.
+This index answers both from flat lists indexed by primary key, so neither
+costs a query. It is loaded lazily and rebuilt whenever the geography cache
+namespace moves (see api/cache.py).
+"""
+import threading
+from array import array
+
+from .cache import GEOGRAPHY_NAMESPACE, get_version
+from .models import Division, District, Thana
+
+
+def _parse_id(value):
+    """Return value as a positive int id, or None if it isn't one"""
+    if isinstance(value, int):
+        return value if value > 0 else None
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip()) or None
+    return None
+
+
+def _names_by_id(rows):
+    rows = list(rows)
+    names = [None] * (max((row[0] for row in rows), default=0) + 1)
+    for row in rows:
+        names[row[0]] = row[1]
+    return names, rows
+
+
+def _parents_by_id(rows, size):
+    # 0 means "no parent" - primary keys start at 1
+    parents = array('q', bytes(8 * size))
+    for row in rows:
+        parents[row[0]] = row[2]
+    return parents
+
+
+class GeoIndex:
+    """Array-backed lookups for the geography tables"""
+
+    def __init__(self, version, divisions, districts, thanas):
+        self.version = version
+        self._division_names, _ = _names_by_id(divisions)
+        self._district_names, districts = _names_by_id(districts)
+        self._district_division = _parents_by_id(districts, len(self._district_names))
+        self._thana_names, thanas = _names_by_id(thanas)
+        self._thana_district = _parents_by_id(thanas, len(self._thana_names))
+
+    @classmethod
+    def load(cls, version):
+        return cls(
+            version,
+            Division.objects.values_list('id', 'name'),
+            District.objects.values_list('id', 'name', 'division_id'),
+            Thana.objects.values_list('id', 'name', 'district_id'),
+        )
+
+    @staticmethod
+    def _lookup(table, value):
+        pk = _parse_id(value)
+        if pk is None or pk >= len(table):
+            return None
+        return table[pk]
+
+    def division_name(self, division_id):
+        return self._lookup(self._division_names, division_id)
+
+    def district_name(self, district_id):
+        return self._lookup(self._district_names, district_id)
+
+    def thana_name(self, thana_id):
+        return self._lookup(self._thana_names, thana_id)
+
+    def district_division(self, district_id):
+        return self._lookup(self._district_division, district_id) or None
+
+    def thana_district(self, thana_id):
+        return self._lookup(self._thana_district, thana_id) or None
+
+    def validate_hierarchy(self, division_id=None, district_id=None, thana_id=None):
+        """
+        Check that the given ids form a division -> district -> thana chain.
+
+        Ids that don't resolve are ignored, matching how the views treat
+        unknown ids. Returns an error message, or None when consistent.
+        """
+        division_pk = _parse_id(division_id) if self.division_name(division_id) else None
+        district_parent = self.district_division(district_id)
+        thana_parent = self.thana_district(thana_id)
+
+        if division_pk and district_parent and district_parent != division_pk:
+            return 'Selected district does not belong to the selected division'
+        if thana_parent and self.district_name(district_id) and thana_parent != _parse_id(district_id):
+            return 'Selected thana does not belong to the selected district'
+        return None
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_geo_index():
+    """Return the current geography index, loading or rebuilding it as needed"""
+    global _index
+
+    version = get_version(GEOGRAPHY_NAMESPACE)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = GeoIndex.load(version)
+        return _index
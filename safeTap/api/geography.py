@@ -0,0 +1,121 @@
+"""
+Process-wide snapshot of the Division -> District -> Thana tree.
+
+The tree is loaded with a single query, frozen into tuples and pre-rendered
+to JSON once. It is rebuilt only when the geography namespace version moves,
+which the Division/District/Thana signals in api/cache.py take care of.
+"""
+import hashlib
+import threading
+from collections import namedtuple
+
+
+from .cache import GEOGRAPHY_NAMESPACE, get_version, version_timestamp
+from .models import District
+from .renderers import render_json
+
+GeographyEntry = namedtuple(
+    'GeographyEntry',
+    ['division_id', 'division', 'district_id', 'district', 'thanas'],
+)
+
+
+def _render(entries):
+    return render_json([
+        {'division': entry.division, 'district': entry.district, 'thanas': list(entry.thanas)}
+        for entry in entries
+    ])
+
+
+class GeographyTree:
+    """Immutable geography snapshot with pre-rendered payloads"""
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.last_modified = version_timestamp(version)
+        self.entries = tuple(entries)
+        self.content = _render(self.entries)
+        self.etag = '"%s"' % hashlib.md5(self.content).hexdigest()
+
+        self._by_division = {}
+        self._by_district = {}
+        for index, entry in enumerate(self.entries):
+            for key in (str(entry.division_id), entry.division.lower()):
+                self._by_division.setdefault(key, []).append(index)
+            for key in (str(entry.district_id), entry.district.lower()):
+                self._by_district.setdefault(key, []).append(index)
+
+        self._slices = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, version):
+        """Build the tree from one LEFT JOIN over districts and their thanas"""
+        rows = (
+            District.objects
+            .order_by('division_id', 'id', 'thanas__id')
+            .values_list('division_id', 'division__name', 'id', 'name', 'thanas__name')
+        )
+
+        entries = []
+        current = None
+        thanas = []
+        for division_id, division_name, district_id, district_name, thana_name in rows:
+            if current is None or current[2] != district_id:
+                if current is not None:
+                    entries.append(GeographyEntry(*current, tuple(thanas)))
+                current = (division_id, division_name, district_id, district_name)
+                thanas = []
+            if thana_name is not None:
+                thanas.append(thana_name)
+        if current is not None:
+            entries.append(GeographyEntry(*current, tuple(thanas)))
+
+        return cls(version, entries)
+
+    def render(self, division=None, district=None):
+        """
+        Return (content, etag) for the whole tree or a slice of it.
+
+        `division` and `district` match either an id or a (case-insensitive)
+        name. Slices are rendered once per tree and then served from memory.
+        """
+        if not division and not district:
+            return self.content, self.etag
+
+        indexes = None
+        if division:
+            indexes = set(self._by_division.get(str(division).strip().lower(), ()))
+        if district:
+            matches = set(self._by_district.get(str(district).strip().lower(), ()))
+            indexes = matches if indexes is None else indexes & matches
+
+        key = tuple(sorted(indexes))
+        cached = self._slices.get(key)
+        if cached is None:
+            content = _render(self.entries[index] for index in key)
+            cached = (content, '"%s"' % hashlib.md5(content).hexdigest())
+            # Keys are bounded by the tree's own entries, so this can't grow
+            # with arbitrary query strings.
+            with self._lock:
+                self._slices[key] = cached
+        return cached
+
+
+_tree = None
+_tree_lock = threading.Lock()
+
+
+def get_geography_tree():
+    """Return the current geography tree, rebuilding it after any change"""
+    global _tree
+
+    version = get_version(GEOGRAPHY_NAMESPACE)
+    tree = _tree
+    if tree is not None and tree.version == version:
+        return tree
+
+    with _tree_lock:
+        if _tree is None or _tree.version != version:
+            _tree = GeographyTree.load(version)
+        return _tree
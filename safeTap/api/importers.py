@@ -0,0 +1,332 @@
+"""
+Bulk catalog and geography imports.
+
+An import validates the whole payload before touching the database, then
+writes every valid item with a handful of bulk statements inside a single
+transaction. Items that fail validation are skipped as a whole and reported
+back, so an import never leaves a half-written city behind.
+"""
+import codecs
+import csv
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+from rest_framework import serializers
+
+from .cache import invalidate_models
+from .models import City, CitySlide, CityStats, District, Division, Product, Thana
+
+
+class _CityImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = City
+        fields = ['name', 'slug', 'is_active']
+        # Existing slugs are upserted, not rejected
+        extra_kwargs = {'slug': {'validators': [], 'required': False}}
+
+
+class _SlideImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CitySlide
+        exclude = ['id', 'city', 'image']
+
+
+class _StatsImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CityStats
+        exclude = ['id', 'city']
+
+
+class _ProductImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        exclude = ['id', 'city']
+
+
+def _validate_items(serializer_class, items):
+    """Validate a list of child items; return (validated, {index: errors})"""
+    validated = []
+    errors = {}
+    if not isinstance(items, list):
+        return [], {'non_field_errors': ['Expected a list of items']}
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            validated.append(serializer.validated_data)
+        else:
+            errors[index] = serializer.errors
+    return validated, errors
+
+
+def _validate_city(city_data):
+    """Return (validated city dict, errors dict); errors is empty when valid"""
+    if not isinstance(city_data, dict):
+        return None, {'city': ['Expected an object']}
+
+    errors = {}
+    city_serializer = _CityImportSerializer(data=city_data)
+    if not city_serializer.is_valid():
+        errors['city'] = city_serializer.errors
+        return None, errors
+
+    city = dict(city_serializer.validated_data)
+    city['slug'] = city.get('slug') or slugify(city['name'])
+
+    for key, serializer_class in (('slides', _SlideImportSerializer), ('products', _ProductImportSerializer)):
+        if key in city_data:
+            city[key], item_errors = _validate_items(serializer_class, city_data[key])
+            if item_errors:
+                errors[key] = item_errors
+
+    stats = city_data.get('stats')
+    if stats:
+        stats_serializer = _StatsImportSerializer(data=stats)
+        if stats_serializer.is_valid():
+            city['stats'] = stats_serializer.validated_data
+        else:
+            errors['stats'] = stats_serializer.errors
+
+    return city, errors
+
+
+# Child lists a city payload may carry, with the fields that identify an
+# existing row within its city
+CITY_CHILDREN = (
+    ('slides', CitySlide, ('product_type', 'order')),
+    ('products', Product, ('name',)),
+)
+
+
+def _replace_children(key, model, natural_key, cities, city_ids, batch_size):
+    """
+    Make each city's `key` rows match its payload list. Rows are matched on
+    `natural_key` and updated in place with only the fields the item
+    carries, so anything else (an uploaded slide image, is_active) is kept.
+    Unmatched items are created; rows missing from the payload are deleted.
+    """
+    cities = [city for city in cities if key in city]
+    if not cities:
+        return
+
+    defaults = {name: model._meta.get_field(name).get_default() for name in natural_key}
+    existing = {}
+    for row in model.objects.filter(city_id__in=[city_ids[city['slug']] for city in cities]).order_by('id'):
+        existing.setdefault((row.city_id,) + tuple(getattr(row, name) for name in natural_key), []).append(row)
+
+    to_create = []
+    to_update = []
+    fields = set()
+    for city in cities:
+        city_id = city_ids[city['slug']]
+        for item in city[key]:
+            matches = existing.get((city_id,) + tuple(item.get(name, defaults[name]) for name in natural_key))
+            if not matches:
+                to_create.append(model(city_id=city_id, **item))
+                continue
+            row = matches.pop(0)
+            for name, value in item.items():
+                setattr(row, name, value)
+            fields.update(item)
+            to_update.append(row)
+
+    stale = [row.pk for rows in existing.values() for row in rows]
+    if stale:
+        model.objects.filter(pk__in=stale).delete()
+    if to_update and fields:
+        model.objects.bulk_update(to_update, sorted(fields), batch_size=batch_size)
+    if to_create:
+        model.objects.bulk_create(to_create, batch_size=batch_size)
+
+
+def import_city_catalog(cities_data, batch_size=500):
+    """
+    Create or update cities with their slides, stats and products.
+
+    Cities are upserted on `slug`, writing only the fields the payload
+    carries. When a city's payload includes `slides` or `products`, the
+    city ends up with exactly those: existing rows are matched on
+    CITY_CHILDREN's natural keys and updated in place, the rest are created
+    or deleted. Stats are upserted. Returns a report with `created_cities`,
+    `updated_cities`, `count` and a per-item `errors` list (each entry
+    carries the item's `index` and `city` name).
+    """
+    valid = []
+    errors = []
+    seen_slugs = set()
+    for index, city_data in enumerate(cities_data):
+        city, city_errors = _validate_city(city_data)
+        name = city_data.get('name', 'Unknown') if isinstance(city_data, dict) else 'Unknown'
+        if city is not None and city['slug'] in seen_slugs:
+            city_errors = {'city': {'slug': [f"Duplicate slug '{city['slug']}' in payload"]}}
+        if city_errors:
+            errors.append({'index': index, 'city': name, 'errors': city_errors})
+            continue
+        seen_slugs.add(city['slug'])
+        valid.append(city)
+
+    report = {'created_cities': [], 'updated_cities': [], 'count': 0, 'errors': errors}
+    if not valid:
+        return report
+
+    slugs = [city['slug'] for city in valid]
+    now = timezone.now()
+    with transaction.atomic():
+        existing = set(City.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        # An existing city keeps is_active unless the payload sets it
+        for has_is_active in (True, False):
+            group = [city for city in valid if ('is_active' in city) == has_is_active]
+            if not group:
+                continue
+            City.objects.bulk_create(
+                [
+                    City(
+                        name=city['name'], slug=city['slug'], is_active=city.get('is_active', True),
+                        created_at=now, updated_at=now,
+                    )
+                    for city in group
+                ],
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['slug'],
+                update_fields=['name', 'updated_at'] + (['is_active'] if has_is_active else []),
+            )
+        # Not every backend returns ids for upserted rows, so read them back
+        city_ids = dict(City.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+
+        for key, model, natural_key in CITY_CHILDREN:
+            _replace_children(key, model, natural_key, valid, city_ids, batch_size)
+
+        stats = [
+            CityStats(city_id=city_ids[city['slug']], **city['stats'])
+            for city in valid if 'stats' in city
+        ]
+        if stats:
+            CityStats.objects.bulk_create(
+                stats,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['city'],
+                update_fields=['users', 'rating', 'installations'],
+            )
+
+        # bulk_create sends no post_save signals, so invalidate explicitly
+        invalidate_models('City', 'CitySlide', 'CityStats', 'Product')
+
+    for city in valid:
+        key = 'updated_cities' if city['slug'] in existing else 'created_cities'
+        report[key].append(city['name'])
+    report['count'] = len(valid)
+    return report
+
+
+def read_geography_csv(stream, encoding='utf-8'):
+    """Yield geography rows from a binary CSV stream with division, district and thana columns"""
+    # Line by line, so a request body or file is never read into memory whole
+    return csv.DictReader(codecs.iterdecode(stream, encoding))
+
+
+def _geography_rows(entries):
+    """
+    Yield (index, entry, parsed) for each entry.
+
+    Entries are either grouped, {"division", "district", "thanas": [...]},
+    or flat rows, {"division", "district", "thana"} as read from CSV.
+    `parsed` is (division, district, thana names), or a ValueError saying
+    why the entry can't be used.
+    """
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            yield index, entry, ValueError('Expected an object')
+            continue
+        division = (entry.get('division') or '').strip()
+        district = (entry.get('district') or '').strip()
+        if not division or not district:
+            yield index, entry, ValueError('division and district are required')
+            continue
+        thanas = entry.get('thanas')
+        if thanas is None:
+            thanas = [entry['thana']] if entry.get('thana') else []
+        if not isinstance(thanas, list):
+            yield index, entry, ValueError('thanas must be a list')
+            continue
+        names = [name.strip() for name in thanas if isinstance(name, str) and name.strip()]
+        yield index, entry, (division, district, names)
+
+
+def import_geography(entries, batch_size=1000):
+    """
+    Load divisions, districts and thanas from an iterable of entries.
+
+    Rows are de-duplicated in memory and only missing ones are inserted, with
+    parents resolved through one pre-fetched name -> id map per level, so a
+    full national dataset loads in a handful of statements. Entries may be
+    streamed; they are consumed once. Returns counts of created rows, the
+    number of entries processed and per-entry errors.
+    """
+    divisions = set()
+    districts = set()
+    thanas = set()
+    errors = []
+    processed = 0
+    for index, entry, parsed in _geography_rows(entries):
+        processed += 1
+        if isinstance(parsed, ValueError):
+            entry_id = entry.get('_id', index) if isinstance(entry, dict) else index
+            errors.append({'entry': entry_id, 'error': str(parsed)})
+            continue
+        division, district, names = parsed
+        divisions.add(division)
+        districts.add((division, district))
+        thanas.update((division, district, name) for name in names)
+
+    report = {
+        'created_divisions': 0,
+        'created_districts': 0,
+        'created_thanas': 0,
+        'total_entries_processed': processed,
+        'errors': errors,
+    }
+    if not divisions:
+        return report
+
+    with transaction.atomic():
+        division_ids = dict(Division.objects.filter(name__in=divisions).values_list('name', 'id'))
+        missing = [Division(name=name) for name in sorted(divisions) if name not in division_ids]
+        if missing:
+            Division.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+            division_ids = dict(Division.objects.filter(name__in=divisions).values_list('name', 'id'))
+        report['created_divisions'] = len(missing)
+
+        def district_map():
+            rows = District.objects.filter(division_id__in=division_ids.values()).values_list('division_id', 'name', 'id')
+            return {(division_id, name): pk for division_id, name, pk in rows}
+
+        district_ids = district_map()
+        missing = [
+            District(name=district, division_id=division_ids[division])
+            for division, district in sorted(districts)
+            if (division_ids[division], district) not in district_ids
+        ]
+        if missing:
+            District.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+            district_ids = district_map()
+        report['created_districts'] = len(missing)
+
+        existing = set(
+            Thana.objects.filter(district_id__in=district_ids.values()).values_list('district_id', 'name')
+        )
+        missing = []
+        for division, district, name in sorted(thanas):
+            district_id = district_ids[(division_ids[division], district)]
+            if (district_id, name) not in existing:
+                missing.append(Thana(name=name, district_id=district_id))
+        if missing:
+            Thana.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+        report['created_thanas'] = len(missing)
+
+        if any(report[key] for key in ('created_divisions', 'created_districts', 'created_thanas')):
+            # bulk_create sends no post_save signals, so invalidate explicitly
+            invalidate_models('Division', 'District', 'Thana')
+
+    return report
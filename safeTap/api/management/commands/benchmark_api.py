@@ -0,0 +1,376 @@
+import json
+import os
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, setup_databases, setup_test_environment,
+    teardown_databases, teardown_test_environment,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.models import (
+    AssignmentHistory, City, CitySlide, CityStats, Customer, District, Division,
+    ServiceRequest, Thana, UserProfile, WorkAssignment, WorkCategory,
+)
+
+# Districts per division as in Bangladesh (64 in total); thanas are spread
+# over them to reach the country's 495 upazilas/thanas.
+DIVISIONS = (
+    ('Barishal', 6), ('Chattogram', 11), ('Dhaka', 13), ('Khulna', 10),
+    ('Mymensingh', 4), ('Rajshahi', 8), ('Rangpur', 8), ('Sylhet', 4),
+)
+THANA_COUNT = 495
+
+FULL_SCALE = {
+    'users': 50000,
+    'service_requests': 200000,
+    'assignments': 20000,
+    'cities': 100,
+}
+
+PRODUCT_TYPES = ('copper', 'ro_plus', 'alkaline')
+BATCH_SIZE = 5000
+
+
+@contextmanager
+def _explicit_timestamps(model, *field_names):
+    """Let bulk_create keep the seeded values of auto_now/auto_now_add fields"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed realistic data volumes and benchmark the main read endpoints. '
+        'Writes a JSON report and fails when results regress past the baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0,
+                            help='Fraction of full volume (50k users, 200k service requests, 100 cities)')
+        parser.add_argument('--requests', type=int, default=30,
+                            help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=3,
+                            help='Extra untimed requests per endpoint after every URL has been primed')
+        parser.add_argument('--output', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'results.json'),
+                            help='Where to write this run\'s results')
+        parser.add_argument('--baseline', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'baseline.json'),
+                            help='Baseline to compare against (skipped if missing)')
+        parser.add_argument('--save-baseline', action='store_true',
+                            help='Store this run as the new baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p50 latency regression as a fraction (0.25 = 25%%)')
+        parser.add_argument('--use-existing-db', action='store_true',
+                            help='Benchmark the configured database as-is instead of a seeded throwaway test database')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        random.seed(options['seed'])
+
+        if options['use_existing_db']:
+            user = self._benchmark_user()
+            results = self._run_benchmarks(user, options)
+        else:
+            # A throwaway database keeps seeded rows out of the real one
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                self._seed(options['scale'])
+                user = self._benchmark_user()
+                results = self._run_benchmarks(user, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'scale': None if options['use_existing_db'] else options['scale'],
+            'requests': options['requests'],
+            'endpoints': results,
+        }
+        self._write(options['output'], report)
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['save_baseline']:
+            self._write(options['baseline'], report)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            return
+
+        failures = self._compare(report, options['baseline'], options['threshold'])
+        if failures:
+            raise CommandError('Performance regression:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    # Seeding
+
+    def _log(self, message):
+        if self.verbosity >= 1:
+            self.stdout.write(message)
+
+    def _seed(self, scale):
+        volumes = {name: max(1, int(count * scale)) for name, count in FULL_SCALE.items()}
+        self._log(f"Seeding {volumes}")
+        started = time.perf_counter()
+        with transaction.atomic():
+            self._seed_geography()
+            self._seed_cities(volumes['cities'])
+            users = self._seed_users(volumes['users'])
+            self._seed_service_requests(users, volumes['service_requests'])
+            self._seed_assignments(users, volumes['assignments'])
+        self._log(f"Seeded in {time.perf_counter() - started:.1f}s")
+
+    def _seed_geography(self):
+        divisions = Division.objects.bulk_create([Division(name=name) for name, _ in DIVISIONS])
+        districts = District.objects.bulk_create([
+            District(name=f'{division.name} District {number}', division=division)
+            for division, (_, count) in zip(divisions, DIVISIONS)
+            for number in range(1, count + 1)
+        ])
+        Thana.objects.bulk_create([
+            Thana(name=f'Thana {number}', district=districts[number % len(districts)])
+            for number in range(1, THANA_COUNT + 1)
+        ], batch_size=BATCH_SIZE)
+
+    def _seed_cities(self, count):
+        names = ['Dhaka'] + [f'City {number}' for number in range(1, count)]
+        cities = City.objects.bulk_create([
+            City(name=name, slug=name.lower().replace(' ', '-')) for name in names
+        ])
+        CityStats.objects.bulk_create([
+            CityStats(city=city, users='10K+', rating='4.8', installations='5K+') for city in cities
+        ])
+        CitySlide.objects.bulk_create([
+            CitySlide(
+                city=city, product_type=product_type, title=f'{city.name} {product_type} {order}',
+                subtitle='Clean water', description='Slide description', order=order,
+            )
+            for city in cities for product_type in PRODUCT_TYPES for order in range(3)
+        ], batch_size=BATCH_SIZE)
+
+    def _seed_users(self, count):
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(
+                username=f'user{number}', email=f'user{number}@example.com', password='!',
+                date_joined=now - timedelta(minutes=random.randint(0, 2 * 365 * 24 * 60)),
+            )
+            for number in range(count)
+        ], batch_size=BATCH_SIZE)
+
+        divisions = [name for name, _ in DIVISIONS]
+        UserProfile.objects.bulk_create([
+            UserProfile(
+                user=user,
+                role='servicer' if number % 10 == 0 else 'customer',
+                is_phone_verified=number % 3 == 0,
+                is_email_verified=number % 2 == 0,
+                is_available=number % 20 == 0,
+                service_area_division=random.choice(divisions),
+                support_link=UserProfile.build_support_link(user.id),
+                completed_jobs=random.randint(0, 50),
+            )
+            for number, user in enumerate(users)
+        ], batch_size=BATCH_SIZE)
+        return users
+
+    def _seed_service_requests(self, users, count):
+        now = timezone.now()
+        technicians = users[::10]
+        statuses = [choice for choice, _ in ServiceRequest.STATUS_CHOICES]
+        with _explicit_timestamps(ServiceRequest, 'created_at', 'updated_at'):
+            for start in range(0, count, BATCH_SIZE):
+                rows = []
+                for _ in range(start, min(count, start + BATCH_SIZE)):
+                    created = now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+                    rows.append(ServiceRequest(
+                        user=random.choice(users),
+                        technician=random.choice(technicians) if random.random() < 0.6 else None,
+                        problem_description='Water purifier is leaking',
+                        status=random.choice(statuses),
+                        created_at=created,
+                        updated_at=created,
+                    ))
+                ServiceRequest.objects.bulk_create(rows)
+
+    def _seed_assignments(self, users, count):
+        now = timezone.now()
+        categories = WorkCategory.objects.bulk_create([
+            WorkCategory(name=f'Category {number}') for number in range(10)
+        ])
+        customers = Customer.objects.bulk_create([
+            Customer(user=user) for user in users[1::10][:max(1, count // 4)]
+        ])
+        technicians = list(UserProfile.objects.filter(role='servicer'))
+        statuses = [choice for choice, _ in WorkAssignment.STATUS_CHOICES]
+        priorities = [choice for choice, _ in WorkAssignment.PRIORITY_CHOICES]
+        divisions = [name for name, _ in DIVISIONS]
+
+        with _explicit_timestamps(WorkAssignment, 'created_at', 'updated_at'):
+            for start in range(0, count, BATCH_SIZE):
+                rows = []
+                for number in range(start, min(count, start + BATCH_SIZE)):
+                    created = now - timedelta(minutes=random.randint(0, 365 * 24 * 60))
+                    rows.append(WorkAssignment(
+                        customer=random.choice(customers),
+                        title=f'Assignment {number}',
+                        description='Install purifier',
+                        category=random.choice(categories),
+                        assigned_to=random.choice(technicians) if technicians else None,
+                        assigned_by=users[0],
+                        client_name=f'Client {number}',
+                        division=random.choice(divisions),
+                        status=random.choice(statuses),
+                        priority=random.choice(priorities),
+                        estimated_cost=Decimal('1500.00'),
+                        created_at=created,
+                        updated_at=created,
+                    ))
+                assignments = WorkAssignment.objects.bulk_create(rows)
+                AssignmentHistory.objects.bulk_create([
+                    AssignmentHistory(
+                        assignment=assignment, changed_by=users[0],
+                        old_status='', new_status='pending', notes='Assignment created',
+                    )
+                    for assignment in assignments
+                ])
+
+    # Measuring
+
+    def _benchmark_user(self):
+        user, _ = User.objects.get_or_create(
+            username='benchmark-admin',
+            defaults={'email': 'benchmark-admin@example.com', 'is_staff': True},
+        )
+        UserProfile.objects.get_or_create(user=user, defaults={'role': 'admin'})
+        token, _ = Token.objects.get_or_create(user=user)
+        return token
+
+    def _endpoints(self):
+        slugs = list(City.objects.values_list('slug', flat=True)[:20]) or ['dhaka']
+        return [
+            ('city-page-data', [
+                f'/api/city-page-data/?city_slug={slug}&product_type={product_type}'
+                for slug in slugs for product_type in PRODUCT_TYPES
+            ]),
+            ('bangladesh-data', ['/api/bangladesh-data/']),
+            ('cities-bulk', ['/api/cities/bulk/']),
+            ('users', ['/api/auth/users/']),
+            ('assignments', ['/api/auth/assignments/']),
+            ('assignment-stats', ['/api/auth/assignment-stats/']),
+        ]
+
+    def _run_benchmarks(self, token, options):
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        cache = caches['default']
+        results = {}
+
+        for name, urls in self._endpoints():
+            cache.clear()
+
+            # The first request after a cache clear is the cold path
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(urls[0])
+                cold = time.perf_counter() - started
+            if response.status_code != 200:
+                self._log(f"{name}: skipped, {urls[0]} returned {response.status_code}")
+                results[name] = {'status': response.status_code}
+                continue
+
+            # Prime every URL once, so the timed loop measures cache hits
+            # only; the priming requests give the miss-path query count
+            miss_queries = [len(queries.captured_queries)]
+            for url in urls[1:]:
+                with CaptureQueriesContext(connection) as captured:
+                    client.get(url)
+                miss_queries.append(len(captured.captured_queries))
+            for index in range(options['warmup']):
+                client.get(urls[index % len(urls)])
+
+            timings = []
+            warm_queries = []
+            size = len(response.content)
+            run_started = time.perf_counter()
+            for index in range(options['requests']):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    client.get(urls[index % len(urls)])
+                    timings.append(time.perf_counter() - started)
+                warm_queries.append(len(captured.captured_queries))
+            elapsed = time.perf_counter() - run_started
+
+            timings.sort()
+            results[name] = {
+                'status': 200,
+                'cold_ms': round(cold * 1000, 2),
+                'cold_queries': len(queries.captured_queries),
+                'p50_ms': round(statistics.median(timings) * 1000, 2),
+                'p95_ms': round(timings[min(len(timings) - 1, int(0.95 * len(timings)))] * 1000, 2),
+                'mean_ms': round(statistics.mean(timings) * 1000, 2),
+                'throughput_rps': round(len(timings) / elapsed, 1),
+                'queries': max(warm_queries),  # cache hits
+                'miss_queries': max(miss_queries),
+                'bytes': size,
+            }
+            self._log(
+                f"{name}: p50 {results[name]['p50_ms']}ms, p95 {results[name]['p95_ms']}ms, "
+                f"{results[name]['queries']} queries warm ({results[name]['miss_queries']} on a miss), {size} bytes"
+            )
+        return results
+
+    # Reporting
+
+    def _write(self, path, report):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    def _compare(self, report, baseline_path, threshold):
+        if not os.path.exists(baseline_path):
+            self._log(f"No baseline at {baseline_path}; run with --save-baseline to create one")
+            return []
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+
+        failures = []
+        for name, current in report['endpoints'].items():
+            previous = baseline.get('endpoints', {}).get(name)
+            if not previous or previous.get('status') != 200:
+                continue
+            if current.get('status') != 200:
+                failures.append(f"{name}: now returns {current.get('status')}")
+                continue
+            # Query counts are deterministic, so any increase is a regression
+            if current['queries'] > previous['queries']:
+                failures.append(f"{name}: {current['queries']} queries warm (baseline {previous['queries']})")
+            if 'miss_queries' in previous and current['miss_queries'] > previous['miss_queries']:
+                failures.append(
+                    f"{name}: {current['miss_queries']} queries on a miss (baseline {previous['miss_queries']})"
+                )
+            if current['p50_ms'] > previous['p50_ms'] * (1 + threshold):
+                failures.append(
+                    f"{name}: p50 {current['p50_ms']}ms vs baseline {previous['p50_ms']}ms "
+                    f"(+{(current['p50_ms'] / previous['p50_ms'] - 1) * 100:.0f}%)"
+                )
+        return failures
@@ -0,0 +1,100 @@
+import io
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api import renderers
+from api.geography import get_geography_tree
+from api.models import City
+from api.views import CityPageDataViewSet, _user_list_response
+
+from .benchmark_api import Command as BenchmarkAPICommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare DRF\'s stdlib JSON renderer/parser with api.renderers (orjson) '
+        'on the city page, Bangladesh geography and user list payloads.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200,
+                            help='Renders/parses timed per payload and implementation')
+        parser.add_argument('--scale', type=float, default=0.05,
+                            help='Seed volume for the throwaway database (see benchmark_api --scale)')
+        parser.add_argument('--use-existing-db', action='store_true',
+                            help='Build the payloads from the configured database instead of seeded data')
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write('orjson is not installed; api.renderers falls back to the stdlib encoder')
+
+        if options['use_existing_db']:
+            payloads = self._payloads()
+        else:
+            setup_test_environment()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                seeder = BenchmarkAPICommand(stdout=self.stdout, stderr=self.stderr)
+                seeder.verbosity = 0
+                with transaction.atomic():
+                    seeder._seed_geography()
+                    seeder._seed_cities(3)
+                    seeder._seed_users(max(1, int(50000 * options['scale'])))
+                payloads = self._payloads()
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        iterations = options['iterations']
+        self.stdout.write(f"{'payload':<16}{'bytes':>10}{'render std':>12}{'render fast':>13}"
+                          f"{'parse std':>11}{'parse fast':>12}{'speedup':>9}")
+        for name, data in payloads:
+            content = JSONRenderer().render(data)
+            timings = [
+                self._time(lambda: JSONRenderer().render(data), iterations),
+                self._time(lambda: renderers.FastJSONRenderer().render(data), iterations),
+                self._time(lambda: JSONParser().parse(io.BytesIO(content)), iterations),
+                self._time(lambda: renderers.FastJSONParser().parse(io.BytesIO(content)), iterations),
+            ]
+            speedup = (timings[0] + timings[2]) / (timings[1] + timings[3])
+            self.stdout.write(
+                f"{name:<16}{len(content):>10}" + ''.join(f'{t:>{w}.3f}' for t, w in zip(timings, (12, 13, 11, 12)))
+                + f'{speedup:>8.1f}x'
+            )
+        self.stdout.write('Times are milliseconds per call')
+
+    def _payloads(self):
+        payloads = []
+
+        city = City.objects.order_by('id').first()
+        if city is not None:
+            payloads.append(('city-page-data', CityPageDataViewSet()._build_page_data(city.slug, 'copper')))
+
+        tree = get_geography_tree()
+        payloads.append(('bangladesh-data', [
+            {'division': entry.division, 'district': entry.district, 'thanas': list(entry.thanas)}
+            for entry in tree.entries
+        ]))
+
+        admin = User.objects.order_by('id').first()
+        request = APIRequestFactory().get('/api/auth/users/', {'page_size': 200})
+        request.user = admin
+        payloads.append(('users', _user_list_response(Request(request)).data))
+        return payloads
+
+    def _time(self, func, iterations):
+        func()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        return (time.perf_counter() - started) / iterations * 1000
@@ -0,0 +1,94 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.models import (
+    AssignmentHistory, City, CitySlide, ComparisonPoint, FAQ, FAQCategory,
+    HowItWorksStep, ProductFeature, Review, ServiceRequest, SmartFeature,
+    TechSpecification, TechStage, UserProfile, WhyChoosePoint, WorkAssignment,
+)
+
+PAGE = 51  # keyset pages fetch page_size + 1 rows
+
+
+def hot_queries():
+    """The filters and orderings the API runs on every request, as (label, queryset)"""
+    queries = [
+        ('users: newest first', User.objects.order_by('-date_joined', 'id')[:PAGE]),
+        ('users: by role', User.objects.filter(profile__role='servicer').order_by('-date_joined', 'id')[:PAGE]),
+        ('profiles: available technicians', UserProfile.objects.filter(role='servicer', is_available=True)),
+        ('assignments: newest first', WorkAssignment.objects.order_by('-created_at', 'id')[:PAGE]),
+        ('assignments: by status', WorkAssignment.objects.filter(status='pending').order_by('-created_at', 'id')[:PAGE]),
+        ('assignments: by priority', WorkAssignment.objects.filter(priority='urgent').order_by('-created_at', 'id')[:PAGE]),
+        ('assignments: by technician', WorkAssignment.objects.filter(assigned_to_id=1).order_by('-created_at', 'id')[:PAGE]),
+        ('assignments: by location', WorkAssignment.objects.filter(
+            division='Dhaka', district='Dhaka').order_by('-created_at', 'id')[:PAGE]),
+        ('assignment history', AssignmentHistory.objects.filter(assignment_id__in=[1, 2, 3])),
+        ('service requests: newest first', ServiceRequest.objects.order_by('-created_at', 'id')[:PAGE]),
+        ('service requests: by status', ServiceRequest.objects.filter(status='pending').order_by('-created_at', 'id')[:PAGE]),
+        ('service requests: by user', ServiceRequest.objects.filter(user_id=1).order_by('-created_at', 'id')[:PAGE]),
+        ('service requests: by technician', ServiceRequest.objects.filter(technician_id=1)),
+        ('city: by slug', City.objects.filter(slug='dhaka')),
+        ('city slides: active', CitySlide.objects.filter(city_id=1, is_active=True)),
+        ('reviews: active', Review.objects.filter(is_active=True)),
+    ]
+    for model in (
+        ProductFeature, TechSpecification, SmartFeature, TechStage, FAQCategory,
+        FAQ, WhyChoosePoint, HowItWorksStep, ComparisonPoint,
+    ):
+        queries.append((f'{model._meta.verbose_name}: active', model.objects.filter(is_active=True)))
+    return queries
+
+
+def sequential_scans(plan, vendor):
+    """Return the tables a query plan reads without an index"""
+    if vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    if vendor == 'sqlite':
+        # "SCAN t" is a full scan; "SCAN t USING [COVERING] INDEX i" walks an index
+        return [
+            match.group(1) for match in re.finditer(r'SCAN (\w+)(.*)', plan)
+            if 'USING' not in match.group(2)
+        ]
+    if vendor == 'mysql':
+        return re.findall(r'(\w+)\s+\S+\s+ALL\b', plan)
+    return []
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the API\'s hot queries and report sequential scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force-index', action='store_true',
+                            help='PostgreSQL: disable seq scans so small tables show whether an index could be used')
+        parser.add_argument('--fail', action='store_true',
+                            help='Exit with an error when any query does a sequential scan')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if options['force_index'] and vendor != 'postgresql':
+            raise CommandError('--force-index is only supported on PostgreSQL')
+
+        flagged = []
+        for label, queryset in hot_queries():
+            with transaction.atomic():
+                if options['force_index']:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.explain()
+
+            scans = sequential_scans(plan, vendor)
+            if scans:
+                flagged.append(label)
+                self.stdout.write(self.style.WARNING(f"SEQ SCAN  {label}: {', '.join(sorted(set(scans)))}"))
+            else:
+                self.stdout.write(f"ok        {label}")
+            if options['verbosity'] >= 2:
+                self.stdout.write(plan + '\n')
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('All hot queries use indexes'))
+        elif options['fail']:
+            raise CommandError(f'{len(flagged)} hot queries use sequential scans')
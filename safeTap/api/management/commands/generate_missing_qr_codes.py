@@ -0,0 +1,49 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api.models import UserProfile
+from api.qr import render_qr_png, save_qr_png
+
+
+class Command(BaseCommand):
+    help = 'Render QR codes for every profile that is missing one, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Number of worker processes (defaults to the CPU count)')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Profiles to load and update per batch')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+
+        # Profiles without a support link can't be rendered yet; fill those in first
+        for profile in UserProfile.objects.filter(Q(support_link__isnull=True) | Q(support_link='')).only('id', 'user_id'):
+            profile.support_link = UserProfile.build_support_link(profile.user_id)
+            profile.save(update_fields=['support_link'])
+
+        missing = UserProfile.objects.filter(Q(qr_image__isnull=True) | Q(qr_image='')).order_by('id')
+        total = missing.count()
+        self.stdout.write(f"Found {total} profiles without a QR code")
+
+        processed = 0
+        last_id = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(missing.filter(id__gt=last_id).only('id', 'support_link')[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                # Support links are unique per user; each one is rendered once
+                links = [profile.support_link for profile in batch]
+                for profile, png in zip(batch, pool.map(render_qr_png, links)):
+                    profile.qr_image = save_qr_png(png)
+                UserProfile.objects.bulk_update(batch, ['qr_image'])
+
+                processed += len(batch)
+                self.stdout.write(f"Processed {processed}/{total}")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated QR codes for {processed} profiles"))
@@ -0,0 +1,47 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importers import import_geography, read_geography_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Load Bangladesh divisions, districts and thanas from a JSON file '
+        '(list of {"division", "district", "thanas": [...]}) or a CSV file '
+        '(division, district, thana columns). Existing rows are kept.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='JSON or CSV file to load')
+        parser.add_argument('--format', choices=['json', 'csv'],
+                            help='File format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'json')
+
+        try:
+            with open(path, 'rb') as f:
+                if file_format == 'csv':
+                    report = import_geography(read_geography_csv(f), batch_size=options['batch_size'])
+                else:
+                    entries = json.load(f)
+                    if not isinstance(entries, list):
+                        raise CommandError('JSON data should be a list of geographical entries')
+                    report = import_geography(entries, batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except (ValueError, csv.Error) as e:
+            raise CommandError(f'Cannot parse {path}: {e}')
+
+        for error in report['errors']:
+            self.stderr.write(f"Skipped entry {error['entry']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {report['total_entries_processed']} entries: created "
+            f"{report['created_divisions']} divisions, {report['created_districts']} districts "
+            f"and {report['created_thanas']} thanas"
+        ))
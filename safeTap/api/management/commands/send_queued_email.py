@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.outbox import deliver_pending, purge_sent
+
+# Seconds between purges of old sent email while the worker runs
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbound email, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the currently due messages and exit')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Messages per batch/connection (default EMAIL_OUTBOX_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        last_purge = None
+        while True:
+            sent, failed = deliver_pending(batch_size=options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f"Sent {sent} emails, {failed} failed")
+                # A full batch means more may be due right away
+                continue
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purged = purge_sent()
+                if purged:
+                    self.stdout.write(f"Purged {purged} sent emails past retention")
+                last_purge = time.monotonic()
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -1,3 +1,15 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import perf
+
+logger = logging.getLogger('api.perf')
+
+
 class CustomCorsMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -12,3 +24,83 @@ class CustomCorsMiddleware:
         response["Access-Control-Allow-Credentials"] = "true"
         
         return response
+
+
+class PerfMiddleware:
+    """
+    Record query count, DB time, serializer/render time and response size
+    per URL name. Adds a Server-Timing header, logs requests over budget
+    (settings.API_PERF_BUDGETS / API_PERF_ENDPOINT_BUDGETS) and feeds the
+    ring buffer behind /api/_perf/.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'API_PERF_ENABLED', True)
+        self.server_timing = getattr(settings, 'API_PERF_SERVER_TIMING', True)
+        if self.enabled:
+            perf.install_serializer_timing()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats, token = perf.start_request()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Wrapping doesn't open a connection; it also covers ones opened later
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            perf.end_request(token)
+        total = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.view_name if match else None) or 'unresolved'
+        if response.streaming:
+            size = int(response['Content-Length']) if response.has_header('Content-Length') else None
+        else:
+            size = len(response.content)
+
+        sample = {
+            'total_ms': round(total * 1000, 2),
+            'queries': stats.queries,
+            'db_ms': round(stats.db_time * 1000, 2),
+            'serializer_ms': round(stats.timings.get('serializer', 0.0) * 1000, 2),
+            'render_ms': round(stats.timings.get('render', 0.0) * 1000, 2),
+            'bytes': size,
+        }
+        perf.registry.record(endpoint, sample)
+        self._check_budgets(request, endpoint, sample, stats)
+
+        if self.server_timing:
+            response['Server-Timing'] = stats.server_timing(total)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook runs
+        stats = perf.current_stats()
+        if stats is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                stats.add_time('render', time.perf_counter() - start)
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def _check_budgets(self, request, endpoint, sample, stats):
+        budgets = perf.get_budgets(endpoint)
+        exceeded = [
+            f"{name}={sample[name]} (budget {limit})"
+            for name, limit in budgets.items()
+            if limit is not None and sample.get(name) is not None and sample[name] > limit
+        ]
+        if exceeded:
+            logger.warning(
+                "Over budget: %s %s [%s] %s",
+                request.method, request.path, endpoint, ', '.join(exceeded),
+            )
+        for elapsed, sql in stats.slow_queries:
+            logger.warning("Slow query (%.1f ms) in %s: %s", elapsed, endpoint, sql[:500])
@@ -0,0 +1,77 @@
+# Generated by Django 6.0 on 2026-10-17 10:00
+
+import base64
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+
+def move_qr_codes_to_files(apps, schema_editor):
+    """Write every base64 qr_code blob to a content-addressed PNG file"""
+    UserProfile = apps.get_model('api', 'UserProfile')
+
+    profiles = (
+        UserProfile.objects
+        .exclude(qr_code__isnull=True)
+        .exclude(qr_code='')
+        .only('id', 'qr_code')
+    )
+    batch = []
+    for profile in profiles.iterator(chunk_size=BATCH_SIZE):
+        try:
+            png = base64.b64decode(profile.qr_code)
+        except (ValueError, TypeError):
+            # Unreadable blob: drop it, the QR code is regenerated on demand
+            png = None
+
+        if png:
+            name = 'qr_codes/%s.png' % hashlib.sha256(png).hexdigest()
+            if not default_storage.exists(name):
+                name = default_storage.save(name, ContentFile(png))
+            profile.qr_image = name
+        profile.qr_code = None
+        batch.append(profile)
+
+        if len(batch) >= BATCH_SIZE:
+            UserProfile.objects.bulk_update(batch, ['qr_image', 'qr_code'])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ['qr_image', 'qr_code'])
+
+
+def move_qr_files_to_codes(apps, schema_editor):
+    """Reverse: inline the stored PNG files back into qr_code"""
+    UserProfile = apps.get_model('api', 'UserProfile')
+
+    batch = []
+    for profile in UserProfile.objects.exclude(qr_image='').exclude(qr_image__isnull=True).iterator(chunk_size=BATCH_SIZE):
+        with default_storage.open(profile.qr_image.name, 'rb') as f:
+            profile.qr_code = base64.b64encode(f.read()).decode()
+        batch.append(profile)
+
+        if len(batch) >= BATCH_SIZE:
+            UserProfile.objects.bulk_update(batch, ['qr_code'])
+            batch = []
+    if batch:
+        UserProfile.objects.bulk_update(batch, ['qr_code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_remove_cityslide_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='qr_image',
+            field=models.ImageField(blank=True, null=True, upload_to='qr_codes/'),
+        ),
+        migrations.RunPython(move_qr_codes_to_files, move_qr_files_to_codes),
+    ]
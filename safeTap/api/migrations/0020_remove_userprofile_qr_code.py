@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 10:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_userprofile_qr_image'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='qr_code',
+        ),
+    ]
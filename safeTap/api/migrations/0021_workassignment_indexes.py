@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_remove_userprofile_qr_code'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workassignment',
+            index=models.Index(fields=['-created_at', 'id'], name='assignment_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workassignment',
+            index=models.Index(fields=['status', '-created_at'], name='assignment_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workassignment',
+            index=models.Index(fields=['priority', '-created_at'], name='assignment_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workassignment',
+            index=models.Index(fields=['assigned_to', '-created_at'], name='assignment_technician_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workassignment',
+            index=models.Index(fields=['division', 'district', '-created_at'], name='assignment_location_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-17 23:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_workassignment_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # auth_user belongs to django.contrib.auth, so its index for the
+        # keyset-paginated user list (-date_joined, id) is created here
+        migrations.RunSQL(
+            'CREATE INDEX api_user_joined_idx ON auth_user (date_joined DESC, id)',
+            'DROP INDEX api_user_joined_idx',
+        ),
+        migrations.AddIndex(
+            model_name='cityslide',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['city', 'order'], name='cityslide_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comparisonpoint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='comparison_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='faq_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='faqcategory',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='faqcategory_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='howitworksstep',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='howitworks_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productfeature',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='productfeature_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='review_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicerequest',
+            index=models.Index(fields=['user', '-created_at'], name='servicerequest_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smartfeature',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='smartfeature_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='techspecification',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='techspec_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='techstage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='techstage_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['role', 'is_available'], name='userprofile_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='whychoosepoint',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order'], name='whychoose_active_idx'),
+        ),
+    ]
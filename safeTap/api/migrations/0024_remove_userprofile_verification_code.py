@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 15:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_outboundemail'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='verification_code',
+        ),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='verification_code_expires_at',
+        ),
+    ]
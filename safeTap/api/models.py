@@ -1,12 +1,13 @@
 import uuid
-import qrcode
-from io import BytesIO
-import base64
 from django.db import models
+from django.db.models.fields.files import FieldFile
 from django.contrib.auth.models import User
+from django.urls import reverse
 from django.utils.text import slugify
 from django.utils import timezone
 
+from .qr import qr_image_version, read_qr_image_base64, schedule_profile_qr_code, store_qr_image
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
@@ -34,8 +35,6 @@ class UserProfile(models.Model):
     is_phone_verified = models.BooleanField(default=False)
     is_email_verified = models.BooleanField(default=False)
     verification_token = models.CharField(max_length=255, blank=True, null=True)
-    verification_code = models.CharField(max_length=10, blank=True, null=True)
-    verification_code_expires_at = models.DateTimeField(blank=True, null=True)
     pin = models.CharField(max_length=10, blank=True, null=True)  # Add this field
     service_area_division = models.CharField(max_length=100, blank=True, null=True)
     service_area_district = models.CharField(max_length=100, blank=True, null=True)
@@ -45,51 +44,115 @@ class UserProfile(models.Model):
     service_rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
     completed_jobs = models.IntegerField(default=0)
     support_link = models.URLField(blank=True, null=True)
-    qr_code = models.TextField(blank=True, null=True)
+    qr_image = models.ImageField(upload_to='qr_codes/', blank=True, null=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['role', 'is_available'], name='userprofile_role_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.role}"
     
-    def generate_support_link(self):
+    # Partial writes: views set attributes as before and call save_changes(),
+    # which UPDATEs only the columns that differ from what was loaded.
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._remember_values(kwargs.get('update_fields'))
+    
+    def _remember_values(self, field_names=None):
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field_names is not None and field.name not in field_names and field.attname not in field_names:
+                continue
+            value = self.__dict__.get(field.attname)
+            if hasattr(value, 'resolve_expression'):
+                # F() counters: defer the field so it is reloaded on next access
+                loaded.pop(field.attname, None)
+                del self.__dict__[field.attname]
+            elif field.attname in self.__dict__:
+                # Keep file names, not FieldFile objects that are edited in place
+                loaded[field.attname] = value.name if isinstance(value, FieldFile) else value
+    
+    def changed_fields(self):
+        """Names of fields changed since the profile was loaded or last saved"""
+        loaded = getattr(self, '_loaded_values', {})
+        changed = []
+        for field in self._meta.concrete_fields:
+            if field.primary_key or field.attname not in self.__dict__:
+                continue
+            value = self.__dict__[field.attname]
+            if hasattr(value, 'resolve_expression') or field.attname not in loaded or value != loaded[field.attname]:
+                changed.append(field.name)
+        return changed
+    
+    def save_changes(self):
+        """Write the changed columns in one UPDATE (nothing if none changed); return their names"""
+        if self._state.adding:
+            self.save()
+            return [field.name for field in self._meta.concrete_fields]
+        changed = self.changed_fields()
+        if changed:
+            self.save(update_fields=changed)
+        return changed
+    
+    def record_completed_job(self):
+        """Count a finished job and free the technician, in one UPDATE"""
+        self.completed_jobs = models.F('completed_jobs') + 1
+        self.is_available = True
+        self.save_changes()
+    
+    @staticmethod
+    def build_support_link(user_id):
+        """Return the support link for a user id"""
+        return f"http://localhost:3000/support/{user_id}"
+    
+    def generate_support_link(self, save=True):
         """Generate a unique support link for this user"""
         if not self.support_link:
-            self.support_link = f"http://localhost:3000/support/{self.user.id}"
-            self.save()
+            self.support_link = self.build_support_link(self.user_id)
+            if save:
+                self.save_changes()
         return self.support_link
     
     def generate_qr_code(self):
-        """Generate QR code for this user's support link"""
+        """Generate and store the QR code image for this user's support link"""
         try:
             # Generate support link first if it doesn't exist
             if not self.support_link:
-                self.generate_support_link()
+                self.generate_support_link(save=False)
             
-            # Create the QR code
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            qr.add_data(self.support_link)
-            qr.make(fit=True)
-            
-            # Create an image from the QR Code
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            # Convert the image to a base64 string
-            buffer = BytesIO()
-            img.save(buffer, format="PNG")
-            img_str = base64.b64encode(buffer.getvalue()).decode()
-            
-            self.qr_code = img_str
-            self.save()
-            return img_str
+            self.qr_image.name = store_qr_image(self.support_link)
+            self.save_changes()
+            return self.qr_code_data()
         except Exception as e:
             print(f"Error generating QR code: {str(e)}")
             import traceback
             traceback.print_exc()
             return ""
+    
+    def qr_code_data(self):
+        """Base64 PNG of the stored QR code image for single-profile responses"""
+        if not self.qr_image:
+            return None
+        return read_qr_image_base64(self.qr_image.name)
+    
+    def qr_code_url(self, request=None):
+        """Versioned URL of the QR code image, or None until it has been generated"""
+        if not self.qr_image:
+            return None
+        url = '%s?v=%s' % (reverse('user_qr_png', args=[self.user_id]), qr_image_version(self.qr_image.name))
+        return request.build_absolute_uri(url) if request else url
+    
+    def schedule_qr_code(self):
+        """Render and store this profile's QR code on the background worker pool"""
+        schedule_profile_qr_code(self.pk)
 
 
 # Add a signal to create UserProfile when a User is created
@@ -100,13 +163,13 @@ from django.dispatch import receiver
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         # Only create if it doesn't already exist (to avoid conflicts)
-        profile, profile_created = UserProfile.objects.get_or_create(user=instance)
-        
-        # Generate support link and QR code for new user
+        # The support link is part of the INSERT; the QR code is rendered in the background
+        profile, profile_created = UserProfile.objects.get_or_create(
+            user=instance, defaults={'support_link': UserProfile.build_support_link(instance.pk)}
+        )
         if profile_created:
-            profile.generate_support_link()
-            profile.generate_qr_code()
-            print(f"Profile with QR code created for user: {instance.username}")
+            profile.schedule_qr_code()
+            print(f"Profile created for user: {instance.username}")
 
 
 # Add this Customer model that was missing
@@ -197,6 +260,14 @@ class WorkAssignment(models.Model):
         verbose_name = "Work Assignment"
         verbose_name_plural = "Work Assignments"
         ordering = ['-created_at']
+        # Back the keyset-paginated listing and its filters (see work_assignments)
+        indexes = [
+            models.Index(fields=['-created_at', 'id'], name='assignment_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='assignment_status_idx'),
+            models.Index(fields=['priority', '-created_at'], name='assignment_priority_idx'),
+            models.Index(fields=['assigned_to', '-created_at'], name='assignment_technician_idx'),
+            models.Index(fields=['division', 'district', '-created_at'], name='assignment_location_idx'),
+        ]
 
 
 class AssignmentHistory(models.Model):
@@ -243,6 +314,11 @@ class ServiceRequest(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='servicerequest_user_idx'),
+            models.Index(fields=['-created_at', 'id'], name='servicerequest_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='servicerequest_status_idx'),
+        ]
     
     def __str__(self):
         return f"Service Request #{self.id} - {self.user.username}"
@@ -266,6 +342,41 @@ class ServiceRequestVideo(models.Model):
         return f"Video for Request #{self.service_request.id}"
 
 
+class OutboundEmail(models.Model):
+    """An email waiting to be delivered by the outbox worker (see api/outbox.py)"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),  # claimed by a worker until next_attempt_at (the lease)
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),  # gave up after EMAIL_OUTBOX_MAX_ATTEMPTS
+    )
+    
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=254)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+    
+    class Meta:
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'], name='outbox_due_idx',
+                condition=models.Q(status__in=['pending', 'sending']),
+            ),
+            models.Index(fields=['sent_at'], name='outbox_sent_idx', condition=models.Q(status='sent')),
+        ]
+
+
 # New models for Bangladesh geographical data
 class Division(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -340,6 +451,9 @@ class CitySlide(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['city', 'order'], name='cityslide_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return f"{self.city.name} - {self.product_type} - {self.title}"
@@ -375,6 +489,9 @@ class ProductFeature(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='productfeature_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -398,6 +515,9 @@ class TechSpecification(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='techspec_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -412,6 +532,9 @@ class SmartFeature(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='smartfeature_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -425,6 +548,9 @@ class TechStage(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='techstage_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -438,6 +564,9 @@ class FAQCategory(models.Model):
     class Meta:
         ordering = ['order']
         verbose_name_plural = "FAQ Categories"
+        indexes = [
+            models.Index(fields=['order'], name='faqcategory_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.name
@@ -452,6 +581,9 @@ class FAQ(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='faq_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.question
@@ -469,6 +601,9 @@ class Review(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='review_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.rating}/5"
@@ -484,6 +619,9 @@ class WhyChoosePoint(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='whychoose_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -497,6 +635,9 @@ class HowItWorksStep(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='howitworks_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.title
@@ -551,6 +692,9 @@ class ComparisonPoint(models.Model):
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['order'], name='comparison_active_idx', condition=models.Q(is_active=True)),
+        ]
     
     def __str__(self):
         return self.category
@@ -659,16 +803,14 @@ class ComparisonPoint(models.Model):
 #             traceback.print_exc()
 #             return ""
 
-# Signal to create UserProfile when User is created
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
-
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, **kwargs):
+    # Only a profile loaded through this user can carry unsaved edits; don't
+    # fetch (or rewrite) the profile on every User save, e.g. each login.
+    if created or not User.profile.related.is_cached(instance):
+        return
     try:
-        instance.profile.save()
+        instance.profile.save_changes()
     except UserProfile.DoesNotExist:
         UserProfile.objects.create(user=instance)
     
@@ -0,0 +1,77 @@
+"""
+One-time phone verification codes.
+
+Codes live in the API cache (see api/cache.py), keyed by a hash of the
+phone number, and expire after OTP_TTL seconds. Only an HMAC of the code is
+stored, verification compares digests in constant time, and a number gets
+OTP_MAX_ATTEMPTS guesses per code. Every guess reserves an attempt with an
+atomic cache increment before the code is compared, so parallel guesses
+can't slip past the limit. Nothing is written to the database.
+
+The cache must be shared by every worker (Redis or memcached in
+production), otherwise a code issued by one process is unknown to the next
+(see check api.W001 in api/cache.py).
+"""
+import hashlib
+import hmac
+import time
+
+from django.conf import settings
+
+from .cache import get_cache
+
+VALID = 'valid'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+
+def _keys(phone):
+    digest = hashlib.sha256(phone.encode('utf-8')).hexdigest()[:32]
+    return f'otp:{digest}', f'otp_attempts:{digest}'
+
+
+def _code_digest(phone, code):
+    key = settings.SECRET_KEY.encode('utf-8')
+    return hmac.new(key, f'{phone}:{code}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def issue(phone, code):
+    """Store `code` for `phone`, replacing any earlier one"""
+    ttl = getattr(settings, 'OTP_TTL', 600)
+    code_key, attempts_key = _keys(phone)
+    cache = get_cache()
+    cache.set(code_key, {'digest': _code_digest(phone, code), 'expires_at': time.time() + ttl}, timeout=ttl)
+    cache.delete(attempts_key)
+
+
+def verify(phone, code):
+    """
+    Check a code and consume it on success.
+
+    Returns VALID, INVALID (wrong code), EXPIRED (no live code for the
+    number) or LOCKED (too many wrong guesses).
+    """
+    code_key, attempts_key = _keys(phone)
+    cache = get_cache()
+    entry = cache.get(code_key)
+    if entry is None or entry['expires_at'] <= time.time():
+        return EXPIRED
+
+    # Reserve the attempt before comparing: the increment is atomic, so
+    # concurrent guesses each get their own number and the limit holds
+    remaining = max(1, int(entry['expires_at'] - time.time()))
+    cache.add(attempts_key, 0, timeout=remaining)
+    try:
+        attempt = cache.incr(attempts_key)
+    except ValueError:
+        # Evicted between add() and incr(); count this guess as the first
+        cache.set(attempts_key, 1, timeout=remaining)
+        attempt = 1
+    if attempt > getattr(settings, 'OTP_MAX_ATTEMPTS', 5):
+        return LOCKED
+
+    if hmac.compare_digest(entry['digest'], _code_digest(phone, str(code))):
+        cache.delete_many([code_key, attempts_key])
+        return VALID
+    return INVALID
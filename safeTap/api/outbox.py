@@ -0,0 +1,143 @@
+"""
+Durable outbox for transactional email.
+
+Views call queue_email(), which only inserts an OutboundEmail row, so a
+request never waits on the mail server. Queued mail is delivered by
+deliver_pending(): right after the request's transaction commits (on the
+background pool, see api/tasks.py) and by the `send_queued_email` worker
+command, which also retries failures. Each batch is sent over a single
+backend connection. A failed message is retried with exponential backoff
+and marked dead after EMAIL_OUTBOX_MAX_ATTEMPTS.
+
+A batch is claimed in a short transaction that marks its rows 'sending'
+with a lease (next_attempt_at = now + EMAIL_OUTBOX_LEASE); the mail
+server is only contacted after that transaction commits, so no row lock
+is held over SMTP. Rows left 'sending' by a worker that died are claimed
+again once their lease runs out. purge_sent() deletes delivered rows
+older than EMAIL_OUTBOX_RETENTION_DAYS.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+from .tasks import run_in_background
+
+
+def queue_email(subject, body, to, from_email=None, deliver_now=True):
+    """
+    Queue an email for delivery and return the OutboundEmail.
+
+    With `deliver_now` the outbox is flushed on the background pool once
+    the current transaction commits; otherwise the worker picks it up.
+    """
+    if isinstance(to, str):
+        to = [to]
+    email = OutboundEmail.objects.create(
+        to=list(to),
+        from_email=from_email or getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@yourdomain.com'),
+        subject=subject,
+        body=body,
+    )
+    if deliver_now:
+        run_in_background(deliver_pending)
+    return email
+
+
+def retry_delay(attempts):
+    """Seconds to wait before the next attempt after `attempts` failures"""
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return min(base * 2 ** (attempts - 1), getattr(settings, 'EMAIL_OUTBOX_MAX_RETRY_DELAY', 3600))
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = error
+    if email.attempts >= getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5):
+        email.status = 'dead'
+        print(f"Giving up on email {email.id} to {', '.join(email.to)} after {email.attempts} attempts: {error}")
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = now + timedelta(seconds=retry_delay(email.attempts))
+
+
+def claim_due(batch_size, now):
+    """
+    Lease up to `batch_size` due emails to this worker and return them.
+
+    Due means pending and scheduled, or 'sending' with an expired lease.
+    The rows are locked only for the length of this short transaction.
+    """
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(
+            status__in=['pending', 'sending'], next_attempt_at__lte=now,
+        ).order_by('next_attempt_at')
+        if db_connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        emails = list(due[:batch_size])
+        if emails:
+            lease_until = now + timedelta(seconds=getattr(settings, 'EMAIL_OUTBOX_LEASE', 300))
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status='sending', next_attempt_at=lease_until,
+            )
+    return emails
+
+
+def deliver_pending(batch_size=None, connection=None):
+    """
+    Send due emails, one batch over one connection; return (sent, failed).
+
+    The batch is leased first (see claim_due), so several workers can run
+    side by side without sending the same message twice.
+    """
+    batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 100)
+    now = timezone.now()
+    emails = claim_due(batch_size, now)
+    if not emails:
+        return 0, 0
+
+    sent = failed = 0
+    mail_connection = connection or get_connection()
+    try:
+        mail_connection.open()
+    except Exception as e:
+        # Nothing can go out; count the attempt against every message
+        for email in emails:
+            _record_failure(email, f'Connection failed: {e}', now)
+        failed = len(emails)
+    else:
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    email.subject, email.body, email.from_email, email.to,
+                    connection=mail_connection,
+                )
+                try:
+                    message.send()
+                except Exception as e:
+                    _record_failure(email, str(e), now)
+                    failed += 1
+                else:
+                    email.status = 'sent'
+                    email.attempts += 1
+                    email.sent_at = timezone.now()
+                    email.last_error = ''
+                    sent += 1
+        finally:
+            mail_connection.close()
+
+    OutboundEmail.objects.bulk_update(
+        emails, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+    )
+    return sent, failed
+
+
+def purge_sent(days=None):
+    """Delete emails delivered more than `days` ago; return how many were removed"""
+    days = getattr(settings, 'EMAIL_OUTBOX_RETENTION_DAYS', 30) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboundEmail.objects.filter(status='sent', sent_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,136 @@
+"""
+Keyset (cursor) pagination for large, append-mostly tables.
+
+Pages are addressed by the ordering values of the last row seen rather than
+an OFFSET, so every page costs one indexed range scan no matter how deep the
+client goes, and rows inserted meanwhile never shift a page.
+"""
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+def _encode_value(value):
+    # Full-precision isoformat: DjangoJSONEncoder drops microseconds, which
+    # would make the cursor skip or repeat rows with near-identical timestamps.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a fixed ordering that ends in a unique field.
+
+    `ordering` may mix directions, e.g. ('-date_joined', 'id'). The cursor
+    is an opaque, URL-safe encoding of the last row's ordering values.
+    """
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    # Listings moved here from page-number pagination; a client still sending
+    # ?page=N gets a 400 rather than the first page over and over
+    page_query_param = 'page'
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if not value:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError(f'{self.page_size_query_param} must be an integer')
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, position):
+        data = json.dumps(position, default=_encode_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        except (ValueError, TypeError):
+            raise ValidationError('Invalid cursor')
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise ValidationError('Invalid cursor')
+        return position
+
+    def _after(self, position):
+        # (a, b) after (x, y) == a beyond x OR (a == x AND b beyond y), with
+        # "beyond" meaning < for descending fields and > for ascending ones.
+        clauses = []
+        equal = {}
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        return reduce(operator.or_, clauses)
+
+    def _position(self, row):
+        position = []
+        for field in self.ordering:
+            value = row
+            for attr in field.lstrip('-').split('__'):
+                value = value[attr] if isinstance(value, dict) else getattr(value, attr)
+            position.append(value)
+        return position
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        if self.page_query_param in request.query_params:
+            raise ValidationError(f'{self.page_query_param} is not supported; follow the next link')
+        size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        # One extra row tells us whether there is a next page without a COUNT
+        try:
+            if position is not None:
+                queryset = queryset.filter(self._after(position))
+            rows = list(queryset[:size + 1])
+        except (DjangoValidationError, ValueError, TypeError):
+            # A tampered cursor carrying values the columns can't take
+            raise ValidationError('Invalid cursor')
+        self.next_position = self._position(rows[size - 1]) if len(rows) > size else None
+        return rows[:size]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class UserKeysetPagination(KeysetPagination):
+    """Newest users first; id breaks ties between identical join times"""
+    ordering = ('-date_joined', 'id')
+
+
+class WorkAssignmentKeysetPagination(KeysetPagination):
+    """Newest assignments first; id breaks ties between identical creation times"""
+    ordering = ('-created_at', 'id')
+
+
+class ServiceRequestKeysetPagination(KeysetPagination):
+    """Newest service requests first; id breaks ties between identical creation times"""
+    ordering = ('-created_at', 'id')
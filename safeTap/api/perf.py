@@ -0,0 +1,166 @@
+"""
+Per-request performance accounting.
+
+PerfMiddleware (api/middleware.py) opens a RequestStats for every request
+and wraps each database connection so that query count and DB time are
+recorded as queries run. Serializer and render time are attributed through
+timed(). Finished requests feed a per-endpoint ring buffer whose
+percentiles are served by the admin-only /api/_perf/ endpoint.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('api_perf_stats', default=None)
+
+DEFAULT_BUDGETS = {
+    'queries': 50,
+    'db_ms': 250,
+    'total_ms': 1000,
+    'bytes': 1024 * 1024,
+}
+
+METRICS = ('total_ms', 'queries', 'db_ms', 'serializer_ms', 'render_ms', 'bytes')
+
+
+class RequestStats:
+    """Counters for a single request"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_queries = []
+        self.timings = {}
+        self._depth = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            if elapsed * 1000 >= getattr(settings, 'API_PERF_SLOW_QUERY_MS', 100):
+                self.slow_queries.append((elapsed * 1000, sql))
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def server_timing(self, total):
+        parts = ['db;dur=%.1f;desc="%d queries"' % (self.db_time * 1000, self.queries)]
+        for name, seconds in self.timings.items():
+            parts.append('%s;dur=%.1f' % (name, seconds * 1000))
+        parts.append('total;dur=%.1f' % (total * 1000))
+        return ', '.join(parts)
+
+
+def current_stats():
+    """Stats of the request being handled in this context, if any"""
+    return _current.get()
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """Attribute the time spent in the block to `name` on the current request"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+
+    # Only the outermost block of a name counts, so nested calls aren't double counted
+    depth = stats._depth.get(name, 0)
+    stats._depth[name] = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats._depth[name] = depth
+        if depth == 0:
+            stats.add_time(name, time.perf_counter() - start)
+
+
+def install_serializer_timing():
+    """Time every top-level DRF `serializer.data` access as "serializer" """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, '_perf_timed', False):
+        return
+
+    def data(self):
+        with timed('serializer'):
+            return original.fget(self)
+
+    data._perf_timed = True
+    BaseSerializer.data = property(data)
+
+
+def get_budgets(endpoint):
+    budgets = dict(DEFAULT_BUDGETS)
+    budgets.update(getattr(settings, 'API_PERF_BUDGETS', {}))
+    budgets.update(getattr(settings, 'API_PERF_ENDPOINT_BUDGETS', {}).get(endpoint, {}))
+    return budgets
+
+
+def _percentile(ordered, fraction):
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class PerfRegistry:
+    """Recent samples per endpoint, kept in bounded ring buffers"""
+
+    def __init__(self, size=None):
+        self.size = size
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, sample):
+        size = self.size or getattr(settings, 'API_PERF_SAMPLES', 500)
+        with self._lock:
+            samples = self._samples.get(endpoint)
+            if samples is None:
+                samples = self._samples[endpoint] = deque(maxlen=size)
+            samples.append(sample)
+
+    def snapshot(self):
+        """Return {endpoint: {'count': n, metric: {'p50', 'p95', 'p99', 'max'}}}"""
+        with self._lock:
+            samples = {endpoint: list(values) for endpoint, values in self._samples.items()}
+
+        report = {}
+        for endpoint, values in sorted(samples.items()):
+            entry = {'count': len(values)}
+            for metric in METRICS:
+                ordered = sorted(value[metric] for value in values if value.get(metric) is not None)
+                if not ordered:
+                    continue
+                entry[metric] = {
+                    'p50': _percentile(ordered, 0.50),
+                    'p95': _percentile(ordered, 0.95),
+                    'p99': _percentile(ordered, 0.99),
+                    'max': ordered[-1],
+                }
+            report[endpoint] = entry
+        return report
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+
+registry = PerfRegistry()
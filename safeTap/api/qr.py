@@ -0,0 +1,135 @@
+"""
+QR code rendering for support links.
+
+Profile QR codes are produced on the background worker pool (see
+api/tasks.py) so signup never waits on image encoding, and are stored as
+content-addressed files (qr_codes/<sha256>.png) that the API serves with
+immutable caching. The stored file is the only copy of a PNG; SVGs are
+rendered on demand and kept in the cache for QR_SVG_CACHE_TIMEOUT seconds.
+"""
+import base64
+import hashlib
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .cache import get_cache
+from .tasks import run_in_background
+
+
+def render_qr_png(data):
+    """Render `data` as a PNG QR code and return the raw bytes"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def render_qr_svg(data):
+    """Render `data` as an SVG QR code and return the raw bytes"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+        image_factory=qrcode.image.svg.SvgPathImage,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    qr.make_image().save(buffer)
+    return buffer.getvalue()
+
+
+def qr_cache_key(data, fmt='png'):
+    return 'qr:%s:%s' % (fmt, hashlib.sha256(data.encode('utf-8')).hexdigest())
+
+
+def qr_code_base64(data):
+    """Render the PNG QR code for `data` and return it base64-encoded"""
+    return base64.b64encode(render_qr_png(data)).decode()
+
+
+def qr_code_svg(data):
+    """Return the SVG QR code for `data`, rendering it only on a cache miss"""
+    cache = get_cache()
+    key = qr_cache_key(data, 'svg')
+    svg = cache.get(key)
+    if svg is None:
+        svg = render_qr_svg(data)
+        cache.set(key, svg, timeout=getattr(settings, 'QR_SVG_CACHE_TIMEOUT', 3600))
+    return svg
+
+
+def save_qr_png(png):
+    """Store PNG bytes under a content-addressed name and return that name"""
+    name = 'qr_codes/%s.png' % hashlib.sha256(png).hexdigest()
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(png))
+    return name
+
+
+def store_qr_image(data):
+    """Store the PNG QR code for `data` and return its storage name"""
+    return save_qr_png(render_qr_png(data))
+
+
+def read_qr_image_base64(name):
+    """Base64 of a stored QR image, or None if the file is gone"""
+    try:
+        with default_storage.open(name, 'rb') as f:
+            return base64.b64encode(f.read()).decode()
+    except OSError:
+        return None
+
+
+def qr_image_version(name):
+    """Short content hash used to version QR image URLs"""
+    return name.rsplit('/', 1)[-1].split('.', 1)[0][:16] if name else ''
+
+
+def generate_profile_qr_code(profile_id):
+    """Render and store the QR code image for a profile's current support link"""
+    from .models import UserProfile
+
+    support_link = (
+        UserProfile.objects.filter(pk=profile_id)
+        .values_list('support_link', flat=True)
+        .first()
+    )
+    if not support_link:
+        return None
+
+    name = store_qr_image(support_link)
+    UserProfile.objects.filter(pk=profile_id, support_link=support_link).update(qr_image=name)
+    return name
+
+
+def schedule_profile_qr_code(profile_id):
+    """Queue QR generation for a profile on the background worker pool"""
+    run_in_background(generate_profile_qr_code, profile_id)
+
+
+def schedule_missing_qr_code(profile_id):
+    """
+    Queue QR generation for a profile whose image is missing, at most once
+    per QR_RETRY_INTERVAL, so repeated requests for a public QR URL can't
+    flood the worker pool.
+    """
+    timeout = getattr(settings, 'QR_RETRY_INTERVAL', 300)
+    if get_cache().add(f'qr_pending:{profile_id}', True, timeout=timeout):
+        schedule_profile_qr_code(profile_id)
@@ -0,0 +1,157 @@
+"""
+Read-only serialization for the public content endpoints.
+
+A ValuesSerializer produces the same JSON as the ModelSerializer it is
+built from, but from `.values()` rows instead of model instances. The
+per-field converters are worked out once, from the ModelSerializer's own
+fields, and media URLs are made absolute with a single prefix computed
+per request. The per-row build_absolute_uri() calls are gone. Writes
+still go through the ModelSerializer.
+"""
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.http import Http404
+from django.utils.encoding import filepath_to_uri
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+
+from .serializers import (
+    CitySlideSerializer, CityStatsSerializer, ComparisonPointSerializer, FAQCategorySerializer,
+    FAQSerializer, HowItWorksStepSerializer, PricingPlanSerializer, ProductFeatureSerializer,
+    ProductInfoSerializer, ReviewSerializer, SmartFeatureSerializer, TechSpecificationSerializer,
+    TechStageSerializer, WhyChoosePointSerializer,
+)
+
+# DRF fields whose to_representation() is a no-op for values read from the database
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.BooleanField,
+    serializers.FloatField, serializers.ChoiceField, relations.PrimaryKeyRelatedField,
+)
+
+
+def _passthrough(value):
+    return value
+
+
+def _file_url_builder(storage, origin):
+    """Return name -> absolute URL for files in `storage`"""
+    if isinstance(storage, FileSystemStorage) and storage.base_url.startswith('/'):
+        # What FileSystemStorage.url() computes, without a urljoin() per file
+        prefix = origin + storage.base_url
+
+        def build(name):
+            return prefix + filepath_to_uri(name).lstrip('/')
+    else:
+        def build(name):
+            url = storage.url(name)
+            return origin + url if url.startswith('/') else url
+    return build
+
+
+class ValuesSerializer:
+    """
+    Read-only twin of `serializer_class`. `url_fields` maps output names of
+    SerializerMethodFields that return a file's absolute URL (image_url,
+    avatar_url) to the file field they read.
+    """
+
+    def __init__(self, serializer_class, url_fields=None):
+        self.serializer_class = serializer_class
+        self.url_fields = url_fields or {}
+        self._plan = None
+
+    @property
+    def plan(self):
+        """(output name, values() key, converter or None for file URLs, storage)"""
+        if self._plan is None:
+            self._plan = self._compile()
+        return self._plan
+
+    def _compile(self):
+        model = self.serializer_class.Meta.model
+        plan = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in self.url_fields:
+                    raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} has no values() equivalent')
+                source = self.url_fields[name]
+                plan.append((name, source, None, model._meta.get_field(source).storage))
+            elif isinstance(field, serializers.FileField):
+                plan.append((name, field.source, None, model._meta.get_field(field.source).storage))
+            elif isinstance(field, (serializers.Serializer, relations.ManyRelatedField)):
+                raise ImproperlyConfigured(f'{self.serializer_class.__name__}.{name} has no values() equivalent')
+            else:
+                converter = _passthrough if isinstance(field, PASSTHROUGH_FIELDS) else field.to_representation
+                plan.append((name, field.source.replace('.', '__'), converter, None))
+        return plan
+
+    def values(self, queryset):
+        """`queryset` as dict rows holding exactly the columns the output needs"""
+        return queryset.values(*dict.fromkeys(source for _, source, _, _ in self.plan))
+
+    def serialize(self, rows, request=None):
+        """Serialize values() rows as the ModelSerializer would with `request` in its context"""
+        origin = request.build_absolute_uri('/')[:-1] if request is not None else ''
+        plan = [
+            (name, source, converter or _file_url_builder(storage, origin), converter is None)
+            for name, source, converter, storage in self.plan
+        ]
+        data = []
+        for row in rows:
+            item = {}
+            for name, source, converter, is_file in plan:
+                value = row[source]
+                if value is None or (is_file and not value):
+                    item[name] = None
+                else:
+                    item[name] = converter(value)
+            data.append(item)
+        return data
+
+
+class FastReadMixin:
+    """
+    Serve list and retrieve from `read_serializer` (a ValuesSerializer);
+    create/update keep using `serializer_class`. Only for viewsets without
+    object-level permissions, as no model instance is loaded.
+    """
+    read_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        rows = self.read_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.read_serializer.serialize(page, request))
+        return Response(self.read_serializer.serialize(rows, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            # A lookup value the field can't take, e.g. /faqs/abc/
+            raise Http404
+        rows = list(self.read_serializer.values(queryset)[:1])
+        if not rows:
+            raise Http404
+        return Response(self.read_serializer.serialize(rows, request)[0])
+
+
+city_slide_reader = ValuesSerializer(CitySlideSerializer, url_fields={'image_url': 'image'})
+city_stats_reader = ValuesSerializer(CityStatsSerializer)
+product_feature_reader = ValuesSerializer(ProductFeatureSerializer, url_fields={'image_url': 'image'})
+tech_specification_reader = ValuesSerializer(TechSpecificationSerializer)
+smart_feature_reader = ValuesSerializer(SmartFeatureSerializer, url_fields={'image_url': 'image'})
+tech_stage_reader = ValuesSerializer(TechStageSerializer, url_fields={'image_url': 'image'})
+faq_category_reader = ValuesSerializer(FAQCategorySerializer)
+faq_reader = ValuesSerializer(FAQSerializer)
+review_reader = ValuesSerializer(ReviewSerializer, url_fields={'avatar_url': 'avatar'})
+why_choose_point_reader = ValuesSerializer(WhyChoosePointSerializer, url_fields={'image_url': 'image'})
+how_it_works_step_reader = ValuesSerializer(HowItWorksStepSerializer)
+pricing_plan_reader = ValuesSerializer(PricingPlanSerializer)
+product_info_reader = ValuesSerializer(ProductInfoSerializer)
+comparison_point_reader = ValuesSerializer(ComparisonPointSerializer)
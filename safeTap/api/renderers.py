@@ -0,0 +1,68 @@
+"""
+JSON renderer and parser backed by orjson.
+
+FastJSONRenderer gives the same output as DRF's JSONRenderer (compact,
+UTF-8, datetimes with a 'Z' suffix for UTC). Decimal, lazy translation
+strings and anything else orjson doesn't know go through DRF's own
+encoder. The one difference is non-finite floats: orjson writes NaN and
+Infinity as null, where JSONRenderer raises "Out of range float values
+are not JSON compliant". Without orjson installed, or when an indented
+response is requested, both classes behave exactly like the DRF classes
+they extend.
+
+They are the defaults in REST_FRAMEWORK; a view can pick them (or the
+plain DRF classes) with renderer_classes/parser_classes.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits; the stdlib encoder copes
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape the separators that are invalid in JavaScript
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            body = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def render_json(data):
+    """Render `data` to bytes the way API responses are rendered"""
+    return FastJSONRenderer().render(data)
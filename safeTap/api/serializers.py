@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from .models import (
     City, CitySlide, CityStats, Product, TechSpec, Division, District, Thana,
     ProductFeature, UserProfile, Post, WorkAssignment, WorkCategory, AssignmentHistory, ServiceRequest,
@@ -64,6 +65,11 @@ class ProductSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class CityDetailSerializer(serializers.ModelSerializer):
+    """
+    A city with its active slides grouped by product type and its stats.
+    Querysets passed through with_related() are serialized in a constant
+    number of queries however many cities they hold.
+    """
     slides = serializers.SerializerMethodField()
     stats = serializers.SerializerMethodField()
     
@@ -71,19 +77,26 @@ class CityDetailSerializer(serializers.ModelSerializer):
         model = City
         fields = ['id', 'name', 'slug', 'slides', 'stats']
     
+    @staticmethod
+    def with_related(queryset):
+        """Load stats by join and active slides with one prefetch query"""
+        return queryset.select_related('stats').prefetch_related(
+            Prefetch('slides', queryset=CitySlide.objects.filter(is_active=True), to_attr='active_slides')
+        )
+    
     def get_slides(self, obj):
-        slides = CitySlide.objects.filter(city=obj, is_active=True)
+        slides = getattr(obj, 'active_slides', None)
+        if slides is None:
+            slides = CitySlide.objects.filter(city=obj, is_active=True)
+        # One list serializer for all slides, then group in a single pass
         result = {}
-        for slide in slides:
-            if slide.product_type not in result:
-                result[slide.product_type] = []
-            result[slide.product_type].append(CitySlideSerializer(slide, context=self.context).data)
+        for slide in CitySlideSerializer(slides, many=True, context=self.context).data:
+            result.setdefault(slide['product_type'], []).append(slide)
         return result
     
     def get_stats(self, obj):
         try:
-            stats = CityStats.objects.get(city=obj)
-            return CityStatsSerializer(stats).data
+            return CityStatsSerializer(obj.stats).data
         except CityStats.DoesNotExist:
             return None
 
@@ -225,9 +238,14 @@ class UserRegistrationSerializer(serializers.Serializer):
     is_phone_verified = serializers.BooleanField(default=False)
 
 class SupportLinkSerializer(serializers.ModelSerializer):
+    qr_code_url = serializers.SerializerMethodField()
+
     class Meta:
         model = UserProfile
-        fields = ['support_link', 'qr_code']
+        fields = ['support_link', 'qr_code_url']
+
+    def get_qr_code_url(self, obj):
+        return obj.qr_code_url(self.context.get('request'))
 
 # The `UserListSerializer` class serializes user data along with their profile information in Django
 # REST framework.
@@ -238,10 +256,24 @@ class UserListSerializer(serializers.ModelSerializer):
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'date_joined', 'is_staff', 'profile']
     
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset, e.g. ['id', 'email', 'profile.role']
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        self.profile_fields = None
+        if fields:
+            requested = {field.split('.', 1)[0] for field in fields}
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+            if 'profile' not in fields:
+                self.profile_fields = {
+                    field.split('.', 1)[1] for field in fields if field.startswith('profile.')
+                }
+    
     def get_profile(self, obj):
         try:
             profile = obj.profile
-            return {
+            data = {
                 'phone': profile.phone,
                 'role': profile.role,
                 'is_phone_verified': profile.is_phone_verified,
@@ -254,8 +286,12 @@ class UserListSerializer(serializers.ModelSerializer):
                 'service_rating': float(profile.service_rating) if profile.service_rating else 0.0,
                 'completed_jobs': profile.completed_jobs,
                 'support_link': profile.support_link,
-                'qr_code': profile.qr_code,
+                # Only the URL: the image itself is served by /api/users/<id>/qr.png
+                'qr_code_url': profile.qr_code_url(self.context.get('request')),
             }
+            if self.profile_fields is not None:
+                data = {key: value for key, value in data.items() if key in self.profile_fields}
+            return data
         except UserProfile.DoesNotExist:
             return None
 
@@ -306,14 +342,18 @@ class WorkCategorySerializer(serializers.ModelSerializer):
 class TechnicianListSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
+    qr_code_url = serializers.SerializerMethodField()
     
     class Meta:
         model = UserProfile
         fields = [
             'id', 'user_name', 'user_email', 'phone', 'service_area_division',
             'service_area_district', 'service_area_thana', 'is_available',
-            'service_rating', 'completed_jobs', 'support_link', 'qr_code'
+            'service_rating', 'completed_jobs', 'support_link', 'qr_code_url'
         ]
+    
+    def get_qr_code_url(self, obj):
+        return obj.qr_code_url(self.context.get('request'))
 
 class AssignmentHistorySerializer(serializers.ModelSerializer):
     changed_by_name = serializers.CharField(source='changed_by.username', read_only=True)
@@ -323,7 +363,7 @@ class AssignmentHistorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 class WorkAssignmentSerializer(serializers.ModelSerializer):
-    customer_name = serializers.CharField(source='customer.username', read_only=True)
+    customer_name = serializers.CharField(source='customer.user.username', read_only=True)
     technician_name = serializers.CharField(source='assigned_to.user.username', read_only=True)
     category_name = serializers.CharField(source='category.name', read_only=True)
     assigned_by_name = serializers.CharField(source='assigned_by.username', read_only=True)
@@ -333,6 +373,21 @@ class WorkAssignmentSerializer(serializers.ModelSerializer):
         model = WorkAssignment
         fields = '__all__'
 
+class WorkAssignmentListSerializer(WorkAssignmentSerializer):
+    """Assignment rows for list views: related names but no history"""
+
+    class Meta(WorkAssignmentSerializer.Meta):
+        fields = ['id', 'customer_name', 'technician_name', 'category_name', 'assigned_by_name'] + [
+            field.name for field in WorkAssignment._meta.fields if not field.primary_key
+        ]
+
+class RecentHistoryWorkAssignmentSerializer(WorkAssignmentListSerializer):
+    """List rows plus the history entries prefetched into `recent_history`"""
+    history = AssignmentHistorySerializer(source='recent_history', many=True, read_only=True)
+
+    class Meta(WorkAssignmentListSerializer.Meta):
+        fields = WorkAssignmentListSerializer.Meta.fields + ['history']
+
 class WorkAssignmentCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkAssignment
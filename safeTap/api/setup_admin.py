@@ -26,7 +26,7 @@ def setup_admin_and_cleanup():
     )
     
     profile.role = 'admin'
-    profile.save()
+    profile.save_changes()
     
     admin_user.is_staff = True
     admin_user.is_superuser = True
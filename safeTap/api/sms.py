@@ -0,0 +1,199 @@
+"""
+SMS dispatch.
+
+send_sms() checks the per-number rate limit, then hands the message to the
+background pool (api/tasks.py) and returns at once, so a request never
+waits on the SMS provider. A failed send is queued again after a backoff
+delay (run_later), rather than sleeping on a pool worker.
+
+Providers are chosen with SMS_PROVIDER:
+  'auto'    Twilio when credentials are configured, console otherwise
+  'twilio'  Twilio REST API
+  'http'    JSON POST to SMS_HTTP_URL (e.g. a gateway or a local stub)
+  'console' print messages
+  'locmem'  keep messages in api.sms.outbox (for tests)
+or a dotted path to an SMSProvider subclass. The provider is created once
+per process, so its HTTP client and connection pool are reused.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .cache import get_cache
+from .tasks import run_in_background, run_later
+
+# Messages "sent" by the locmem provider, like django.core.mail.outbox
+outbox = []
+
+
+class SMSError(Exception):
+    """A provider failed to send a message"""
+
+
+class SMSRateLimited(Exception):
+    """Too many messages were requested for one number"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limited, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class SMSProvider:
+    """Sends one message; raise SMSError on failure and return a message id on success"""
+
+    def send(self, to, body):
+        raise NotImplementedError
+
+
+class ConsoleSMSProvider(SMSProvider):
+    def send(self, to, body):
+        print(f"SMS to {to}: {body}")
+        return 'console'
+
+
+class LocmemSMSProvider(SMSProvider):
+    def send(self, to, body):
+        outbox.append({'to': to, 'body': body})
+        return f'locmem-{len(outbox)}'
+
+
+class TwilioSMSProvider(SMSProvider):
+    def __init__(self):
+        from twilio.rest import Client
+
+        self.from_number = settings.TWILIO_PHONE_NUMBER
+        # One client per process: its HTTP session keeps connections alive
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+
+    def send(self, to, body):
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_number, to=to)
+        except Exception as e:
+            raise SMSError(str(e))
+        return message.sid
+
+
+class HTTPSMSProvider(SMSProvider):
+    """POSTs {"to", "from", "body"} as JSON to SMS_HTTP_URL"""
+
+    def __init__(self):
+        import requests
+
+        self.url = settings.SMS_HTTP_URL
+        self.sender = getattr(settings, 'SMS_HTTP_SENDER', '')
+        self.timeout = getattr(settings, 'SMS_HTTP_TIMEOUT', 10)
+        self.session = requests.Session()
+        token = getattr(settings, 'SMS_HTTP_TOKEN', '')
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def send(self, to, body):
+        try:
+            response = self.session.post(
+                self.url, json={'to': to, 'from': self.sender, 'body': body}, timeout=self.timeout
+            )
+            response.raise_for_status()
+        except Exception as e:
+            raise SMSError(str(e))
+        try:
+            return response.json().get('id', '')
+        except ValueError:
+            return ''
+
+
+PROVIDERS = {
+    'console': ConsoleSMSProvider,
+    'locmem': LocmemSMSProvider,
+    'twilio': TwilioSMSProvider,
+    'http': HTTPSMSProvider,
+}
+
+_provider = None
+_provider_name = None
+_provider_lock = threading.Lock()
+
+
+def _twilio_configured():
+    try:
+        import twilio  # noqa: F401
+    except ImportError:
+        return False
+    return all(
+        getattr(settings, name, None)
+        for name in ('TWILIO_ACCOUNT_SID', 'TWILIO_AUTH_TOKEN', 'TWILIO_PHONE_NUMBER')
+    )
+
+
+def get_provider():
+    """Return the configured provider, creating it on first use"""
+    global _provider, _provider_name
+    name = getattr(settings, 'SMS_PROVIDER', 'auto')
+    if _provider is None or _provider_name != name:
+        with _provider_lock:
+            if _provider is None or _provider_name != name:
+                if name == 'auto':
+                    provider_class = TwilioSMSProvider if _twilio_configured() else ConsoleSMSProvider
+                else:
+                    provider_class = PROVIDERS.get(name) or import_string(name)
+                _provider = provider_class()
+                _provider_name = name
+    return _provider
+
+
+def consume_rate_limit(to):
+    """
+    Count a message against a number's budget of SMS_RATE_LIMIT messages
+    per SMS_RATE_LIMIT_WINDOW seconds; raise SMSRateLimited when exhausted.
+    """
+    limit = getattr(settings, 'SMS_RATE_LIMIT', 5)
+    if not limit:
+        return
+    window = getattr(settings, 'SMS_RATE_LIMIT_WINDOW', 3600)
+    now = time.time()
+    bucket = int(now // window)
+    key = 'sms_rate:%s:%d' % (hashlib.sha256(to.encode('utf-8')).hexdigest()[:32], bucket)
+
+    cache = get_cache()
+    cache.add(key, 0, timeout=window)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); start the window again
+        cache.set(key, 1, timeout=window)
+        count = 1
+    if count > limit:
+        raise SMSRateLimited(int((bucket + 1) * window - now) + 1)
+
+
+def deliver(to, body, attempt=1):
+    """
+    Try to send a message; return True if it was sent.
+
+    On failure the next attempt is scheduled after SMS_RETRY_DELAY seconds,
+    doubling each time, until SMS_MAX_ATTEMPTS attempts have been made.
+    """
+    attempts = getattr(settings, 'SMS_MAX_ATTEMPTS', 3)
+    try:
+        message_id = get_provider().send(to, body)
+    except SMSError as e:
+        print(f"SMS to {to} failed (attempt {attempt}/{attempts}): {str(e)}")
+        if attempt < attempts:
+            delay = getattr(settings, 'SMS_RETRY_DELAY', 1.0) * 2 ** (attempt - 1)
+            run_later(delay, deliver, to, body, attempt + 1)
+        return False
+    print(f"SMS sent to {to}: {message_id}")
+    return True
+
+
+def send_sms(to, body, rate_limit=True):
+    """
+    Queue a message for delivery after the current transaction commits.
+
+    Raises SMSRateLimited when `to` has used up its budget.
+    """
+    if rate_limit:
+        consume_rate_limit(to)
+    run_in_background(deliver, to, body)
@@ -0,0 +1,61 @@
+"""
+In-process background worker pool for work that shouldn't block a request.
+
+Jobs are submitted once the surrounding transaction commits, so a worker
+never looks for rows that aren't visible yet. Set BACKGROUND_TASKS_EAGER to
+run jobs inline (useful in tests and management commands).
+
+run_later() schedules a job after a delay (e.g. a retry with backoff): a
+timer thread waits out the delay, so no pool worker is held sleeping.
+"""
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the shared worker pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_TASK_WORKERS', 4),
+                    thread_name_prefix='api-background',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        print(f"Background task {func.__name__} failed: {str(e)}")
+        traceback.print_exc()
+    finally:
+        # Worker threads own their DB connections; don't leave them open
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the worker pool after the current transaction commits"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return
+    transaction.on_commit(lambda: get_executor().submit(_run, func, args, kwargs))
+
+
+def run_later(delay, func, *args, **kwargs):
+    """Run func(*args, **kwargs) on the worker pool after `delay` seconds"""
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return
+    timer = threading.Timer(delay, lambda: get_executor().submit(_run, func, args, kwargs))
+    timer.daemon = True
+    timer.start()
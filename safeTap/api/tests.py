@@ -1,3 +1,1100 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import re
+import tempfile
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import AnonymousUser, User
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail.backends.locmem import EmailBackend as LocmemEmailBackend
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from . import firebase_auth, otp, perf, readers, renderers, sms
+from .authentication import AuthenticationError, resolve_request_user
+from .cache import check_shared_cache, get_cache
+from .geo_index import get_geo_index
+from .management.commands.explain_queries import sequential_scans
+from .importers import import_city_catalog, import_geography
+from .models import (
+    FAQ, AssignmentHistory, City, CitySlide, CityStats, Customer, District, Division, FAQCategory, OutboundEmail,
+    PricingPlan, Product, Review, ServiceRequest, ServiceRequestImage, ServiceRequestVideo, Thana, UserProfile,
+    WorkAssignment,
+)
+from .serializers import CityDetailSerializer
+from .token_cache import TokenCache
+from .outbox import deliver_pending, purge_sent, queue_email
+from .qr import save_qr_png
+
+
+class AuthenticationQueryCountTests(TestCase):
+    """Each authenticated request should resolve its user (and profile) in one query"""
+
+    def setUp(self):
+        firebase_auth.token_cache.clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'secret')
+        self.user.profile.firebase_uid = 'firebase-alice'
+        self.user.profile.save()
+        self.token = Token.objects.create(user=self.user)
+
+    def firebase_claims(self, token):
+        return {'uid': 'firebase-alice', 'email': 'alice@example.com', 'exp': time.time() + 3600}
+
+    def test_drf_token_header(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.user.id)
+
+    @mock.patch('api.firebase_config.is_firebase_available', return_value=True)
+    def test_drf_token_sent_as_bearer(self, _):
+        with mock.patch.object(firebase_auth, '_verify_firebase_token', return_value=None):
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], self.user.id)
+
+    @mock.patch('api.firebase_config.is_firebase_available', return_value=True)
+    def test_firebase_token(self, _):
+        with mock.patch.object(firebase_auth, '_verify_firebase_token', side_effect=self.firebase_claims) as verify:
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION='Bearer firebase-token')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['id'], self.user.id)
+
+            # A repeated token skips verification and resolves by primary key
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION='Bearer firebase-token')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(verify.call_count, 1)
+
+    def test_missing_credentials(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 401)
+
+    @mock.patch('api.firebase_config.is_firebase_available', return_value=True)
+    def test_invalid_bearer_token(self, _):
+        with mock.patch.object(firebase_auth, '_verify_firebase_token', return_value=None):
+            response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION='Bearer not-a-token')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'Invalid authentication token')
+
+    @mock.patch('api.firebase_config.is_firebase_available', return_value=True)
+    def test_verified_token_without_a_user_is_rejected(self, _):
+        claims = {'uid': 'firebase-nobody', 'email': 'nobody@example.com', 'exp': time.time() + 3600}
+        with mock.patch.object(firebase_auth, '_verify_firebase_token', return_value=claims), \
+                mock.patch.object(firebase_auth, 'get_or_create_user', return_value=None):
+            response = self.client.get('/api/auth/me/', HTTP_AUTHORIZATION='Bearer firebase-token')
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()['detail'], 'Failed to authenticate user')
+
+            request = SimpleNamespace(META={'HTTP_AUTHORIZATION': 'Bearer firebase-token'}, user=AnonymousUser())
+            with self.assertRaises(AuthenticationError) as raised:
+                resolve_request_user(request)
+            self.assertEqual(raised.exception.error, 'Failed to create or retrieve user from Firebase token')
+
+    @mock.patch('api.firebase_config.is_firebase_available', return_value=True)
+    def test_resolution_is_memoized_on_request(self, _):
+        request = SimpleNamespace(META={'HTTP_AUTHORIZATION': 'Bearer firebase-token'}, user=AnonymousUser())
+        with mock.patch.object(firebase_auth, '_verify_firebase_token', side_effect=self.firebase_claims):
+            with self.assertNumQueries(1):
+                self.assertEqual(resolve_request_user(request), self.user)
+            with self.assertNumQueries(0):
+                self.assertEqual(resolve_request_user(request).profile.firebase_uid, 'firebase-alice')
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.now = 1_000_000.0
+        patcher = mock.patch('api.token_cache.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_at_ttl_or_token_exp(self):
+        cache = TokenCache(ttl=300)
+        cache.set('long-lived', 'a', exp=self.now + 3600)
+        cache.set('short-lived', 'b', exp=self.now + 60)
+        cache.set('expired', 'c', exp=self.now - 1)
+        self.assertEqual((cache.get('long-lived'), cache.get('short-lived'), cache.get('expired')), ('a', 'b', None))
+
+        self.now += 61
+        self.assertEqual((cache.get('long-lived'), cache.get('short-lived')), ('a', None))
+        self.now += 240
+        self.assertIsNone(cache.get('long-lived'))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TokenCache(maxsize=2)
+        cache.set('one', 1)
+        cache.set('two', 2)
+        cache.get('one')
+        cache.set('three', 3)
+        self.assertEqual((cache.get('one'), cache.get('two'), cache.get('three')), (1, None, 3))
+
+    def test_shared_alias_lets_other_processes_reuse_a_verification(self):
+        TokenCache(shared_alias='default').set('token', 'claims', exp=self.now + 60)
+        other = TokenCache(shared_alias='default')
+        self.assertEqual(other.get('token'), 'claims')
+        self.now += 61
+        self.assertIsNone(TokenCache(shared_alias='default').get('token'))
+
+
+class PerfStatsTests(TestCase):
+    def setUp(self):
+        perf.registry.clear()
+        self.user = User.objects.create_user('kim', 'kim@example.com', 'secret')
+
+    def auth(self, user):
+        return {'HTTP_AUTHORIZATION': f'Token {Token.objects.get_or_create(user=user)[0].key}'}
+
+    def test_only_admins_can_read_or_clear_stats(self):
+        self.assertEqual(self.client.get('/api/_perf/').status_code, 401)
+        self.assertEqual(self.client.get('/api/_perf/', **self.auth(self.user)).status_code, 403)
+        self.assertEqual(self.client.delete('/api/_perf/', **self.auth(self.user)).status_code, 403)
+
+        self.user.profile.role = 'admin'
+        self.user.profile.save_changes()
+        response = self.client.get('/api/_perf/', **self.auth(self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Server-Timing', response)
+
+        staff = User.objects.create_user('root', 'root@example.com', 'secret', is_staff=True)
+        endpoints = self.client.get('/api/_perf/', **self.auth(staff)).json()['endpoints']
+        # Rejected requests are recorded too; the current one is recorded after the response is built
+        self.assertEqual(endpoints['perf_stats']['count'], 4)
+        self.assertEqual(self.client.delete('/api/_perf/', **self.auth(staff)).status_code, 204)
+
+
+class CountingEmailBackend(LocmemEmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingEmailBackend.opened += 1
+        return super().open()
+
+
+class FailingEmailBackend(LocmemEmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('mail server unavailable')
+
+
+class LeaseCheckingEmailBackend(LocmemEmailBackend):
+    """Records the savepoint depth and row statuses seen while sending"""
+    seen = []
+
+    def send_messages(self, messages):
+        LeaseCheckingEmailBackend.seen.append((
+            len(connection.savepoint_ids),
+            list(OutboundEmail.objects.values_list('status', flat=True)),
+        ))
+        return super().send_messages(messages)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class OutboxTests(TestCase):
+    def test_queued_email_is_sent_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            email = queue_email('Hello', 'Body', 'alice@example.com')
+            self.assertEqual(len(mail.outbox), 0)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['alice@example.com'])
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+
+    @override_settings(EMAIL_BACKEND='api.tests.CountingEmailBackend')
+    def test_batch_shares_one_connection(self):
+        for number in range(5):
+            queue_email('Hello', 'Body', f'user{number}@example.com', deliver_now=False)
+        CountingEmailBackend.opened = 0
+
+        self.assertEqual(deliver_pending(), (5, 0))
+        self.assertEqual(CountingEmailBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @override_settings(EMAIL_BACKEND='api.tests.FailingEmailBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_dead_letter(self):
+        email = queue_email('Hello', 'Body', 'alice@example.com', deliver_now=False)
+
+        self.assertEqual(deliver_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        self.assertEqual(deliver_pending(), (0, 0))  # not due yet
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ('dead', 2))
+        self.assertIn('mail server unavailable', email.last_error)
+
+    @override_settings(EMAIL_BACKEND='api.tests.LeaseCheckingEmailBackend')
+    def test_batch_is_leased_before_sending(self):
+        queue_email('Hello', 'Body', 'alice@example.com', deliver_now=False)
+        LeaseCheckingEmailBackend.seen = []
+
+        # The claim's transaction has been committed (its savepoint released)
+        # by the time the message goes out
+        depth = len(connection.savepoint_ids)
+        self.assertEqual(deliver_pending(), (1, 0))
+        self.assertEqual(LeaseCheckingEmailBackend.seen, [(depth, ['sending'])])
+
+    def test_expired_leases_are_claimed_again(self):
+        email = queue_email('Hello', 'Body', 'alice@example.com', deliver_now=False)
+        OutboundEmail.objects.filter(pk=email.pk).update(
+            status='sending', next_attempt_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(deliver_pending(), (0, 0))  # another worker holds it
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, 'sent')
+
+    @override_settings(EMAIL_OUTBOX_RETENTION_DAYS=7)
+    def test_old_sent_email_is_purged(self):
+        old, recent, dead = [
+            queue_email('Hello', 'Body', f'user{number}@example.com', deliver_now=False) for number in range(3)
+        ]
+        OutboundEmail.objects.filter(pk=old.pk).update(status='sent', sent_at=timezone.now() - timedelta(days=8))
+        OutboundEmail.objects.filter(pk=recent.pk).update(status='sent', sent_at=timezone.now() - timedelta(days=6))
+        OutboundEmail.objects.filter(pk=dead.pk).update(status='dead')
+
+        self.assertEqual(purge_sent(), 1)
+        self.assertEqual(set(OutboundEmail.objects.values_list('pk', flat=True)), {recent.pk, dead.pk})
+
+
+class FlakySMSProvider(sms.SMSProvider):
+    failures = 0
+
+    def send(self, to, body):
+        if FlakySMSProvider.failures:
+            FlakySMSProvider.failures -= 1
+            raise sms.SMSError('gateway timeout')
+        sms.outbox.append({'to': to, 'body': body})
+        return 'flaky'
+
+
+class SMSStubHandler(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        SMSStubHandler.received.append(json.loads(body))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"id": "stub-1"}')
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True, SMS_PROVIDER='locmem', SMS_RETRY_DELAY=0)
+class SMSTests(TestCase):
+    def setUp(self):
+        sms.outbox.clear()
+        get_cache().clear()
+
+    def test_send_is_queued_until_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sms.send_sms('+8801700000000', 'Your code is 123456')
+            self.assertEqual(sms.outbox, [])
+        self.assertEqual(sms.outbox, [{'to': '+8801700000000', 'body': 'Your code is 123456'}])
+
+    @override_settings(SMS_RATE_LIMIT=2)
+    def test_rate_limit_per_number(self):
+        sms.consume_rate_limit('+8801700000000')
+        sms.consume_rate_limit('+8801700000000')
+        with self.assertRaises(sms.SMSRateLimited) as raised:
+            sms.consume_rate_limit('+8801700000000')
+        self.assertGreater(raised.exception.retry_after, 0)
+        sms.consume_rate_limit('+8801800000000')
+
+    @override_settings(SMS_PROVIDER='api.tests.FlakySMSProvider', SMS_MAX_ATTEMPTS=3)
+    def test_failed_sends_are_retried(self):
+        # Retries run inline when BACKGROUND_TASKS_EAGER is set
+        FlakySMSProvider.failures = 2
+        self.assertFalse(sms.deliver('+8801700000000', 'hello'))
+        self.assertEqual(len(sms.outbox), 1)
+
+        FlakySMSProvider.failures = 4
+        sms.deliver('+8801700000000', 'hello')
+        self.assertEqual(len(sms.outbox), 1)
+        self.assertEqual(FlakySMSProvider.failures, 1)  # gave up after SMS_MAX_ATTEMPTS
+
+    @override_settings(
+        BACKGROUND_TASKS_EAGER=False, SMS_PROVIDER='api.tests.FlakySMSProvider', SMS_RETRY_DELAY=0.05,
+    )
+    def test_retry_is_scheduled_without_blocking(self):
+        FlakySMSProvider.failures = 1
+        self.assertFalse(sms.deliver('+8801700000000', 'hello'))
+        self.assertEqual(sms.outbox, [])
+
+        deadline = time.monotonic() + 5
+        while not sms.outbox and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sms.outbox, [{'to': '+8801700000000', 'body': 'hello'}])
+
+    def test_http_provider_against_local_stub(self):
+        server = HTTPServer(('127.0.0.1', 0), SMSStubHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        url = 'http://127.0.0.1:%d/messages' % server.server_port
+
+        SMSStubHandler.received = []
+        with override_settings(SMS_PROVIDER='http', SMS_HTTP_URL=url, SMS_HTTP_SENDER='SafeTap'):
+            self.assertTrue(sms.deliver('+8801700000000', 'hello'))
+        self.assertEqual(SMSStubHandler.received, [{'to': '+8801700000000', 'from': 'SafeTap', 'body': 'hello'}])
+
+
+class OTPTests(TestCase):
+    phone = '+8801700000000'
+
+    def setUp(self):
+        get_cache().clear()
+
+    def test_code_is_consumed_on_success(self):
+        otp.issue(self.phone, '123456')
+        self.assertEqual(otp.verify(self.phone, '123456'), otp.VALID)
+        self.assertEqual(otp.verify(self.phone, '123456'), otp.EXPIRED)
+
+    @override_settings(OTP_MAX_ATTEMPTS=2)
+    def test_wrong_guesses_lock_the_code(self):
+        otp.issue(self.phone, '123456')
+        self.assertEqual(otp.verify(self.phone, '000000'), otp.INVALID)
+        self.assertEqual(otp.verify(self.phone, '111111'), otp.INVALID)
+        self.assertEqual(otp.verify(self.phone, '123456'), otp.LOCKED)
+
+        # A new code resets the counter
+        otp.issue(self.phone, '654321')
+        self.assertEqual(otp.verify(self.phone, '654321'), otp.VALID)
+
+    @override_settings(OTP_MAX_ATTEMPTS=5)
+    def test_concurrent_guesses_share_the_limit(self):
+        otp.issue(self.phone, '123456')
+        results = []
+        barrier = threading.Barrier(30)
+        compare_digest = otp.hmac.compare_digest
+
+        def slow_compare(a, b):
+            time.sleep(0.01)  # widen the window between reading and counting
+            return compare_digest(a, b)
+
+        def guess(number):
+            barrier.wait()
+            results.append(otp.verify(self.phone, f'{number:06d}'))
+
+        with mock.patch('api.otp.hmac.compare_digest', slow_compare):
+            threads = [threading.Thread(target=guess, args=(number,)) for number in range(30)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(results.count(otp.INVALID), 5)
+        self.assertEqual(results.count(otp.LOCKED), 25)
+        self.assertEqual(otp.verify(self.phone, '123456'), otp.LOCKED)
+
+    def test_expired_code(self):
+        otp.issue(self.phone, '123456')
+        with mock.patch('api.otp.time.time', return_value=time.time() + 601):
+            self.assertEqual(otp.verify(self.phone, '123456'), otp.EXPIRED)
+
+    @override_settings(SMS_PROVIDER='locmem')
+    def test_verify_endpoint_uses_cache_only_for_the_code(self):
+        user = User.objects.create_user('bob', 'bob@example.com', 'secret')
+        user.profile.phone = self.phone
+        user.profile.save()
+
+        response = self.client.post('/api/auth/phone/send-code/', {'phone': self.phone}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        code = response.json()['code']
+
+        response = self.client.post('/api/auth/phone/verify/', {'phone': self.phone, 'code': '0'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post('/api/auth/phone/verify/', {'phone': self.phone, 'code': code}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        user.profile.refresh_from_db()
+        self.assertTrue(user.profile.is_phone_verified)
+
+
+class ProfileUpdateTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('carol', 'carol@example.com', 'secret')
+
+    def test_support_link_is_part_of_the_insert(self):
+        self.assertEqual(self.user.profile.support_link, UserProfile.build_support_link(self.user.id))
+
+    def test_user_save_does_not_rewrite_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            user.save()
+        user.profile.address = 'Dhaka'
+        with self.assertNumQueries(2):
+            user.save()
+        self.assertEqual(UserProfile.objects.get(user=user).address, 'Dhaka')
+
+    def test_save_changes_writes_changed_columns_only(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.save_changes(), [])
+
+        profile.is_available = True
+        profile.address = 'Dhaka'
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(sorted(profile.save_changes()), ['address', 'is_available'])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"role"', queries[0]['sql'])
+
+        with self.assertNumQueries(0):
+            profile.save_changes()
+
+    def test_completed_jobs_counter_is_atomic(self):
+        first = UserProfile.objects.get(user=self.user)
+        second = UserProfile.objects.get(user=self.user)
+        first.record_completed_job()
+        second.record_completed_job()
+        self.assertEqual(second.completed_jobs, 2)
+        self.assertTrue(UserProfile.objects.get(user=self.user).is_available)
+
+
+class UserListTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'secret', is_staff=True)
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.admin).key}'}
+        for i in range(4):
+            user = User.objects.create_user(f'user{i}', f'user{i}@example.com', 'secret')
+            user.profile.role = 'servicer' if i % 2 else 'customer'
+            user.profile.is_available = i == 1
+            user.profile.save_changes()
+
+    def get(self, url='/api/auth/users/', **params):
+        return self.client.get(url, params, **self.auth)
+
+    def test_cursor_walks_every_user_once(self):
+        page = self.get(page_size=2).json()
+        self.assertEqual(set(page), {'next', 'results'})
+        seen = [user['id'] for user in page['results']]
+        while page['next']:
+            page = self.client.get(page['next'], **self.auth).json()
+            seen += [user['id'] for user in page['results']]
+        self.assertEqual(seen, list(User.objects.order_by('-date_joined', 'id').values_list('id', flat=True)))
+
+    def test_filters(self):
+        results = self.get(role='servicer').json()['results']
+        self.assertEqual(sorted(user['username'] for user in results), ['user1', 'user3'])
+        results = self.get(role='servicer', is_available='true').json()['results']
+        self.assertEqual([user['username'] for user in results], ['user1'])
+        self.assertEqual(self.get(is_available='maybe').status_code, 400)
+        self.assertEqual(self.get(cursor='not-a-cursor').status_code, 400)
+
+    def test_sparse_fields(self):
+        with self.assertNumQueries(2):  # token, page (profile joined in)
+            results = self.get(fields='id,profile.role', role='customer').json()['results']
+        self.assertEqual(results[0], {'id': results[0]['id'], 'profile': {'role': 'customer'}})
+        results = self.get(fields='id,email').json()['results']
+        self.assertEqual(set(results[0]), {'id', 'email'})
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class QRImageTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.user = User.objects.create_user('quinn', 'quinn@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.user).key}'}
+        self.profile = self.user.profile
+
+    def test_single_profile_responses_read_the_stored_image(self):
+        self.profile.qr_image.name = save_qr_png(b'stored-png')
+        self.profile.save_changes()
+        with mock.patch('api.qr.render_qr_png', side_effect=AssertionError('rendered on the request path')):
+            response = self.client.get('/api/auth/me/', **self.auth)
+        self.assertEqual(response.json()['profile']['qr_code'], base64.b64encode(b'stored-png').decode())
+
+    def test_missing_image_file_is_a_404_and_schedules_once(self):
+        self.profile.qr_image.name = 'qr_codes/gone.png'
+        self.profile.save_changes()
+        with mock.patch('api.qr.schedule_profile_qr_code') as schedule:
+            for _ in range(3):
+                response = self.client.get(f'/api/users/{self.user.id}/qr.png')
+                self.assertEqual(response.status_code, 404)
+        schedule.assert_called_once_with(self.profile.pk)
+
+
+class AssignmentLifecycleTests(TestCase):
+    def setUp(self):
+        self.dispatcher = User.objects.create_user('dispatch', 'dispatch@example.com', 'secret')
+        self.client.defaults['HTTP_AUTHORIZATION'] = f'Token {Token.objects.create(user=self.dispatcher).key}'
+        self.customer = Customer.objects.create(user=User.objects.create_user('dan', 'dan@example.com', 'secret'))
+        self.technician = User.objects.create_user('tech', 'tech@example.com', 'secret').profile
+        self.technician.is_available = True
+        self.technician.save_changes()
+
+    def create(self, **extra):
+        data = {
+            'customer': self.customer.pk, 'title': 'Install lock', 'description': 'Front door',
+            'client_name': 'Dan', 'assigned_to': self.technician.pk, 'status': 'assigned',
+        }
+        data.update(extra)
+        return self.client.post('/api/auth/assignments/', data, content_type='application/json')
+
+    def update(self, pk, **data):
+        return self.client.put(f'/api/auth/assignments/{pk}/', data, content_type='application/json')
+
+    def test_technician_cannot_be_double_booked(self):
+        self.assertEqual(self.create().status_code, 201)
+        self.technician.refresh_from_db()
+        self.assertFalse(self.technician.is_available)
+        self.assertEqual(self.create().status_code, 409)
+        self.assertEqual(WorkAssignment.objects.count(), 1)
+
+    def test_completion_frees_technician_and_counts_job(self):
+        pk = self.create().json()['id']
+        self.assertEqual(self.update(pk, status='in_progress').status_code, 200)
+        response = self.update(pk, status='completed', status_notes='Done')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['completed_at'])
+
+        self.technician.refresh_from_db()
+        self.assertTrue(self.technician.is_available)
+        self.assertEqual(self.technician.completed_jobs, 1)
+        self.assertEqual(
+            list(AssignmentHistory.objects.filter(assignment_id=pk).order_by('id').values_list('new_status', flat=True)),
+            ['assigned', 'in_progress', 'completed']
+        )
+
+    def test_invalid_transition_is_rejected(self):
+        pk = self.create().json()['id']
+        self.update(pk, status='completed')
+        response = self.update(pk, status='in_progress')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(WorkAssignment.objects.get(pk=pk).status, 'completed')
+        self.assertEqual(AssignmentHistory.objects.filter(assignment_id=pk).count(), 2)
+
+
+class WorkAssignmentListTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('max', 'max@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        customer = Customer.objects.create(user=user)
+        self.technician = User.objects.create_user('tech', 'tech@example.com', 'secret').profile
+        for i in range(5):
+            assignment = WorkAssignment.objects.create(
+                customer=customer, title=f'Job {i}', description='Tap', client_name='Max',
+                status='pending' if i % 2 else 'assigned', division='Dhaka' if i < 3 else 'Sylhet',
+                assigned_to=self.technician if i == 4 else None,
+            )
+            for note in range(7):
+                AssignmentHistory.objects.create(assignment=assignment, changed_by=user, new_status='pending', notes=str(note))
+
+    def get(self, **params):
+        return self.client.get('/api/auth/assignments/', params, **self.auth)
+
+    def test_cursor_pages_in_constant_queries(self):
+        with self.assertNumQueries(2):  # token, page with related names joined in
+            page = self.get(page_size=2).json()
+        self.assertNotIn('history', page['results'][0])
+        self.assertEqual(page['results'][0]['customer_name'], 'max')
+        seen = [row['id'] for row in page['results']]
+        while page['next']:
+            page = self.client.get(page['next'], **self.auth).json()
+            seen += [row['id'] for row in page['results']]
+        self.assertEqual(seen, list(WorkAssignment.objects.order_by('-created_at', 'id').values_list('id', flat=True)))
+
+    def test_filters(self):
+        titles = lambda response: sorted(row['title'] for row in response.json()['results'])
+        self.assertEqual(titles(self.get(status='pending')), ['Job 1', 'Job 3'])
+        self.assertEqual(titles(self.get(division='Sylhet', status='assigned')), ['Job 4'])
+        self.assertEqual(titles(self.get(technician=self.technician.pk)), ['Job 4'])
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(titles(self.get(created_before=tomorrow)), [f'Job {i}' for i in range(5)])
+        self.assertEqual(self.get(technician='abc').status_code, 400)
+        self.assertEqual(self.get(created_after='soon').status_code, 400)
+
+    def test_include_history_is_limited_per_assignment(self):
+        with self.assertNumQueries(3):  # token, page, history
+            results = self.get(include_history='true').json()['results']
+        self.assertEqual({len(row['history']) for row in results}, {5})
+
+
+class ExplainQueriesTests(TestCase):
+    def test_model_indexes_cover_the_hot_queries(self):
+        # PostgreSQL prefers seq scans on tiny tables; --force-index shows whether an index could be used
+        args = ['--force-index'] if connection.vendor == 'postgresql' else []
+        out = io.StringIO()
+        call_command('explain_queries', *args, stdout=out)
+        scanned = {
+            table for tables in re.findall(r'SEQ SCAN  .*: (.*)', out.getvalue()) for table in tables.split(', ')
+        }
+        # auth_user's index is created by RunSQL in migration 0022, so only the
+        # indexes declared on the api models are checked here
+        self.assertEqual({table for table in scanned if table.startswith('api_')}, set())
+
+    def test_sequential_scans_are_read_from_plans(self):
+        plan = 'Limit\n  ->  Seq Scan on api_workassignment\n  ->  Index Scan using x on api_userprofile'
+        self.assertEqual(sequential_scans(plan, 'postgresql'), ['api_workassignment'])
+        plan = 'SCAN api_review\nSEARCH api_faq USING INDEX faq_active_idx\nSCAN api_city USING INDEX sqlite_autoindex'
+        self.assertEqual(sequential_scans(plan, 'sqlite'), ['api_review'])
+
+
+class AssignmentStatisticsTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        user = User.objects.create_user('lee', 'lee@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        self.customer = Customer.objects.create(user=user)
+        for status_value, priority in (('pending', 'high'), ('pending', 'low'), ('completed', 'high')):
+            WorkAssignment.objects.create(
+                customer=self.customer, title='Fix', description='Tap', client_name='Lee',
+                status=status_value, priority=priority,
+            )
+
+    def stats(self):
+        return self.client.get('/api/auth/assignment-stats/', **self.auth).json()
+
+    def test_stats_cost_a_fixed_number_of_queries_and_are_cached(self):
+        with self.assertNumQueries(5):  # token, assignment counts, technician counts, recent, history
+            stats = self.stats()
+        self.assertEqual(
+            (stats['total_assignments'], stats['pending_assignments'], stats['completed_assignments']), (3, 2, 1)
+        )
+        self.assertEqual(stats['by_priority'], {'high': 2, 'low': 1})
+        self.assertEqual(len(stats['recent_assignments']), 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.stats(), stats)
+
+    def test_assignment_changes_invalidate_the_cached_stats(self):
+        self.stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkAssignment.objects.create(
+                customer=self.customer, title='Fix', description='Tap', client_name='Lee', status='cancelled',
+            )
+        stats = self.stats()
+        self.assertEqual((stats['total_assignments'], stats['cancelled_assignments']), (4, 1))
+
+
+class CityPageCacheTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        user = User.objects.create_user('hana', 'hana@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        for name in ('Dhaka', 'Sylhet'):
+            CityStats.objects.create(city=City.objects.create(name=name, slug=name.lower()),
+                                     users='1k', rating='4.8', installations='500')
+        self.faq = FAQ.objects.create(category=FAQCategory.objects.create(name='Billing'), question='Q', answer='A')
+
+    def page(self, **params):
+        return self.client.get('/api/city-page-data/', params, **self.auth)
+
+    def test_pages_are_served_from_cache_until_a_source_row_changes(self):
+        first = self.page(city_slug='sylhet')
+        self.assertEqual(first.json()['city']['slug'], 'sylhet')
+        with self.assertNumQueries(1):  # token authentication only
+            self.assertEqual(self.page(city_slug='sylhet').content, first.content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faq.question = 'Updated?'
+            self.faq.save()
+        self.assertEqual(self.page(city_slug='sylhet').json()['faqs'][0]['question'], 'Updated?')
+
+    def test_unknown_slugs_and_product_types_share_one_entry(self):
+        dhaka = self.page(city_slug='dhaka', product_type='nope').content
+        with self.assertNumQueries(3):  # token authentication per request
+            for i in range(3):
+                self.assertEqual(self.page(city_slug=f'unknown-{i}', product_type=f'nope-{i}').content, dhaka)
+
+    def test_process_local_cache_is_flagged_outside_debug(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['api.W001'])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class GeographyTreeTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        import_geography([
+            {'division': 'Dhaka', 'district': 'Dhaka', 'thanas': ['Dhanmondi', 'Gulshan']},
+            {'division': 'Dhaka', 'district': 'Gazipur', 'thanas': ['Tongi']},
+            {'division': 'Sylhet', 'district': 'Sylhet', 'thanas': ['Beanibazar']},
+        ])
+        self.dhaka = Division.objects.get(name='Dhaka')
+        user = User.objects.create_user('ivy', 'ivy@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+
+    def districts(self, **params):
+        response = self.client.get('/api/bangladesh-data/', params, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [entry['district'] for entry in response.json()]
+
+    def test_slices_by_id_or_name(self):
+        self.assertEqual(self.districts(), ['Dhaka', 'Gazipur', 'Sylhet'])
+        self.assertEqual(self.districts(division=self.dhaka.pk), ['Dhaka', 'Gazipur'])
+        self.assertEqual(self.districts(division='  dhaka '), ['Dhaka', 'Gazipur'])
+        gazipur = District.objects.get(name='Gazipur')
+        self.assertEqual(self.districts(district=gazipur.pk), ['Gazipur'])
+        self.assertEqual(self.districts(division='Sylhet', district='gazipur'), [])
+        self.assertEqual(self.districts(division='Nowhere'), [])
+
+    def test_tree_is_served_from_memory_and_rebuilt_after_changes(self):
+        self.districts()
+        with self.assertNumQueries(1):  # token authentication only
+            self.districts(division='Dhaka')
+        with self.captureOnCommitCallbacks(execute=True):
+            import_geography([{'division': 'Khulna', 'district': 'Jessore', 'thanas': []}])
+        self.assertEqual(self.districts(division='khulna'), ['Jessore'])
+
+
+class GeographyImportTests(TestCase):
+    def post_csv(self, body):
+        return self.client.post('/api/divisions/bulk_import/', body, content_type='text/csv')
+
+    def test_csv_rows_are_imported_once(self):
+        body = (
+            'division,district,thana\n'
+            'Dhaka,Gazipur,Tongi\n'
+            'Dhaka,Gazipur,Kaliakair\n'
+            ' Dhaka , Dhaka ,Dhanmondi\n'
+            'Sylhet,Sylhet,\n'
+        ).encode()
+        response = self.post_csv(body)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {
+            'created_divisions': 2, 'created_districts': 3, 'created_thanas': 3, 'total_entries_processed': 4,
+        })
+        self.assertEqual(
+            sorted(Thana.objects.values_list('district__division__name', 'district__name', 'name')),
+            [('Dhaka', 'Dhaka', 'Dhanmondi'), ('Dhaka', 'Gazipur', 'Kaliakair'), ('Dhaka', 'Gazipur', 'Tongi')],
+        )
+
+        response = self.post_csv(body)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created_thanas'], 0)
+        self.assertEqual(Division.objects.count(), 2)
+
+    def test_bad_rows_are_reported(self):
+        response = self.post_csv(b'division,district,thana\nDhaka,,Tongi\nDhaka,Gazipur,Tongi\n')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['errors'], [{'entry': 0, 'error': 'division and district are required'}])
+        self.assertTrue(Thana.objects.filter(name='Tongi').exists())
+
+    def test_undecodable_csv_is_rejected(self):
+        response = self.post_csv('division,district,thana\nDhaka,Gazipur,Tongi\n'.encode('utf-16'))
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()['error'].startswith('Invalid CSV'))
+        self.assertFalse(Division.objects.exists())
+
+
+class GeoIndexTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        import_geography([
+            {'division': 'Dhaka', 'district': 'Gazipur', 'thanas': ['Tongi']},
+            {'division': 'Sylhet', 'district': 'Sylhet', 'thanas': ['Beanibazar']},
+        ])
+        self.dhaka = Division.objects.get(name='Dhaka')
+        self.gazipur = District.objects.get(name='Gazipur')
+        self.tongi = Thana.objects.get(name='Tongi')
+        self.beanibazar = Thana.objects.get(name='Beanibazar')
+
+    def register(self, **location):
+        data = {'email': 'jo@example.com', 'pin': '1234'}
+        data.update({key: str(value) for key, value in location.items()})
+        return self.client.post('/api/auth/register/', data, content_type='application/json')
+
+    def test_mismatched_hierarchy_is_rejected(self):
+        sylhet = Division.objects.get(name='Sylhet')
+        response = self.register(division=sylhet.pk, district=self.gazipur.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Selected district does not belong to the selected division')
+
+        response = self.register(division=self.dhaka.pk, district=self.gazipur.pk, thana=self.beanibazar.pk)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Selected thana does not belong to the selected district')
+        self.assertFalse(User.objects.filter(email='jo@example.com').exists())
+
+    def test_ids_resolve_to_names_without_queries(self):
+        response = self.register(division=self.dhaka.pk, district=self.gazipur.pk, thana=self.tongi.pk)
+        self.assertEqual(response.status_code, 201)
+        profile = UserProfile.objects.get(user__email='jo@example.com')
+        self.assertEqual(
+            (profile.service_area_division, profile.service_area_district, profile.service_area_thana),
+            ('Dhaka', 'Gazipur', 'Tongi'),
+        )
+
+        geo = get_geo_index()
+        with self.assertNumQueries(0):
+            self.assertEqual(geo.thana_name(str(self.tongi.pk)), 'Tongi')
+            self.assertIsNone(geo.district_name('abc'))
+            self.assertIsNone(geo.validate_hierarchy(self.dhaka.pk, self.gazipur.pk, self.tongi.pk))
+
+
+class CityDetailSerializerTests(TestCase):
+    def setUp(self):
+        for i in range(30):
+            city = City.objects.create(name=f'City {i}', slug=f'city-{i}')
+            CitySlide.objects.create(city=city, product_type='copper', title='Copper', order=1)
+            CitySlide.objects.create(city=city, product_type='alkaline', title='Alkaline', order=2)
+            CitySlide.objects.create(city=city, product_type='copper', title='Hidden', is_active=False)
+            if i % 2:
+                CityStats.objects.create(city=city, users='10k', rating='4.8', installations='500')
+
+    def test_constant_queries_for_many_cities(self):
+        with self.assertNumQueries(2):
+            data = CityDetailSerializer(CityDetailSerializer.with_related(City.objects.all()), many=True).data
+        self.assertEqual(len(data), 30)
+        by_slug = {city['slug']: city for city in data}
+        self.assertEqual([slide['title'] for slide in by_slug['city-1']['slides']['copper']], ['Copper'])
+        self.assertEqual(len(by_slug['city-1']['slides']['alkaline']), 1)
+        self.assertEqual(by_slug['city-1']['stats']['rating'], '4.8')
+        self.assertIsNone(by_slug['city-2']['stats'])
+
+    def test_plain_instance_still_serializes(self):
+        data = CityDetailSerializer(City.objects.get(slug='city-1')).data
+        self.assertEqual(sorted(data['slides']), ['alkaline', 'copper'])
+        self.assertEqual(data['stats']['users'], '10k')
+
+
+class CityCatalogImportTests(TestCase):
+    def catalog(self, **city):
+        data = {
+            'name': 'Dhaka', 'slug': 'dhaka',
+            'slides': [
+                {'product_type': 'copper', 'order': 0, 'title': 'Copper'},
+                {'product_type': 'alkaline', 'order': 1, 'title': 'Alkaline'},
+            ],
+            'products': [{'name': 'Copper 10L', 'price': '100', 'description': 'Pure'}],
+            'stats': {'users': '1k', 'rating': '4.8', 'installations': '500'},
+        }
+        data.update(city)
+        return [data]
+
+    def test_reimport_updates_children_in_place(self):
+        report = import_city_catalog(self.catalog())
+        self.assertEqual(report['created_cities'], ['Dhaka'])
+        City.objects.filter(slug='dhaka').update(is_active=False)
+        slide = CitySlide.objects.get(product_type='copper')
+        CitySlide.objects.filter(pk=slide.pk).update(image='city_slides/copper.jpg', is_active=False)
+
+        report = import_city_catalog(self.catalog(slides=[
+            {'product_type': 'copper', 'order': 0, 'title': 'Copper, renamed'},
+            {'product_type': 'ro_plus', 'order': 2, 'title': 'RO+'},
+        ]))
+        self.assertEqual(report['updated_cities'], ['Dhaka'])
+
+        self.assertFalse(City.objects.get(slug='dhaka').is_active)
+        updated = CitySlide.objects.get(pk=slide.pk)
+        self.assertEqual((updated.title, updated.image.name, updated.is_active),
+                         ('Copper, renamed', 'city_slides/copper.jpg', False))
+        self.assertEqual(sorted(CitySlide.objects.values_list('product_type', flat=True)), ['copper', 'ro_plus'])
+        self.assertEqual(Product.objects.count(), 1)
+        self.assertEqual(CityStats.objects.get().users, '1k')
+
+    def test_failed_write_rolls_back_the_whole_import(self):
+        with mock.patch.object(CityStats.objects, 'bulk_create', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                import_city_catalog(self.catalog())
+        self.assertFalse(City.objects.exists())
+        self.assertFalse(CitySlide.objects.exists())
+
+    def test_invalid_cities_are_reported_and_skipped(self):
+        report = import_city_catalog(self.catalog() + [{'name': 'Sylhet', 'slides': [{'order': -1}]}])
+        self.assertEqual(report['count'], 1)
+        self.assertEqual([error['city'] for error in report['errors']], ['Sylhet'])
+        self.assertFalse(City.objects.filter(name='Sylhet').exists())
+
+
+class ValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get('/api/reviews/')
+        category = FAQCategory.objects.create(name='Billing', order=1)
+        for i in range(3):
+            FAQ.objects.create(category=category, question=f'Q{i}', answer='A', order=i)
+            Review.objects.create(name=f'R{i}', comment='Great', avatar='review_avatars/a b.png' if i else None)
+        PricingPlan.objects.create(
+            product_type='copper', plan_name='Family', plan_details='200 ltrs/m',
+            price_28_days='499.5', price_90_days='1399', price_360_days='4999', savings='12.25'
+        )
+
+    def assertMatchesModelSerializer(self, reader, queryset):
+        expected = reader.serializer_class(queryset, many=True, context={'request': self.request}).data
+        self.assertEqual(reader.serialize(reader.values(queryset), self.request), json.loads(json.dumps(expected)))
+
+    def test_output_matches_model_serializers(self):
+        self.assertMatchesModelSerializer(readers.review_reader, Review.objects.all())
+        self.assertMatchesModelSerializer(readers.faq_reader, FAQ.objects.all())
+        self.assertMatchesModelSerializer(readers.pricing_plan_reader, PricingPlan.objects.all())
+
+    def test_list_endpoint_reads_values_in_one_query(self):
+        user = User.objects.create_user('erin', 'erin@example.com', 'secret')
+        token = Token.objects.create(user=user)
+        with self.assertNumQueries(3):  # auth, count, page (category names joined in)
+            response = self.client.get('/api/faqs/', HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([faq['category_name'] for faq in response.json()['results']], ['Billing'] * 3)
+
+    def test_retrieve_with_a_malformed_pk_is_a_404(self):
+        user = User.objects.create_user('erin', 'erin@example.com', 'secret')
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        faq = FAQ.objects.first()
+        self.assertEqual(self.client.get(f'/api/faqs/{faq.pk}/', **auth).json()['question'], faq.question)
+        for url in ('/api/faqs/abc/', '/api/reviews/abc/', '/api/city-slides/abc/', '/api/faqs/999999/'):
+            self.assertEqual(self.client.get(url, **auth).status_code, 404, url)
+
+
+class FastJSONTests(TestCase):
+    data = {
+        'price': Decimal('499.50'),
+        'created_at': datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=dt_timezone.utc),
+        'day': date(2026, 1, 2),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Dhaka'),
+        'nested': [{'name': 'ঢাকা', 'count': 3, 'ok': True, 'none': None}],
+        'separator': 'a\u2028b',
+    }
+
+    def test_output_matches_drf_renderer(self):
+        self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    @skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_non_finite_floats_render_as_null(self):
+        # Unlike JSONRenderer, which refuses them
+        data = {'nan': float('nan'), 'inf': float('inf'), 'ninf': float('-inf')}
+        self.assertEqual(renderers.FastJSONRenderer().render(data), b'{"nan":null,"inf":null,"ninf":null}')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render(data)
+
+    def test_falls_back_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertEqual(renderers.FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+            self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')), {'a': [1, 2]})
+
+    def test_parser(self):
+        self.assertEqual(renderers.FastJSONParser().parse(io.BytesIO('{"name": "ঢাকা"}'.encode())), {'name': 'ঢাকা'})
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(io.BytesIO(b'{"a": '))
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        get_cache().clear()
+        user = User.objects.create_user('frank', 'frank@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=user).key}'}
+        category = FAQCategory.objects.create(name='Billing')
+        self.faq = FAQ.objects.create(category=category, question='Q', answer='A')
+
+    def test_matching_etag_gets_304_without_queries(self):
+        response = self.client.get('/api/faqs/', **self.auth)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(1):  # token authentication only
+            response = self.client.get('/api/faqs/', HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+        # Other query strings are other representations
+        response = self.client.get('/api/faqs/?page=1', HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_change_the_etag(self):
+        etag = self.client.get('/api/faqs/', **self.auth)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faq.category.name = 'Payments'
+            self.faq.category.save()
+        response = self.client.get('/api/faqs/', HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_importers_bump_model_versions(self):
+        etag = self.client.get('/api/divisions/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            import_geography([{'division': 'Sylhet', 'district': 'Sylhet', 'thanas': ['Beanibazar']}])
+        self.assertNotEqual(self.client.get('/api/divisions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class ServiceRequestListTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('gina', 'gina@example.com', 'secret')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=self.owner).key}'}
+        technician = User.objects.create_user('tech', 'tech@example.com', 'secret')
+        technician.profile.phone = '+8801700000000'
+        technician.profile.save_changes()
+        for i in range(5):
+            service_request = ServiceRequest.objects.create(
+                user=self.owner, problem_description=f'Problem {i}', technician=technician,
+                status='completed' if i % 2 else 'pending',
+            )
+            ServiceRequestImage.objects.create(service_request=service_request, image=f'service_requests/images/{i}.jpg')
+            ServiceRequestVideo.objects.create(service_request=service_request, video=f'service_requests/videos/{i}.mp4')
+
+    def test_pages_cost_the_same_queries_as_one_row(self):
+        # token, page, images, videos
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/service-requests/?page_size=2', **self.auth)
+        first = response.json()
+        self.assertEqual(len(first['results']), 2)
+        self.assertEqual(first['results'][0]['technician']['phone'], '+8801700000000')
+        self.assertEqual(len(first['results'][0]['images']), 1)
+
+        seen = [row['id'] for row in first['results']]
+        next_url = first['next']
+        while next_url:
+            page = self.client.get(next_url, **self.auth).json()
+            seen += [row['id'] for row in page['results']]
+            next_url = page['next']
+        self.assertEqual(seen, list(ServiceRequest.objects.order_by('-created_at', 'id').values_list('id', flat=True)))
+
+    def test_status_and_date_filters(self):
+        response = self.client.get('/api/service-requests/?status=completed', **self.auth)
+        self.assertEqual({row['status'] for row in response.json()['results']}, {'completed'})
+        self.assertEqual(len(response.json()['results']), 2)
+
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(f'/api/service-requests/?created_after={tomorrow}', **self.auth)
+        self.assertEqual(response.json()['results'], [])
+
+        response = self.client.get('/api/service-requests/?status=lost', **self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_numbers_are_rejected(self):
+        response = self.client.get('/api/service-requests/?page=2', **self.auth)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'page is not supported; follow the next link'})
+
+    def test_admin_listing_streams_in_batches(self):
+        response = self.client.get('/api/settings/service-requests/?stream=true', **self.auth)
+        self.assertEqual(response.status_code, 403)
+
+        admin = User.objects.create_user('root', 'root@example.com', 'secret', is_staff=True)
+        auth = {'HTTP_AUTHORIZATION': f'Token {Token.objects.create(user=admin).key}'}
+        with mock.patch('api.views.SERVICE_REQUEST_STREAM_BATCH', 2):
+            response = self.client.get('/api/settings/service-requests/?stream=true&status=pending', **auth)
+            self.assertTrue(response.streaming)
+            rows = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([row['problem_description'] for row in rows], ['Problem 4', 'Problem 2', 'Problem 0'])
+
+        response = self.client.get('/api/settings/service-requests/?page_size=2', **auth)
+        self.assertEqual(len(response.json()['results']), 2)
@@ -0,0 +1,90 @@
+"""
+Cache of already-verified bearer tokens.
+
+Verifying a Firebase ID token means an RSA signature check (and, when the
+key set has expired, a fetch of Google's public keys). A client sends the
+same token on every request until it expires, so once a token has been
+verified we remember the outcome under a SHA-256 fingerprint of the token
+and skip the cryptography on later requests.
+
+Entries never outlive the token's own `exp` claim. Each process keeps a
+bounded LRU; an optional shared Django cache lets every worker reuse a
+verification done by any of them.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+def fingerprint(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU/TTL map of token fingerprint -> value"""
+
+    def __init__(self, maxsize=1024, ttl=300, shared_alias=None, prefix='token'):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self.prefix = prefix
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    def _shared_key(self, key):
+        return f'{self.prefix}:{key}'
+
+    def get(self, token):
+        """Return the cached value for a token, or None if unknown or expired"""
+        key = fingerprint(token)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        shared = self._shared()
+        if shared is not None:
+            entry = shared.get(self._shared_key(key))
+            if entry is not None and entry[1] > now:
+                self._store(key, entry[0], entry[1])
+                return entry[0]
+        return None
+
+    def set(self, token, value, exp=None):
+        """Cache `value` for a token until min(now + ttl, exp)"""
+        now = time.time()
+        expires_at = now + self.ttl
+        if exp:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now:
+            return
+
+        key = fingerprint(token)
+        self._store(key, value, expires_at)
+
+        shared = self._shared()
+        if shared is not None:
+            shared.set(self._shared_key(key), (value, expires_at), timeout=max(1, int(expires_at - now)))
+
+    def _store(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
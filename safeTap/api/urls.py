@@ -24,6 +24,7 @@ from .views import (
     WhyChoosePointViewSet,
     change_pin,
     firebase_status,
+    perf_stats,
     get_referral_info,
     post_list,
     bangladesh_data,
@@ -47,9 +48,12 @@ from .views import (
     test_firebase,
     update_user_profile,
     regenerate_user_qr_code,
+    user_qr_png,
+    user_qr_svg,
     work_assignments,
     work_assignment_detail,
     technicians_list,
+    settings_service_requests,
     work_categories,
     create_work_category,
     assignment_statistics,
@@ -118,7 +122,7 @@ urlpatterns = [
 
     # Backwards-compatible routes used by frontend
     path('technicians/', technicians_list, name='technicians_list_public'),
-    path('settings/service-requests/', lambda request: redirect('/api/auth/assignments/'), name='settings_service_requests_redirect'),
+    path('settings/service-requests/', settings_service_requests, name='settings_service_requests'),
 
     # Authentication-related endpoints
     path('auth/token/', CustomAuthToken.as_view(), name='api_token_auth'),
@@ -160,6 +164,10 @@ urlpatterns = [
     path('admin/users/<int:user_id>/', update_user_profile, name='update_user_profile'),
     path('admin/users/<int:user_id>/regenerate-qr/', regenerate_user_qr_code, name='regenerate_user_qr_code'),
 
+    # QR code images (list endpoints only return these URLs)
+    path('users/<int:user_id>/qr.png', user_qr_png, name='user_qr_png'),
+    path('users/<int:user_id>/qr.svg', user_qr_svg, name='user_qr_svg'),
+
     # Work assignment endpoints
     path('auth/assignments/', work_assignments, name='work_assignments'),
     path('auth/assignments/<int:pk>/', work_assignment_detail, name='work_assignment_detail'),
@@ -169,6 +177,9 @@ urlpatterns = [
     path('auth/assignment-stats/', assignment_statistics, name='assignment_statistics'),
     
     
+    # Per-endpoint performance percentiles (admin only)
+    path('_perf/', perf_stats, name='perf_stats'),
+
     # Firebase status endpoint (reachable at /api/auth/firebase/status/)
     path('auth/firebase/status/', firebase_status, name='firebase_status'),
     
@@ -1,19 +1,26 @@
 import os
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import api_view, action, permission_classes
-from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated
+from rest_framework.permissions import IsAuthenticatedOrReadOnly, AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
+from django.core.files.storage import default_storage
 from django.conf import settings
 from django.db import IntegrityError
-from datetime import datetime, timedelta
+from django.db.models import Count, Prefetch, Q
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from datetime import datetime, time
 
 from .models import (
     Post, City, CitySlide, CityStats, Product, TechSpec, TechSpecification, SmartFeature,
@@ -31,6 +38,7 @@ from .serializers import (
     UserRegistrationSerializer,
     CodeVerificationSerializer, PhoneLoginSerializer, LoginSerializer,
     FirebaseTokenSerializer, FirebaseRegistrationSerializer, WorkAssignmentSerializer, WorkAssignmentCreateSerializer,
+    WorkAssignmentListSerializer, RecentHistoryWorkAssignmentSerializer,
     WorkCategorySerializer, TechnicianListSerializer, WorkAssignment, AssignmentHistory, AssignmentHistorySerializer,
     ServiceRequest, ServiceRequestSerializer, ServiceRequestCreateSerializer, ServiceRequestImage, ServiceRequestVideo,
     UserListSerializer,
@@ -40,16 +48,79 @@ from .serializers import (
     HowItWorksStepSerializer, PricingPlanSerializer, ProductInfoSerializer,
     ComparisonPointSerializer, CityDetailSerializer
 )
+from .assignments import TechnicianUnavailable, TransitionError, create_assignment, delete_assignment, update_assignment
+from .cache import (
+    ASSIGNMENT_STATS_NAMESPACE, CITY_PAGE_NAMESPACE, get_cache, get_or_render, get_version, invalidate_models,
+    model_namespace, version_timestamp,
+)
+from .geo_index import get_geo_index
+from .importers import import_city_catalog, import_geography, read_geography_csv
+from .outbox import queue_email
+from .geography import get_geography_tree
+from .pagination import ServiceRequestKeysetPagination, UserKeysetPagination, WorkAssignmentKeysetPagination
+from .authentication import AuthenticationError, resolve_request_user
+from .permissions import IsAdmin
+from . import otp, perf, readers
+from .readers import FastReadMixin
+from .renderers import render_json
+from .qr import qr_code_base64, qr_code_svg, qr_image_version, schedule_missing_qr_code, store_qr_image
 from .services import generate_verification_code, send_sms_verification, verify_phone_number
+from .sms import SMSRateLimited
 from .firebase_auth import verify_firebase_token, get_or_create_user, FirebaseAuthentication
+import csv
+import hashlib
 import uuid
-import qrcode
-from io import BytesIO
-import base64
 
 def home(request):
     return HttpResponse('hello api')
 
+def _conditional_json_response(request, content, etag, last_modified):
+    """Return pre-rendered JSON, or a 304 when the client's validators still match"""
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, max_age=0, must_revalidate=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag/Last-Modified validators for list and retrieve.
+
+    The validators come from the version namespaces of `version_models`
+    (default: the queryset's model), which signals bump on every write (see
+    api/cache.py), plus the request URL. A client whose copy is current
+    gets a 304 before any query or serialization runs.
+    """
+    version_models = None
+
+    def get_validators(self, request):
+        names = self.version_models or (self.queryset.model.__name__,)
+        versions = [get_version(model_namespace(name)) for name in names]
+        key = '|'.join(versions + [request.get_host(), request.get_full_path(), request.accepted_media_type or ''])
+        etag = '"%s"' % hashlib.md5(key.encode('utf-8')).hexdigest()
+        return etag, max(version_timestamp(version) for version in versions)
+
+    def conditional_response(self, request, view, *args, **kwargs):
+        """Return a 304 if the client's validators match, else `view`'s response with validators"""
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified))
+        if response is None:
+            response = view(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            patch_cache_control(response, max_age=0, must_revalidate=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, super().retrieve, *args, **kwargs)
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def api_root(request):
@@ -173,7 +244,8 @@ def login_user(request):
                         'last_name': user.last_name,
                         'phone': profile.phone,
                         'role': profile.role,
-                        'qr_code': profile.qr_code
+                        'qr_code': profile.qr_code_data(),
+                        'qr_code_url': profile.qr_code_url(request)
                     }
                 })
                 
@@ -189,120 +261,7 @@ def login_user(request):
             'error': f'An error occurred: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class CityViewSet(viewsets.ModelViewSet):
-    queryset = City.objects.all()
-    serializer_class = CitySerializer
-    permission_classes = [AllowAny]
-    lookup_field = 'slug'
-    
-    def get_serializer_context(self): 
-        context = super().get_serializer_context()
-        context['request'] = self.request
-        return context
-    
-    @action(detail=False, methods=['get', 'post'])
-    def bulk(self, request):
-        if request.method == 'GET':
-            cities = City.objects.all()
-            serializer = CitySerializer(cities, many=True)
-            return Response(serializer.data)
-        
-        elif request.method == 'POST':
-            cities_data = request.data.get('cities', [])
-            
-            if not cities_data:
-                return Response(
-                    {"error": "No cities data provided"}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            created_cities = []
-            errors = []
-            
-            for city_data in cities_data:
-                try:
-                    city_serializer = CitySerializer(data={
-                        'name': city_data.get('name'),
-                        'slug': city_data.get('slug', city_data.get('name', '').lower())
-                    })
-                    
-                    if city_serializer.is_valid():
-                        city = city_serializer.save()
-                        
-                        # Create slides
-                        slides_data = city_data.get('slides', [])
-                        for slide_data in slides_data:
-                            slide_serializer = CitySlideSerializer(data={
-                                **slide_data,
-                                'city': city.id
-                            })
-                            if slide_serializer.is_valid():
-                                slide_serializer.save()
-                            else:
-                                errors.append({
-                                    'city': city.name,
-                                    'slide': slide_data.get('title', 'Unknown'),
-                                    'errors': slide_serializer.errors
-                                })
-                        
-                        # Create stats
-                        stats_data = city_data.get('stats')
-                        if stats_data:
-                            stats_serializer = CityStatsSerializer(data={
-                                **stats_data,
-                                'city': city.id
-                            })
-                            if stats_serializer.is_valid():
-                                stats_serializer.save()
-                            else:
-                                errors.append({
-                                    'city': city.name,
-                                    'stats': stats_serializer.errors
-                                })
-                        
-                        # Create products
-                        products_data = city_data.get('products', [])
-                        for product_data in products_data:
-                            product_serializer = ProductSerializer(data={
-                                **product_data,
-                                'city': city.id
-                            })
-                            if product_serializer.is_valid():
-                                product_serializer.save()
-                            else:
-                                errors.append({
-                                    'city': city.name,
-                                    'product': product_data.get('name', 'Unknown'),
-                                    'errors': product_serializer.errors
-                                })
-                        
-                        created_cities.append(city.name)
-                    else:
-                        errors.append({
-                            'city': city_data.get('name', 'Unknown'),
-                            'errors': city_serializer.errors
-                        })
-                
-                except Exception as e:
-                    errors.append({
-                        'city': city_data.get('name', 'Unknown'),
-                        'error': str(e)
-                    })
-            
-            response_data = {
-                'created_cities': created_cities,
-                'count': len(created_cities)
-            }
-            
-            if errors:
-                response_data['errors'] = errors
-                return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
-            
-            return Response(response_data, status=status.HTTP_201_CREATED)
-        
-        return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
-
-class TechSpecViewSet(viewsets.ModelViewSet):
+class TechSpecViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = TechSpec.objects.all()
     serializer_class = TechSpecSerializer
     permission_classes = [AllowAny]
@@ -316,14 +275,18 @@ class TechSpecViewSet(viewsets.ModelViewSet):
         return super().create(request, *args, **kwargs)
     
     def perform_bulk_create(self, serializer):
-        return TechSpec.objects.bulk_create(
+        created = TechSpec.objects.bulk_create(
             [TechSpec(**item) for item in serializer.validated_data]
         )
+        # bulk_create sends no post_save signals, so invalidate explicitly
+        invalidate_models('TechSpec')
+        return created
 
 # New viewsets for geographical data
-class DivisionViewSet(viewsets.ModelViewSet):
+class DivisionViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Division.objects.all()
     serializer_class = DivisionSerializer
+    version_models = ('Division', 'District', 'Thana')
     permission_classes = [AllowAny]
     
     def create(self, request, *args, **kwargs):
@@ -335,76 +298,49 @@ class DivisionViewSet(viewsets.ModelViewSet):
         return super().create(request, *args, **kwargs)
     
     def perform_bulk_create(self, serializer):
-        return Division.objects.bulk_create(
+        created = Division.objects.bulk_create(
             [Division(**item) for item in serializer.validated_data]
         )
+        # bulk_create sends no post_save signals, so invalidate explicitly
+        invalidate_models('Division')
+        return created
     
     @action(detail=False, methods=['post'])
     def bulk_import(self, request):
         """
-        Bulk import Bangladesh geographical data
+        Bulk import Bangladesh geographical data.
+
+        Accepts a JSON list of {"division", "district", "thanas": [...]}
+        entries, or a text/csv body with division, district and thana
+        columns, which is streamed rather than parsed up front.
         """
-        data = request.data
-        
-        if not isinstance(data, list):
-            return Response(
-                {"error": "Data should be a list of geographical entries"}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        created_divisions = 0
-        created_districts = 0
-        created_thanas = 0
-        errors = []
-        
-        for entry in data:
-            try:
-                # Create or get division
-                division, created = Division.objects.get_or_create(
-                    name=entry['division']
-                )
-                if created:
-                    created_divisions += 1
-                
-                # Create or get district
-                district, created = District.objects.get_or_create(
-                    name=entry['district'],
-                    division=division
+        if request.content_type.startswith('text/csv'):
+            if request.stream is None:
+                return Response({"error": "Empty CSV body"}, status=status.HTTP_400_BAD_REQUEST)
+            data = read_geography_csv(request.stream)
+        else:
+            data = request.data
+            if not isinstance(data, list):
+                return Response(
+                    {"error": "Data should be a list of geographical entries"}, 
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-                if created:
-                    created_districts += 1
-                
-                # Create thanas
-                for thana_name in entry['thanas']:
-                    thana, created = Thana.objects.get_or_create(
-                        name=thana_name,
-                        district=district
-                    )
-                    if created:
-                        created_thanas += 1
-                        
-            except Exception as e:
-                errors.append({
-                    'entry': entry.get('_id', 'Unknown'),
-                    'error': str(e)
-                })
         
-        response_data = {
-            'created_divisions': created_divisions,
-            'created_districts': created_districts,
-            'created_thanas': created_thanas,
-            'total_entries_processed': len(data)
-        }
+        try:
+            response_data = import_geography(data)
+        except (csv.Error, UnicodeDecodeError) as e:
+            return Response({"error": f"Invalid CSV: {e}"}, status=status.HTTP_400_BAD_REQUEST)
         
-        if errors:
-            response_data['errors'] = errors
+        if response_data['errors']:
             return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
         
+        del response_data['errors']
         return Response(response_data, status=status.HTTP_201_CREATED)
 
-class DistrictViewSet(viewsets.ModelViewSet):
+class DistrictViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = District.objects.all()
     serializer_class = DistrictSerializer
+    version_models = ('Division', 'District', 'Thana')
     permission_classes = [AllowAny]
     
     def get_queryset(self):
@@ -414,9 +350,10 @@ class DistrictViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(division_id=division_id)
         return queryset
 
-class ThanaViewSet(viewsets.ModelViewSet):
+class ThanaViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Thana.objects.all()
     serializer_class = ThanaSerializer
+    version_models = ('Division', 'District', 'Thana')
     permission_classes = [AllowAny]
     
     def get_queryset(self):
@@ -429,21 +366,15 @@ class ThanaViewSet(viewsets.ModelViewSet):
 @api_view(['GET'])
 def bangladesh_data(request):
     """
-    Get all Bangladesh geographical data
+    Get all Bangladesh geographical data, optionally sliced with ?division= and/or ?district=
+    (id or name). Served from an in-memory tree that is rebuilt only when the data changes.
     """
-    divisions = Division.objects.all()
-    result = []
-    
-    for division in divisions:
-        for district in division.districts.all():
-            thanas = [thana.name for thana in district.thanas.all()]
-            result.append({
-                'division': division.name,
-                'district': district.name,
-                'thanas': thanas
-            })
-    
-    return Response(result)
+    tree = get_geography_tree()
+    content, etag = tree.render(
+        division=request.query_params.get('division'),
+        district=request.query_params.get('district'),
+    )
+    return _conditional_json_response(request, content, etag, tree.last_modified)
 
 class ProductFeatureViewSet(viewsets.ModelViewSet):
     queryset = ProductFeature.objects.all()
@@ -491,39 +422,12 @@ class ProductFeatureViewSet(viewsets.ModelViewSet):
 def generate_qr_code(self):
     """Generate a QR code for the user's support link"""
     if not self.support_link:
-        self.generate_support_link()
+        self.generate_support_link(save=False)
     
     try:
-        # Create a QR code instance
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(self.support_link)
-        qr.make(fit=True)
-        
-        # Create an image from the QR code
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save the image to a buffer
-        buffer = BytesIO()
-        
-        # Fix: Use the correct save method without the format parameter
-        # Different versions of qrcode library handle this differently
-        try:
-            # Try with format parameter first (newer versions)
-            img.save(buffer, format="PNG")
-        except TypeError:
-            # Fall back to without format parameter (older versions)
-            img.save(buffer)
-        
-        # Convert to base64
-        img_str = base64.b64encode(buffer.getvalue()).decode()
-        self.qr_code = img_str
-        self.save()
-        return img_str
+        self.qr_image.name = store_qr_image(self.support_link)
+        self.save_changes()
+        return qr_code_base64(self.support_link)
     except Exception as e:
         print(f"Error generating QR code: {str(e)}")
         import traceback
@@ -556,7 +460,7 @@ def send_verification_email(request):
             verification_token = str(uuid.uuid4())
             profile.verification_token = verification_token
             profile.is_email_verified = False
-            profile.save()
+            profile.save_changes()
             
             # Send verification email
             _send_verification_email_helper(user, verification_token)
@@ -610,18 +514,11 @@ def verify_email(request):
             profile.is_email_verified = True
             profile.verification_token = None
             
-            # Generate QR code if it doesn't exist
-            if not profile.qr_code:
-                try:
-                    qr_code = generate_service_qr_code(user.id)
-                    profile.qr_code = qr_code
-                    print(f"QR code generated and saved for user {user.id} after email verification")
-                except Exception as qr_error:
-                    print(f"QR code generation failed: {str(qr_error)}")
-                    import traceback
-                    traceback.print_exc()
+            profile.save_changes()
             
-            profile.save()
+            # Generate QR code in the background if it doesn't exist
+            if not profile.qr_image:
+                profile.schedule_qr_code()
             
             # Generate token for Django API access
             token, created = Token.objects.get_or_create(user=user)
@@ -638,7 +535,8 @@ def verify_email(request):
                     'phone': profile.phone,
                     'role': profile.role
                 },
-                'qr_code': profile.qr_code
+                'qr_code': profile.qr_code_data(),
+                'qr_code_url': profile.qr_code_url(request)
             })
         
         except User.DoesNotExist:
@@ -672,86 +570,10 @@ def verify_email(request):
 def get_current_user(request):
     """Get current authenticated user information"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-
-        # If no Bearer token is provided, allow session-authenticated users to be used
-        if not auth_header.startswith('Bearer '):
-            if request.user and request.user.is_authenticated:
-                user = request.user
-                print(f"get_current_user: using session-authenticated user: {user.username}")
-            else:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-        else:
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-
-            # If Firebase is not available, prefer session-based auth if present; otherwise 503
-            from .firebase_config import is_firebase_available, verify_firebase_token
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    # Ignore the Bearer token and use the session-authenticated user
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    decoded_token = verify_firebase_token(token)
-                    print(f"get_current_user: decoded_token present: {bool(decoded_token)}")
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        print(f"get_current_user: decoded token keys: {list(decoded_token.keys())}")
-
-                        # Try to find user by firebase_uid first
-                        user = None
-                        try:
-                            if firebase_uid:
-                                profile_obj = UserProfile.objects.filter(firebase_uid=firebase_uid).first()
-                                if profile_obj:
-                                    user = profile_obj.user
-                        except Exception as e:
-                            print(f"Error looking up UserProfile by firebase_uid: {e}")
-
-                        # If not found by uid, try email
-                        if not user:
-                            try:
-                                if email:
-                                    user = User.objects.get(email=email)
-                                    print(f"User found by email: {user.username}")
-                                else:
-                                    user = None
-                            except User.DoesNotExist:
-                                from .firebase_auth import get_or_create_user
-                                user = get_or_create_user(firebase_uid, email, decoded_token.get('name'))
-                                if not user:
-                                    print(f"Failed to create or retrieve user for Firebase UID {firebase_uid} and email {email}")
-                                    return Response({'error': 'Failed to create or retrieve user from Firebase token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed or not available, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # If we reach here, the user is authenticated
         try:
@@ -778,7 +600,8 @@ def get_current_user(request):
                 'service_rating': float(profile.service_rating) if profile.service_rating else 0.0,
                 'completed_jobs': profile.completed_jobs,
                 'support_link': profile.support_link,
-                'qr_code': profile.qr_code
+                'qr_code': profile.qr_code_data(),
+                'qr_code_url': profile.qr_code_url(request)
             }
         })
     except Exception as e:
@@ -796,66 +619,10 @@ def get_current_user(request):
 def get_support_info(request):
     """Get support link and QR code for authenticated user"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-
-        # Allow session-authenticated users when Bearer token is not provided
-        if not auth_header.startswith('Bearer '):
-            if request.user and request.user.is_authenticated:
-                user = request.user
-                print(f"get_support_info: using session-authenticated user: {user.username}")
-            else:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-        else:
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-
-            from .firebase_config import is_firebase_available
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    from .firebase_auth import verify_firebase_token
-                    decoded_token = verify_firebase_token(token)
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        
-                        # Get user from Firebase UID or email
-                        try:
-                            user = User.objects.get(email=email)
-                        except User.DoesNotExist:
-                            return Response({
-                                'error': 'User not found'
-                            }, status=status.HTTP_404_NOT_FOUND)
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # If we reach here, the user is authenticated
         try:
@@ -867,7 +634,10 @@ def get_support_info(request):
         # Ensure support link and QR code exist
         try:
             support_link = profile.support_link or profile.generate_support_link()
-            qr_code = profile.qr_code or generate_service_qr_code(user.id)
+            # Only the stored image is served; rendering happens off the request path
+            qr_code = profile.qr_code_data()
+            if qr_code is None:
+                schedule_missing_qr_code(profile.pk)
         except Exception as e:
             # If QR code generation fails, continue without it
             print(f"QR code generation failed: {str(e)}")
@@ -876,7 +646,8 @@ def get_support_info(request):
         
         return Response({
             'support_link': support_link,
-            'qr_code': qr_code
+            'qr_code': qr_code,
+            'qr_code_url': profile.qr_code_url(request)
         })
     except Exception as e:
         return Response({
@@ -887,73 +658,73 @@ def generate_service_qr_code(user_id):
     """Generate a QR code for service requests"""
     try:
         # Create a unique service URL for this user
-        service_url = f"http://localhost:3000/support/{user_id}"
-        
-        # Generate QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(service_url)
-        qr.make(fit=True)
-        
-        # Convert to base64 string
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = BytesIO()
-        
-        # Fix: Use the correct save method without the format parameter
-        try:
-            # Try with format parameter first (newer versions)
-            img.save(buffer, format="PNG")
-        except TypeError:
-            # Fall back to without format parameter (older versions)
-            img.save(buffer)
-            
-        img_str = base64.b64encode(buffer.getvalue()).decode()
+        service_url = UserProfile.build_support_link(user_id)
         
-        return img_str
+        # Identical links share one cached rendering
+        return qr_code_base64(service_url)
     except Exception as e:
         print(f"Error generating QR code: {str(e)}")
         import traceback
         traceback.print_exc()
         return ""
 
+USER_LIST_BOOLEAN_FILTERS = ('is_phone_verified', 'is_email_verified', 'is_available')
+
+
+def _parse_bool(value):
+    value = value.strip().lower()
+    if value in ('true', '1', 't', 'yes'):
+        return True
+    if value in ('false', '0', 'f', 'no'):
+        return False
+    return None
+
+
+def _user_list_response(request):
+    """
+    Keyset-paginated, read-only user listing shared by the user list endpoints.
+
+    Query params: cursor, page_size, role, is_phone_verified,
+    is_email_verified, is_available and fields (comma separated, e.g.
+    `fields=id,email,profile.role`).
+    """
+    params = request.query_params
+    fields = [field.strip() for field in params.get('fields', '').split(',') if field.strip()] or None
+
+    users = User.objects.all()
+    if fields is None or any(field.split('.', 1)[0] == 'profile' for field in fields):
+        users = users.select_related('profile')
+
+    role = params.get('role')
+    if role:
+        users = users.filter(profile__role=role)
+    for name in USER_LIST_BOOLEAN_FILTERS:
+        value = params.get(name)
+        if not value:
+            continue
+        flag = _parse_bool(value)
+        if flag is None:
+            return Response({
+                'error': f'{name} must be true or false'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        users = users.filter(**{f'profile__{name}': flag})
+
+    paginator = UserKeysetPagination()
+    try:
+        page = paginator.paginate_queryset(users, request)
+    except ValidationError as e:
+        return Response({'error': e.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = UserListSerializer(page, many=True, fields=fields, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_all_users(request):
-    """Get all users with their profile information including QR code and all important data"""
+    """List users with their profile information (paginated, see _user_list_response)"""
     try:
-        users = User.objects.all().order_by('-date_joined')
-        
-        # Ensure all users have profiles and QR codes generated
-        for user in users:
-            try:
-                profile = user.profile
-            except UserProfile.DoesNotExist:
-                # Create profile if it doesn't exist
-                profile = UserProfile.objects.create(user=user, role='customer')
-            
-            # Generate support link if it doesn't exist
-            if not profile.support_link:
-                try:
-                    profile.generate_support_link()
-                except Exception as e:
-                    print(f"Error generating support link for user {user.id}: {str(e)}")
-            
-            # Generate QR code if it doesn't exist (uses support_link)
-            if not profile.qr_code:
-                try:
-                    profile.generate_qr_code()
-                except Exception as e:
-                    print(f"Error generating QR code for user {user.id}: {str(e)}")
-        
-        serializer = UserListSerializer(users, many=True)
-        return Response({
-            'count': len(serializer.data),
-            'results': serializer.data
-        })
+        return _user_list_response(request)
     except Exception as e:
         return Response({
             'error': f'An error occurred: {str(e)}'
@@ -1023,61 +794,37 @@ def get_all_users_firebase(request):
             }, status=status.HTTP_401_UNAUTHORIZED)
         
         # If we reach here, the user is authenticated and is an admin
-        users = User.objects.all().order_by('-date_joined')
-
-        # Process users but avoid letting a single user's error cause a 500
-        processed_users = []
-        errors = []
-
-        for user_item in users:
-            try:
-                try:
-                    profile = user_item.profile
-                except UserProfile.DoesNotExist:
-                    profile = UserProfile.objects.create(user=user_item, role='customer')
-
-                # Generate support link if missing (non-blocking)
-                if not profile.support_link:
-                    try:
-                        profile.generate_support_link()
-                    except Exception as e:
-                        print(f"Error generating support link for user {user_item.id}: {str(e)}")
-                        errors.append({'user_id': user_item.id, 'action': 'generate_support_link', 'error': str(e)})
-
-                # Generate QR code if missing (non-blocking)
-                if not profile.qr_code:
-                    try:
-                        profile.generate_qr_code()
-                    except Exception as e:
-                        print(f"Error generating QR code for user {user_item.id}: {str(e)}")
-                        errors.append({'user_id': user_item.id, 'action': 'generate_qr_code', 'error': str(e)})
-
-                processed_users.append(user_item)
-
-            except Exception as e:
-                # Log but continue processing remaining users
-                import traceback
-                traceback.print_exc()
-                errors.append({'user_id': getattr(user_item, 'id', None), 'action': 'processing', 'error': str(e)})
-                continue
-
-        try:
-            serializer = UserListSerializer(processed_users, many=True)
-            response_data = {'count': len(serializer.data), 'results': serializer.data}
-            if errors:
-                response_data['errors'] = errors
-                return Response(response_data, status=status.HTTP_207_MULTI_STATUS)
-            return Response(response_data)
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return Response({'error': f'Failed to serialize users: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return _user_list_response(request)
     except Exception as e:
         return Response({
             'error': f'An error occurred: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Phone Verification Views
+def _check_verification_code(phone, code):
+    """Check a code against the OTP store; return an error Response, or None if it is valid"""
+    result = otp.verify(phone, code)
+    if result == otp.VALID:
+        return None
+    if result == otp.LOCKED:
+        return Response({
+            'error': 'Too many incorrect codes. Please request a new verification code.'
+        }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    if result == otp.EXPIRED:
+        return Response({
+            'error': 'Verification code has expired'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        'error': 'Invalid verification code'
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _mark_phone_verified(profile):
+    """Set is_phone_verified (a single-column UPDATE, skipped if already set)"""
+    profile.is_phone_verified = True
+    profile.save_changes()
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def send_phone_verification_code(request):
@@ -1100,35 +847,28 @@ def send_phone_verification_code(request):
             }, status=status.HTTP_404_NOT_FOUND)
         
         try:
-            profile = user.profile
-            
             # Generate verification code
             verification_code = generate_verification_code()
             
-            # Set expiration time (10 minutes from now)
-            expires_at = datetime.now() + timedelta(minutes=10)
-            
-            # Save verification code and expiration time
-            profile.verification_code = verification_code
-            profile.verification_code_expires_at = expires_at
-            profile.save()
+            # Queue the SMS first: a rate-limited number gets no new code
+            try:
+                send_sms_verification(phone, verification_code)
+            except SMSRateLimited as e:
+                return Response({
+                    'error': 'Too many verification codes requested. Please try again later.',
+                    'retry_after': e.retry_after
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
             
-            # Send SMS (this will also display in console)
-            sms_sent = send_sms_verification(phone, verification_code)
+            # Store the code in the OTP cache (expires after OTP_TTL)
+            otp.issue(phone, verification_code)
+            expires_in = getattr(settings, 'OTP_TTL', 600)
             
-            if sms_sent:
-                return Response({
-                    'message': 'Verification code sent successfully',
-                    'code': verification_code,  # Include code in response for development
-                    'expires_in': 600  # seconds
-                })
-            else:
-                return Response({
-                    'message': 'Verification code generated (check console)',
-                    'code': verification_code,  # Include code even if SMS failed
-                    'error': 'Failed to send SMS but code is available in console',
-                    'expires_in': 600
-                }, status=status.HTTP_202_ACCEPTED)  # Use 202 instead of 500 for partial success
+            # The SMS is sent in the background; failures are retried and logged there
+            return Response({
+                'message': 'Verification code sent successfully',
+                'code': verification_code,  # Include code in response for development
+                'expires_in': expires_in  # seconds
+            })
                     
         except Exception as e:
             return Response({
@@ -1156,25 +896,13 @@ def verify_phone_code(request):
             }, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            profile = UserProfile.objects.get(phone=phone)
-            
-            # Check if verification code matches
-            if profile.verification_code != code:
-                return Response({
-                    'error': 'Invalid verification code'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            profile = UserProfile.objects.select_related('user').get(phone=phone)
             
-            # Check if verification code has expired
-            if profile.verification_code_expires_at and profile.verification_code_expires_at < datetime.now():
-                return Response({
-                    'error': 'Verification code has expired'
-                }, status=status.HTTP_400_BAD_REQUEST)
+            error_response = _check_verification_code(phone, code)
+            if error_response is not None:
+                return error_response
             
-            # Mark phone as verified
-            profile.is_phone_verified = True
-            profile.verification_code = None
-            profile.verification_code_expires_at = None
-            profile.save()
+            _mark_phone_verified(profile)
             
             # Generate token for Django API access
             token, created = Token.objects.get_or_create(user=profile.user)
@@ -1213,29 +941,15 @@ def phone_login(request):
             phone = serializer.validated_data['phone']
             
             try:
-                profile = UserProfile.objects.get(phone=phone)
+                profile = UserProfile.objects.select_related('user').get(phone=phone)
                 
                 # If code is provided, verify it
                 if 'code' in serializer.validated_data:
-                    code = serializer.validated_data['code']
-                    
-                    # Check if verification code matches
-                    if profile.verification_code != code:
-                        return Response({
-                            'error': 'Invalid verification code'
-                        }, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    # Check if verification code has expired
-                    if profile.verification_code_expires_at and profile.verification_code_expires_at < datetime.now():
-                        return Response({
-                            'error': 'Verification code has expired'
-                        }, status=status.HTTP_400_BAD_REQUEST)
+                    error_response = _check_verification_code(phone, serializer.validated_data['code'])
+                    if error_response is not None:
+                        return error_response
                     
-                    # Mark phone as verified
-                    profile.is_phone_verified = True
-                    profile.verification_code = None
-                    profile.verification_code_expires_at = None
-                    profile.save()
+                    _mark_phone_verified(profile)
                 
                 # Generate token for Django API access
                 token, created = Token.objects.get_or_create(user=profile.user)
@@ -1268,7 +982,7 @@ def phone_login(request):
 
 
 def _send_verification_email_helper(user, token):
-    """Helper function to send verification email to user"""
+    """Queue the verification email for a user (delivered by api/outbox.py)"""
     try:
         subject = "Verify Your Email Address"
         verification_url = f"http://localhost:3000/verify-email?email={user.email}&token={token}"
@@ -1288,22 +1002,13 @@ def _send_verification_email_helper(user, token):
         The Team
         """
         
-        # Get default from email or use a fallback
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@yourdomain.com')
+        # Queue rather than send: the SMTP round trip happens after the response
+        email = queue_email(subject, message, [user.email])
         
-        # Try to send the email
-        result = send_mail(
-            subject,
-            message,
-            from_email,
-            [user.email],
-            fail_silently=False  # Set to False to catch errors
-        )
-        
-        print(f"Verification email sent to {user.email}. Result: {result}")
+        print(f"Verification email queued for {user.email} (outbox #{email.id})")
         return True
     except Exception as e:
-        print(f"Error sending email: {str(e)}")
+        print(f"Error queueing email: {str(e)}")
         import traceback
         traceback.print_exc()
         return False
@@ -1334,7 +1039,7 @@ def resend_verification_email(request):
             verification_token = str(uuid.uuid4())
             profile.verification_token = verification_token
             profile.is_email_verified = False
-            profile.save()
+            profile.save_changes()
             
             # Send verification email
             email_sent = _send_verification_email_helper(user, verification_token)
@@ -1405,6 +1110,14 @@ def register_user(request):
         if not username:
             username = email.split('@')[0] + str(uuid.uuid4().hex[:4])
         
+        # Resolve location ids from the in-memory geography index
+        geo = get_geo_index()
+        hierarchy_error = geo.validate_hierarchy(division, district, thana)
+        if hierarchy_error:
+            return Response({
+                'error': hierarchy_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Check if user with email already exists
         if User.objects.filter(email=email).exists():
             return Response({
@@ -1463,26 +1176,17 @@ def register_user(request):
         profile.is_phone_verified = is_phone_verified
         
         # Handle location data
-        if division:
-            try:
-                division_obj = Division.objects.get(id=division)
-                profile.service_area_division = division_obj.name
-            except Division.DoesNotExist:
-                pass
+        division_name = geo.division_name(division)
+        if division_name:
+            profile.service_area_division = division_name
         
-        if district:
-            try:
-                district_obj = District.objects.get(id=district)
-                profile.service_area_district = district_obj.name
-            except District.DoesNotExist:
-                pass
+        district_name = geo.district_name(district)
+        if district_name:
+            profile.service_area_district = district_name
         
-        if thana:
-            try:
-                thana_obj = Thana.objects.get(id=thana)
-                profile.service_area_thana = thana_obj.name
-            except Thana.DoesNotExist:
-                pass
+        thana_name = geo.thana_name(thana)
+        if thana_name:
+            profile.service_area_thana = thana_name
         
         if address:
             profile.address = address
@@ -1498,23 +1202,14 @@ def register_user(request):
         
         # Generate support link if it doesn't exist
         if not profile.support_link:
-            profile.generate_support_link()
+            profile.generate_support_link(save=False)
         
         # Save profile first before generating QR code
-        profile.save()
+        profile.save_changes()
         print(f"Profile saved for user: {user.username}")
         
-        # Generate QR code for service
-        qr_code = ""
-        try:
-            profile.generate_qr_code()
-            profile.save()  # Save again with QR code
-            print(f"QR code generated and saved for user {user.id}")
-        except Exception as qr_error:
-            print(f"QR code generation failed: {str(qr_error)}")
-            import traceback
-            traceback.print_exc()
-            # Continue without QR code for now
+        # Render the service QR code in the background so signup doesn't wait on it
+        profile.schedule_qr_code()
         
         # Send verification email (don't fail if email sending fails)
         try:
@@ -1533,9 +1228,10 @@ def register_user(request):
             'user_id': user.id,
             'username': user.username,
             'email': user.email,
-            'qr_code': profile.qr_code,  # Use profile.qr_code to ensure we get the latest
+            'qr_code': profile.qr_code_data(),  # Empty until the background worker has rendered it
+            'qr_code_url': profile.qr_code_url(request),
             'support_link': profile.support_link,  # Include support link
-            'qr_code_generated': bool(profile.qr_code),  # Flag to indicate QR code is ready
+            'qr_code_generated': bool(profile.qr_image),  # Flag to indicate QR code is ready
             'verification_required': True,
             'phone_verified': is_phone_verified,  # Include phone verification status
             # Add token for automatic login
@@ -1548,7 +1244,8 @@ def register_user(request):
                 'last_name': user.last_name,
                 'phone': profile.phone,
                 'role': profile.role,
-                'qr_code': profile.qr_code,
+                'qr_code': profile.qr_code_data(),
+                'qr_code_url': profile.qr_code_url(request),
                 'support_link': profile.support_link,
                 'is_phone_verified': profile.is_phone_verified
             }
@@ -1646,7 +1343,8 @@ def firebase_login(request):
                     'last_name': user.last_name,
                     'phone': profile.phone,
                     'role': profile.role,
-                    'qr_code': profile.qr_code,
+                    'qr_code': profile.qr_code_data(),
+                    'qr_code_url': profile.qr_code_url(request),
                     'is_phone_verified': profile.is_phone_verified,
                     'is_email_verified': profile.is_email_verified,
                 }
@@ -1693,6 +1391,18 @@ def firebase_register(request):
             email = decoded_token.get('email')
             display_name = decoded_token.get('name')
             
+            # Validate the submitted location against the in-memory geography index
+            geo = get_geo_index()
+            hierarchy_error = geo.validate_hierarchy(
+                serializer.validated_data.get('division'),
+                serializer.validated_data.get('district'),
+                serializer.validated_data.get('thana'),
+            )
+            if hierarchy_error:
+                return Response({
+                    'error': hierarchy_error
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
             # Get or create user in Django/PostgreSQL
             user = get_or_create_user(firebase_uid, email, display_name)
             if not user:
@@ -1713,25 +1423,19 @@ def firebase_register(request):
                 profile.role = serializer.validated_data['role']
             if 'division' in serializer.validated_data:
                 # Get division name instead of ID
-                try:
-                    division = Division.objects.get(id=serializer.validated_data['division'])
-                    profile.service_area_division = division.name
-                except Division.DoesNotExist:
-                    pass
+                division_name = geo.division_name(serializer.validated_data['division'])
+                if division_name:
+                    profile.service_area_division = division_name
             if 'district' in serializer.validated_data:
                 # Get district name instead of ID
-                try:
-                    district = District.objects.get(id=serializer.validated_data['district'])
-                    profile.service_area_district = district.name
-                except District.DoesNotExist:
-                    pass
+                district_name = geo.district_name(serializer.validated_data['district'])
+                if district_name:
+                    profile.service_area_district = district_name
             if 'thana' in serializer.validated_data:
                 # Get thana name instead of ID
-                try:
-                    thana = Thana.objects.get(id=serializer.validated_data['thana'])
-                    profile.service_area_thana = thana.name
-                except Thana.DoesNotExist:
-                    pass
+                thana_name = geo.thana_name(serializer.validated_data['thana'])
+                if thana_name:
+                    profile.service_area_thana = thana_name
             if 'address' in serializer.validated_data:
                 profile.address = serializer.validated_data['address']
             if 'referral' in serializer.validated_data:
@@ -1745,18 +1449,14 @@ def firebase_register(request):
             
             # Generate support link if it doesn't exist
             if not profile.support_link:
-                profile.generate_support_link()
+                profile.generate_support_link(save=False)
             
             # Generate QR code if it doesn't exist
-            if not profile.qr_code:
-                try:
-                    profile.generate_qr_code()
-                    print(f"QR code generated for Firebase user {user.id}")
-                except Exception as qr_error:
-                    print(f"QR code generation failed: {str(qr_error)}")
-            
             # Save profile with all data
-            profile.save()
+            profile.save_changes()
+            
+            if not profile.qr_image:
+                profile.schedule_qr_code()
             
             # Generate token for Django API access
             token, created = Token.objects.get_or_create(user=user)
@@ -1772,7 +1472,8 @@ def firebase_register(request):
                     'last_name': user.last_name,
                     'phone': profile.phone,
                     'role': profile.role,
-                    'qr_code': profile.qr_code,
+                    'qr_code': profile.qr_code_data(),
+                    'qr_code_url': profile.qr_code_url(request),
                     'support_link': profile.support_link,
                     'is_phone_verified': profile.is_phone_verified,
                     'is_email_verified': profile.is_email_verified,
@@ -1808,57 +1509,10 @@ def test_firebase(request):
 def regenerate_user_qr_code(request, user_id):
     """Regenerate QR code for a user - for admin use"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-        
-        if auth_header.startswith('Bearer '):
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-            
-            from .firebase_config import is_firebase_available
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    from .firebase_auth import verify_firebase_token
-                    decoded_token = verify_firebase_token(token)
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        
-                        # Get user from Firebase UID or email
-                        try:
-                            user = User.objects.get(email=email)
-                        except User.DoesNotExist:
-                            return Response({
-                                'error': 'User not found'
-                            }, status=status.HTTP_404_NOT_FOUND)
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # Check if user is admin
         try:
@@ -1883,15 +1537,16 @@ def regenerate_user_qr_code(request, user_id):
             # Create profile if it doesn't exist
             target_profile = UserProfile.objects.create(user=target_user, role='customer')
         
-        # Generate new support link
-        target_profile.generate_support_link()
+        # Generate new support link (saved together with the QR code below)
+        target_profile.generate_support_link(save=False)
         
         # Generate new QR code
         target_profile.generate_qr_code()
         
         return Response({
             'message': 'QR code regenerated successfully',
-            'qr_code': target_profile.qr_code,
+            'qr_code': target_profile.qr_code_data(),
+            'qr_code_url': target_profile.qr_code_url(request),
             'support_link': target_profile.support_link
         })
     except Exception as e:
@@ -1900,63 +1555,73 @@ def regenerate_user_qr_code(request, user_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+
+# Cached for a year: a versioned URL's content never changes
+QR_IMAGE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def _qr_image_response(request, user_id, content_type, render):
+    """Serve a user's QR code image, immutable when requested with its ?v= version"""
+    profile = (
+        UserProfile.objects.filter(user_id=user_id)
+        .values('id', 'qr_image', 'support_link')
+        .first()
+    )
+    if profile is None:
+        return JsonResponse({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
+    if not profile['qr_image']:
+        if profile['support_link']:
+            schedule_missing_qr_code(profile['id'])
+        return JsonResponse({'error': 'QR code has not been generated yet'}, status=status.HTTP_404_NOT_FOUND)
+
+    version = qr_image_version(profile['qr_image'])
+    etag = '"%s"' % version
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            response = render(profile)
+        except OSError:
+            # qr_image names a file that was deleted or never written
+            schedule_missing_qr_code(profile['id'])
+            return JsonResponse({'error': 'QR code has not been generated yet'}, status=status.HTTP_404_NOT_FOUND)
+        response['Content-Type'] = content_type
+    response['ETag'] = etag
+    if request.GET.get('v') == version:
+        patch_cache_control(response, public=True, max_age=QR_IMAGE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    return response
+
+
+# Plain Django views: image clients send image/* Accept headers that DRF's
+# content negotiation would reject, and the QR codes are public anyway.
+@require_safe
+def user_qr_png(request, user_id):
+    """Stream a user's support QR code as PNG"""
+    return _qr_image_response(
+        request, user_id, 'image/png',
+        lambda profile: FileResponse(default_storage.open(profile['qr_image'], 'rb')),
+    )
+
+
+@require_safe
+def user_qr_svg(request, user_id):
+    """Serve a user's support QR code as SVG"""
+    return _qr_image_response(
+        request, user_id, 'image/svg+xml',
+        lambda profile: HttpResponse(qr_code_svg(profile['support_link'])),
+    )
+
 # Update user profile
 @api_view(['PUT'])
 @permission_classes([AllowAny])
 def update_user_profile(request, user_id):
     """Update user profile information - for admin use"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-        
-        if auth_header.startswith('Bearer '):
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-            
-            from .firebase_config import is_firebase_available
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    from .firebase_auth import verify_firebase_token
-                    decoded_token = verify_firebase_token(token)
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        
-                        # Get user from Firebase UID or email
-                        try:
-                            user = User.objects.get(email=email)
-                        except User.DoesNotExist:
-                            return Response({
-                                'error': 'User not found'
-                            }, status=status.HTTP_404_NOT_FOUND)
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # Check if user is admin
         try:
@@ -2024,7 +1689,7 @@ def update_user_profile(request, user_id):
         if 'completed_jobs' in request.data:
             target_profile.completed_jobs = request.data['completed_jobs']
         
-        target_profile.save()
+        target_profile.save_changes()
         
         return Response({
             'message': 'User profile updated successfully',
@@ -2045,7 +1710,8 @@ def update_user_profile(request, user_id):
                     'service_rating': float(target_profile.service_rating) if target_profile.service_rating else 0.0,
                     'completed_jobs': target_profile.completed_jobs,
                     'support_link': target_profile.support_link,
-                    'qr_code': target_profile.qr_code,
+                    'qr_code': target_profile.qr_code_data(),
+                    'qr_code_url': target_profile.qr_code_url(request),
                     'is_phone_verified': target_profile.is_phone_verified,
                     'is_email_verified': target_profile.is_email_verified,
                 }
@@ -2056,34 +1722,92 @@ def update_user_profile(request, user_id):
             'error': f'An error occurred: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+ASSIGNMENT_LIST_FILTERS = ('status', 'priority', 'division', 'district')
+ASSIGNMENT_HISTORY_LIMIT = 5
+
+
+def _parse_date_param(value, end=False):
+    """Parse an ISO date or datetime query param; bare dates cover the whole day"""
+    try:
+        day = parse_date(value)
+        parsed = parse_datetime(value) if day is None else datetime.combine(day, time.max if end else time.min)
+    except ValueError:
+        return None
+    if parsed is None:
+        return None
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _work_assignment_list_response(request):
+    """
+    Keyset-paginated work assignment listing.
+
+    Query params: cursor, page_size, status, priority, technician (profile
+    id), division, district, created_after, created_before (ISO dates or
+    datetimes) and include_history (latest ASSIGNMENT_HISTORY_LIMIT entries).
+    """
+    params = request.query_params
+    assignments = WorkAssignment.objects.select_related(
+        'customer__user', 'assigned_to__user', 'category', 'assigned_by'
+    )
+
+    for name in ASSIGNMENT_LIST_FILTERS:
+        value = params.get(name)
+        if value:
+            assignments = assignments.filter(**{name: value})
+
+    technician = params.get('technician')
+    if technician:
+        if not technician.isdigit():
+            return Response({'error': 'technician must be a profile id'}, status=status.HTTP_400_BAD_REQUEST)
+        assignments = assignments.filter(assigned_to_id=technician)
+
+    for name, lookup, end in (('created_after', 'gte', False), ('created_before', 'lte', True)):
+        value = params.get(name)
+        if not value:
+            continue
+        moment = _parse_date_param(value, end=end)
+        if moment is None:
+            return Response({'error': f'{name} must be an ISO date or datetime'}, status=status.HTTP_400_BAD_REQUEST)
+        assignments = assignments.filter(**{f'created_at__{lookup}': moment})
+
+    serializer_class = WorkAssignmentListSerializer
+    include_history = _parse_bool(params.get('include_history', ''))
+    if include_history:
+        history = AssignmentHistory.objects.select_related('changed_by').order_by('-timestamp')
+        # Sliced prefetches need to_attr; the serializer reads recent_history
+        assignments = assignments.prefetch_related(
+            Prefetch('history', queryset=history[:ASSIGNMENT_HISTORY_LIMIT], to_attr='recent_history')
+        )
+        serializer_class = RecentHistoryWorkAssignmentSerializer
+
+    paginator = WorkAssignmentKeysetPagination()
+    try:
+        page = paginator.paginate_queryset(assignments, request)
+    except ValidationError as e:
+        return Response({'error': e.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = serializer_class(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def work_assignments(request):
-    """List all work assignments or create a new one"""
+    """List work assignments (paginated, see _work_assignment_list_response) or create a new one"""
     if request.method == 'GET':
-        assignments = WorkAssignment.objects.all().order_by('-created_at')
-        serializer = WorkAssignmentSerializer(assignments, many=True)
-        return Response(serializer.data)
+        return _work_assignment_list_response(request)
     
     elif request.method == 'POST':
         serializer = WorkAssignmentCreateSerializer(data=request.data)
         if serializer.is_valid():
-            # Set the assigned_by to current user
-            assignment = serializer.save(assigned_by=request.user)
-            
-            # Create history entry
-            AssignmentHistory.objects.create(
-                assignment=assignment,
-                changed_by=request.user,
-                old_status='',
-                new_status='pending',
-                notes='Assignment created'
-            )
-            
-            # Update technician availability if assigned
-            if assignment.assigned_to:
-                assignment.assigned_to.is_available = False
-                assignment.assigned_to.save()
+            # Set the assigned_by to current user and claim the technician
+            try:
+                assignment = create_assignment(serializer, request.user)
+            except TechnicianUnavailable as e:
+                return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
             
             return Response(WorkAssignmentSerializer(assignment).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -2091,7 +1815,7 @@ def work_assignments(request):
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
 def work_assignment_detail(request, pk):
-    """Get, update or delete a specific work assignment"""
+    """Get, update or delete a specific work assignment (status changes follow api/assignments.py)"""
     try:
         assignment = WorkAssignment.objects.get(pk=pk)
     except WorkAssignment.DoesNotExist:
@@ -2102,38 +1826,22 @@ def work_assignment_detail(request, pk):
         return Response(serializer.data)
     
     elif request.method == 'PUT':
-        old_status = assignment.status
         serializer = WorkAssignmentCreateSerializer(assignment, data=request.data, partial=True)
         if serializer.is_valid():
-            updated_assignment = serializer.save()
-            
-            # Create history entry if status changed
-            if 'status' in request.data and old_status != updated_assignment.status:
-                AssignmentHistory.objects.create(
-                    assignment=updated_assignment,
-                    changed_by=request.user,
-                    old_status=old_status,
-                    new_status=updated_assignment.status,
-                    notes=request.data.get('status_notes', '')
+            try:
+                updated_assignment = update_assignment(
+                    assignment.pk, serializer, request.user, notes=request.data.get('status_notes', '')
                 )
-                
-                # Update completed_at if marked as completed
-                if updated_assignment.status == 'completed' not in old_status:
-                    from datetime import datetime
-                    updated_assignment.completed_at = datetime.now()
-                    
-                    # Update technician availability
-                    if updated_assignment.assigned_to:
-                        updated_assignment.assigned_to.is_available = True
-                        updated_assignment.assigned_to.save()
-                
-                updated_assignment.save()
+            except TransitionError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            except TechnicianUnavailable as e:
+                return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
             
             return Response(WorkAssignmentSerializer(updated_assignment).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     elif request.method == 'DELETE':
-        assignment.delete()
+        delete_assignment(assignment.pk)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 @api_view(['GET'])
@@ -2141,17 +1849,89 @@ def work_assignment_detail(request, pk):
 def technicians_list(request):
     """Get list of all technicians (service providers)"""
     technicians = UserProfile.objects.filter(role='provider').order_by('-service_rating')
-    serializer = TechnicianListSerializer(technicians, many=True)
+    serializer = TechnicianListSerializer(technicians, many=True, context={'request': request})
     return Response(serializer.data)
 
 
+SERVICE_REQUEST_STATUSES = {value for value, _ in ServiceRequest.STATUS_CHOICES}
+SERVICE_REQUEST_STREAM_BATCH = 500
+
+
+def _service_requests():
+    """ServiceRequests with everything ServiceRequestSerializer reads loaded up front"""
+    return ServiceRequest.objects.select_related('technician__profile').prefetch_related('images', 'videos')
+
+
+def _filter_service_requests(requests, params):
+    """
+    Apply the status, created_after and created_before (ISO dates or
+    datetimes) query params. Returns (queryset, error message).
+    """
+    status_filter = params.get('status')
+    if status_filter:
+        if status_filter not in SERVICE_REQUEST_STATUSES:
+            return None, f"status must be one of {', '.join(sorted(SERVICE_REQUEST_STATUSES))}"
+        requests = requests.filter(status=status_filter)
+
+    for name, lookup, end in (('created_after', 'gte', False), ('created_before', 'lte', True)):
+        value = params.get(name)
+        if not value:
+            continue
+        moment = _parse_date_param(value, end=end)
+        if moment is None:
+            return None, f'{name} must be an ISO date or datetime'
+        requests = requests.filter(**{f'created_at__{lookup}': moment})
+    return requests, None
+
+
+def _service_request_list_response(request, requests):
+    """Keyset-paginated, filtered service request listing (cursor, page_size, status, created_after/before)"""
+    requests, error = _filter_service_requests(requests, request.query_params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = ServiceRequestKeysetPagination()
+    try:
+        page = paginator.paginate_queryset(requests, request)
+    except ValidationError as e:
+        return Response({'error': e.detail[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+    serializer = ServiceRequestSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
+
+
+def _stream_service_requests(request, requests):
+    """
+    Yield `requests` as one JSON array, serializing SERVICE_REQUEST_STREAM_BATCH
+    rows at a time so memory stays flat however many rows match.
+    """
+    def render(batch):
+        # Drop the list's brackets; the items are joined into the outer array
+        return render_json(ServiceRequestSerializer(batch, many=True, context={'request': request}).data)[1:-1]
+
+    rows = requests.order_by(*ServiceRequestKeysetPagination.ordering).iterator(chunk_size=SERVICE_REQUEST_STREAM_BATCH)
+    yield b'['
+    separator = b''
+    batch = []
+    for service_request in rows:
+        batch.append(service_request)
+        if len(batch) == SERVICE_REQUEST_STREAM_BATCH:
+            yield separator + render(batch)
+            separator = b','
+            batch = []
+    if batch:
+        yield separator + render(batch)
+    yield b']'
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def settings_service_requests(request):
-    """Admin endpoint: return all service requests for the dashboard
+    """Admin endpoint: service requests for the dashboard
 
-    Frontend expects `/api/settings/service-requests/`. This view enforces admin
-    access and returns serialized service requests.
+    Frontend expects `/api/settings/service-requests/`. Keyset-paginated and
+    filterable like the other listings; `?stream=true` instead streams every
+    matching request as a single JSON array (exports).
     """
     # Ensure authenticated
     if not (request.user and request.user.is_authenticated):
@@ -2162,9 +1942,13 @@ def settings_service_requests(request):
     if not (user_role == 'admin' or request.user.is_staff):
         return Response({'error': 'Permission denied. Admin access required.'}, status=status.HTTP_403_FORBIDDEN)
 
-    requests = ServiceRequest.objects.all().order_by('-created_at')
-    serializer = ServiceRequestSerializer(requests, many=True)
-    return Response(serializer.data)
+    if not _parse_bool(request.query_params.get('stream', '')):
+        return _service_request_list_response(request, _service_requests())
+
+    requests, error = _filter_service_requests(_service_requests(), request.query_params)
+    if error:
+        return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+    return StreamingHttpResponse(_stream_service_requests(request, requests), content_type='application/json')
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -2188,28 +1972,51 @@ def create_work_category(request):
 @permission_classes([IsAuthenticated])
 def assignment_statistics(request):
     """Get assignment statistics for dashboard"""
-    from django.db.models import Count
-    
+    # The dashboard polls this endpoint; serve it from a short-lived cache that
+    # assignment and technician changes invalidate (see api/cache.py)
+    entry = get_or_render(
+        ASSIGNMENT_STATS_NAMESPACE,
+        ('stats',),
+        lambda: render_json(_build_assignment_statistics()),
+        timeout=getattr(settings, 'ASSIGNMENT_STATS_CACHE_TIMEOUT', 30),
+    )
+    return _conditional_json_response(
+        request, entry['content'], entry['etag'], entry['last_modified']
+    )
+
+def _build_assignment_statistics():
+    # Status and priority breakdowns in a single conditional aggregate
+    aggregates = {'total_assignments': Count('id')}
+    for value, _ in WorkAssignment.STATUS_CHOICES:
+        aggregates[f'{value}_assignments'] = Count('id', filter=Q(status=value))
+    for value, _ in WorkAssignment.PRIORITY_CHOICES:
+        aggregates[f'priority_{value}'] = Count('id', filter=Q(priority=value))
+    counts = WorkAssignment.objects.aggregate(**aggregates)
+
     stats = {
-        'total_assignments': WorkAssignment.objects.count(),
-        'pending_assignments': WorkAssignment.objects.filter(status='pending').count(),
-        'assigned_assignments': WorkAssignment.objects.filter(status='assigned').count(),
-        'in_progress_assignments': WorkAssignment.objects.filter(status='in_progress').count(),
-        'completed_assignments': WorkAssignment.objects.filter(status='completed').count(),
-        'cancelled_assignments': WorkAssignment.objects.filter(status='cancelled').count(),
-        'total_technicians': UserProfile.objects.filter(role='servicer').count(),
-        'available_technicians': UserProfile.objects.filter(role='servicer', is_available=True).count(),
+        key: counts[key] for key in counts if not key.startswith('priority_')
     }
-    
+    stats.update(UserProfile.objects.filter(role='servicer').aggregate(
+        total_technicians=Count('id'),
+        available_technicians=Count('id', filter=Q(is_available=True)),
+    ))
+
     # Assignments by priority
-    priority_stats = WorkAssignment.objects.values('priority').annotate(count=Count('id'))
-    stats['by_priority'] = {item['priority']: item['count'] for item in priority_stats}
-    
+    stats['by_priority'] = {
+        value: counts[f'priority_{value}']
+        for value, _ in WorkAssignment.PRIORITY_CHOICES
+        if counts[f'priority_{value}']
+    }
+
     # Recent assignments
-    recent = WorkAssignment.objects.order_by('-created_at')[:5]
+    recent = (
+        WorkAssignment.objects
+        .select_related('customer__user', 'assigned_to__user', 'category', 'assigned_by')
+        .prefetch_related(Prefetch('history', queryset=AssignmentHistory.objects.select_related('changed_by')))
+        .order_by('-created_at')[:5]
+    )
     stats['recent_assignments'] = WorkAssignmentSerializer(recent, many=True).data
-    
-    return Response(stats)
+    return stats
 
 class ServiceRequestViewSet(viewsets.ModelViewSet):
     """
@@ -2223,7 +2030,10 @@ class ServiceRequestViewSet(viewsets.ModelViewSet):
         """
         Only return service requests for the current user
         """
-        return ServiceRequest.objects.filter(user=self.request.user)
+        return _service_requests().filter(user=self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        return _service_request_list_response(request, self.get_queryset())
     
     def get_serializer_class(self):
         """
@@ -2265,10 +2075,20 @@ class ServiceRequestViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        requests = ServiceRequest.objects.filter(user_id=user_id)
-        serializer = self.get_serializer(requests, many=True) 
-        return Response(serializer.data) 
+        return _service_request_list_response(request, _service_requests().filter(user_id=user_id))
     
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAdminUser | IsAdmin])
+def perf_stats(request):
+    """Per-endpoint latency/query percentiles from the in-process ring buffer (admin only)"""
+    if request.method == 'DELETE':
+        perf.registry.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'pid': os.getpid(),
+        'endpoints': perf.registry.snapshot(),
+    })
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def firebase_status(request):
@@ -2312,19 +2132,54 @@ def firebase_status(request):
 # =====================================================================
 # City Administrations
 # =====================================================================
-class CityViewSet(viewsets.ModelViewSet):
+class CityViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = City.objects.all()
     serializer_class = CitySerializer
+    version_models = ('City', 'CitySlide', 'CityStats')
     
     @action(detail=True, methods=['get'])
     def details(self, request, pk=None):
-        city = get_object_or_404(City, pk=pk)
+        return self.conditional_response(request, self._details, pk=pk)
+    
+    def _details(self, request, pk=None):
+        city = get_object_or_404(CityDetailSerializer.with_related(City.objects.all()), pk=pk)
         serializer = CityDetailSerializer(city)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get', 'post'])
+    def bulk(self, request):
+        """
+        GET lists all cities (with slides and stats when ?details=true);
+        POST imports a catalog of cities with their slides, stats and
+        products (see api.importers.import_city_catalog).
+        """
+        if request.method == 'GET':
+            cities = City.objects.all()
+            if _parse_bool(request.query_params.get('details', '')):
+                serializer = CityDetailSerializer(CityDetailSerializer.with_related(cities), many=True)
+            else:
+                serializer = CitySerializer(cities, many=True)
+            return Response(serializer.data)
+        
+        cities_data = request.data.get('cities', []) if isinstance(request.data, dict) else []
+        if not cities_data or not isinstance(cities_data, list):
+            return Response(
+                {"error": "No cities data provided"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        report = import_city_catalog(cities_data)
+        if not report['errors']:
+            del report['errors']
+            return Response(report, status=status.HTTP_201_CREATED)
+        if report['count']:
+            return Response(report, status=status.HTTP_207_MULTI_STATUS)
+        return Response(report, status=status.HTTP_400_BAD_REQUEST)
 
-class CitySlideViewSet(viewsets.ModelViewSet):
+class CitySlideViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = CitySlide.objects.all()
     serializer_class = CitySlideSerializer
+    read_serializer = readers.city_slide_reader
     
     def get_queryset(self):
         queryset = CitySlide.objects.all()
@@ -2338,33 +2193,41 @@ class CitySlideViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class CityStatsViewSet(viewsets.ModelViewSet):
+class CityStatsViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = CityStats.objects.all()
     serializer_class = CityStatsSerializer
+    read_serializer = readers.city_stats_reader
 
-class ProductFeatureViewSet(viewsets.ModelViewSet):
+class ProductFeatureViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = ProductFeature.objects.filter(is_active=True)
     serializer_class = ProductFeatureSerializer
+    read_serializer = readers.product_feature_reader
 
-class TechSpecificationViewSet(viewsets.ModelViewSet):
+class TechSpecificationViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = TechSpecification.objects.filter(is_active=True)
     serializer_class = TechSpecificationSerializer
+    read_serializer = readers.tech_specification_reader
 
-class SmartFeatureViewSet(viewsets.ModelViewSet):
+class SmartFeatureViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = SmartFeature.objects.filter(is_active=True)
     serializer_class = SmartFeatureSerializer
+    read_serializer = readers.smart_feature_reader
 
-class TechStageViewSet(viewsets.ModelViewSet):
+class TechStageViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = TechStage.objects.filter(is_active=True)
     serializer_class = TechStageSerializer
+    read_serializer = readers.tech_stage_reader
 
-class FAQCategoryViewSet(viewsets.ModelViewSet):
+class FAQCategoryViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = FAQCategory.objects.filter(is_active=True)
     serializer_class = FAQCategorySerializer
+    read_serializer = readers.faq_category_reader
 
-class FAQViewSet(viewsets.ModelViewSet):
+class FAQViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = FAQ.objects.filter(is_active=True)
     serializer_class = FAQSerializer
+    version_models = ('FAQ', 'FAQCategory')
+    read_serializer = readers.faq_reader
     
     def get_queryset(self):
         queryset = FAQ.objects.filter(is_active=True)
@@ -2375,21 +2238,25 @@ class FAQViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = Review.objects.filter(is_active=True)
     serializer_class = ReviewSerializer
+    read_serializer = readers.review_reader
 
-class WhyChoosePointViewSet(viewsets.ModelViewSet):
+class WhyChoosePointViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = WhyChoosePoint.objects.filter(is_active=True)
     serializer_class = WhyChoosePointSerializer
+    read_serializer = readers.why_choose_point_reader
 
-class HowItWorksStepViewSet(viewsets.ModelViewSet):
+class HowItWorksStepViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = HowItWorksStep.objects.filter(is_active=True)
     serializer_class = HowItWorksStepSerializer
+    read_serializer = readers.how_it_works_step_reader
 
-class PricingPlanViewSet(viewsets.ModelViewSet):
+class PricingPlanViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = PricingPlan.objects.filter(is_active=True)
     serializer_class = PricingPlanSerializer
+    read_serializer = readers.pricing_plan_reader
     
     def get_queryset(self):
         queryset = PricingPlan.objects.filter(is_active=True)
@@ -2430,9 +2297,10 @@ class PricingPlanViewSet(viewsets.ModelViewSet):
         
         return Response(result)
 
-class ProductInfoViewSet(viewsets.ModelViewSet):
+class ProductInfoViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = ProductInfo.objects.filter(is_active=True)
     serializer_class = ProductInfoSerializer
+    read_serializer = readers.product_info_reader
     
     def get_queryset(self):
         queryset = ProductInfo.objects.filter(is_active=True)
@@ -2443,25 +2311,59 @@ class ProductInfoViewSet(viewsets.ModelViewSet):
             
         return queryset
 
-class ComparisonPointViewSet(viewsets.ModelViewSet):
+class ComparisonPointViewSet(ConditionalGetMixin, FastReadMixin, viewsets.ModelViewSet):
     queryset = ComparisonPoint.objects.filter(is_active=True)
     serializer_class = ComparisonPointSerializer
+    read_serializer = readers.comparison_point_reader
 
 # API endpoint to get all data needed for the city page
+CITY_PAGE_PRODUCT_TYPES = {value for value, _ in PricingPlan._meta.get_field('product_type').choices}
+
+
+def _city_page_slug(city_slug):
+    """The slug of the city a page request resolves to (unknown slugs fall back to dhaka)"""
+    cache = get_cache()
+    key = f'{CITY_PAGE_NAMESPACE}:{get_version(CITY_PAGE_NAMESPACE)}:slugs'
+    slugs = cache.get(key)
+    if slugs is None:
+        slugs = set(City.objects.values_list('slug', flat=True))
+        cache.set(key, slugs, getattr(settings, 'CITY_PAGE_CACHE_TIMEOUT', None))
+    return city_slug if city_slug in slugs else 'dhaka'
+
+
 class CityPageDataViewSet(viewsets.ViewSet):
     """
     A special ViewSet to get all data needed for the city page in a single request
     """
     
     def list(self, request):
-        city_slug = request.query_params.get('city_slug', 'dhaka')
+        # Key the cache on what the page is built from, so arbitrary query
+        # strings can't each store a page of their own
+        city_slug = _city_page_slug(request.query_params.get('city_slug', 'dhaka'))
         product_type = request.query_params.get('product_type', 'copper')
+        if product_type not in CITY_PAGE_PRODUCT_TYPES:
+            product_type = ''  # no plans or product info, whatever the value
+        
+        # Serve the fully rendered page from cache; entries are invalidated by
+        # model signals (see api/cache.py)
+        entry = get_or_render(
+            CITY_PAGE_NAMESPACE,
+            (city_slug, product_type),
+            lambda: render_json(self._build_page_data(city_slug, product_type)),
+            timeout=getattr(settings, 'CITY_PAGE_CACHE_TIMEOUT', None),
+        )
         
+        return _conditional_json_response(
+            request, entry['content'], entry['etag'], entry['last_modified']
+        )
+    
+    def _build_page_data(self, city_slug, product_type):
         # Get city
+        cities = CityDetailSerializer.with_related(City.objects.all())
         try:
-            city = City.objects.get(slug=city_slug)
+            city = cities.get(slug=city_slug)
         except City.DoesNotExist:
-            city = City.objects.get(slug='dhaka')  # Default to Dhaka
+            city = cities.get(slug='dhaka')  # Default to Dhaka
         
         # Get city details
         city_serializer = CityDetailSerializer(city)
@@ -2529,7 +2431,7 @@ class CityPageDataViewSet(viewsets.ViewSet):
             'comparison_points': comparison_points_serializer.data,
         }
         
-        return Response(response_data)
+        return response_data
 
 
 @api_view(['POST'])
@@ -2599,7 +2501,7 @@ def save_referral_code(request):
         # Update profile with referral code and link
         profile.referral_code = referral_code
         profile.referral_link = referral_link
-        profile.save()
+        profile.save_changes()
         
         return Response({
             'message': 'Referral code saved successfully',
@@ -2643,7 +2545,7 @@ def get_referral_info(request):
             # Save to profile
             profile.referral_code = referral_code
             profile.referral_link = referral_link
-            profile.save()
+            profile.save_changes()
         else:
             referral_code = profile.referral_code
             referral_link = profile.referral_link
@@ -2704,86 +2606,10 @@ def validate_referral_code(request):
 def update_profile(request):
     """Update user profile information"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-
-        # If no Bearer token is provided, allow session-authenticated users to be used
-        if not auth_header.startswith('Bearer '):
-            if request.user and request.user.is_authenticated:
-                user = request.user
-                print(f"update_profile: using session-authenticated user: {user.username}")
-            else:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-        else:
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-
-            # If Firebase is not available, prefer session-based auth if present; otherwise 503
-            from .firebase_config import is_firebase_available, verify_firebase_token
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    # Ignore the Bearer token and use the session-authenticated user
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    decoded_token = verify_firebase_token(token)
-                    print(f"update_profile: decoded_token present: {bool(decoded_token)}")
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        print(f"update_profile: decoded token keys: {list(decoded_token.keys())}")
-
-                        # Try to find user by firebase_uid first
-                        user = None
-                        try:
-                            if firebase_uid:
-                                profile_obj = UserProfile.objects.filter(firebase_uid=firebase_uid).first()
-                                if profile_obj:
-                                    user = profile_obj.user
-                        except Exception as e:
-                            print(f"Error looking up UserProfile by firebase_uid: {e}")
-
-                        # If not found by uid, try email
-                        if not user:
-                            try:
-                                if email:
-                                    user = User.objects.get(email=email)
-                                    print(f"User found by email: {user.username}")
-                                else:
-                                    user = None
-                            except User.DoesNotExist:
-                                from .firebase_auth import get_or_create_user
-                                user = get_or_create_user(firebase_uid, email, decoded_token.get('name'))
-                                if not user:
-                                    print(f"Failed to create or retrieve user for Firebase UID {firebase_uid} and email {email}")
-                                    return Response({'error': 'Failed to create or retrieve user from Firebase token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed or not available, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # If we reach here, the user is authenticated
         try:
@@ -2791,6 +2617,18 @@ def update_profile(request):
         except UserProfile.DoesNotExist:
             profile = UserProfile.objects.create(user=user, role='customer')
         
+        # Validate submitted location ids against the in-memory geography index
+        geo = get_geo_index()
+        hierarchy_error = geo.validate_hierarchy(
+            request.data.get('service_area_division'),
+            request.data.get('service_area_district'),
+            request.data.get('service_area_thana'),
+        )
+        if hierarchy_error:
+            return Response({
+                'error': hierarchy_error
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Update user fields
         if 'first_name' in request.data:
             user.first_name = request.data['first_name']
@@ -2810,46 +2648,30 @@ def update_profile(request):
             # Handle division ID or name
             division_id = request.data['service_area_division']
             if division_id:
-                try:
-                    division = Division.objects.get(id=division_id)
-                    profile.service_area_division = division.name
-                except Division.DoesNotExist:
-                    profile.service_area_division = division_id
+                profile.service_area_division = geo.division_name(division_id) or division_id
         
         if 'service_area_district' in request.data:
             # Handle district ID or name
             district_id = request.data['service_area_district']
             if district_id:
-                try:
-                    district = District.objects.get(id=district_id)
-                    profile.service_area_district = district.name
-                except District.DoesNotExist:
-                    profile.service_area_district = district_id
+                profile.service_area_district = geo.district_name(district_id) or district_id
         
         if 'service_area_thana' in request.data:
             # Handle thana ID or name
             thana_id = request.data['service_area_thana']
             if thana_id:
-                try:
-                    thana = Thana.objects.get(id=thana_id)
-                    profile.service_area_thana = thana.name
-                except Thana.DoesNotExist:
-                    profile.service_area_thana = thana_id
+                profile.service_area_thana = geo.thana_name(thana_id) or thana_id
         
         # Handle profile picture upload
         if 'profile_picture' in request.FILES:
             profile_picture = request.FILES['profile_picture']
             profile.profile_picture = profile_picture
         
-        profile.save()
+        profile.save_changes()
         
         # Generate QR code if it doesn't exist
-        if not profile.qr_code:
-            try:
-                profile.generate_qr_code()
-                profile.save()
-            except Exception as e:
-                print(f"QR code generation failed: {str(e)}")
+        if not profile.qr_image:
+            profile.schedule_qr_code()
         
         # Return updated profile information
         return Response({
@@ -2869,7 +2691,8 @@ def update_profile(request):
                     'service_area_thana': profile.service_area_thana,
                     'role': profile.role,
                     'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
-                    'qr_code': profile.qr_code,
+                    'qr_code': profile.qr_code_data(),
+                    'qr_code_url': profile.qr_code_url(request),
                     'support_link': profile.support_link,
                 }
             }
@@ -2888,86 +2711,10 @@ def update_profile(request):
 def change_pin(request):
     """Change user PIN"""
     try:
-        # Check for Firebase token in Authorization header
-        auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-        user = None
-        token = None
-
-        # If no Bearer token is provided, allow session-authenticated users to be used
-        if not auth_header.startswith('Bearer '):
-            if request.user and request.user.is_authenticated:
-                user = request.user
-                print(f"change_pin: using session-authenticated user: {user.username}")
-            else:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-        else:
-            token = auth_header[7:]  # Remove 'Bearer ' prefix
-
-            # If Firebase is not available, prefer session-based auth if present; otherwise 503
-            from .firebase_config import is_firebase_available, verify_firebase_token
-            if not is_firebase_available():
-                if request.user and request.user.is_authenticated:
-                    # Ignore the Bearer token and use the session-authenticated user
-                    user = request.user
-                else:
-                    return Response({
-                        'error': 'Firebase authentication is not available on the server.',
-                        'message': 'Firebase is not configured or credentials are invalid.'
-                    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
-            else:
-                # Try to authenticate with Firebase token
-                try:
-                    decoded_token = verify_firebase_token(token)
-                    print(f"change_pin: decoded_token present: {bool(decoded_token)}")
-                    if decoded_token:
-                        firebase_uid = decoded_token.get('uid')
-                        email = decoded_token.get('email')
-                        print(f"change_pin: decoded token keys: {list(decoded_token.keys())}")
-
-                        # Try to find user by firebase_uid first
-                        user = None
-                        try:
-                            if firebase_uid:
-                                profile_obj = UserProfile.objects.filter(firebase_uid=firebase_uid).first()
-                                if profile_obj:
-                                    user = profile_obj.user
-                        except Exception as e:
-                            print(f"Error looking up UserProfile by firebase_uid: {e}")
-
-                        # If not found by uid, try email
-                        if not user:
-                            try:
-                                if email:
-                                    user = User.objects.get(email=email)
-                                    print(f"User found by email: {user.username}")
-                                else:
-                                    user = None
-                            except User.DoesNotExist:
-                                from .firebase_auth import get_or_create_user
-                                user = get_or_create_user(firebase_uid, email, decoded_token.get('name'))
-                                if not user:
-                                    print(f"Failed to create or retrieve user for Firebase UID {firebase_uid} and email {email}")
-                                    return Response({'error': 'Failed to create or retrieve user from Firebase token'}, status=status.HTTP_401_UNAUTHORIZED)
-
-                except Exception as e:
-                    print(f"Firebase authentication error: {str(e)}")
-                    # Continue to try Django token authentication
-        
-        # If Firebase authentication failed or not available, try Django token authentication
-        if not user:
-            if not token:
-                return Response({
-                    'error': 'Authentication credentials were not provided.'
-                }, status=status.HTTP_401_UNAUTHORIZED)
-            try:
-                token_obj = Token.objects.get(key=token)
-                user = token_obj.user
-            except Token.DoesNotExist:
-                return Response({
-                    'error': 'Invalid authentication token'
-                }, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            user = resolve_request_user(request)
+        except AuthenticationError as e:
+            return e.response()
         
         # If we reach here, the user is authenticated
         try:
@@ -3001,7 +2748,7 @@ def change_pin(request):
         
         # Update PIN
         profile.pin = new_pin
-        profile.save()
+        profile.save_changes()
         
         return Response({
             'message': 'PIN changed successfully'
@@ -317,6 +317,7 @@ if DEBUG:
     CORS_ALLOW_ALL_METHODS = True
 
 MIDDLEWARE = [
+    'api.middleware.PerfMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -475,7 +476,8 @@ if not FIREBASE_CREDENTIALS:
     print("Using individual Firebase environment variables")
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Use django.core.mail.backends.console.EmailBackend (or locmem) to keep mail local
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True').lower() in ('true', '1', 't')
@@ -483,10 +485,24 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@yourdomain.com')
 
+# Outbound email is queued in the OutboundEmail table and delivered by
+# api/outbox.py (right after commit, and by `manage.py send_queued_email`).
+# Failed sends are retried after EMAIL_OUTBOX_RETRY_DELAY seconds, doubling
+# up to EMAIL_OUTBOX_MAX_RETRY_DELAY, then dead-lettered. A claimed batch is
+# leased for EMAIL_OUTBOX_LEASE seconds; if its worker dies, the rows are
+# sent again after that. The worker deletes sent rows older than
+# EMAIL_OUTBOX_RETENTION_DAYS.
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', '100'))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', '60'))  # seconds
+EMAIL_OUTBOX_MAX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_MAX_RETRY_DELAY', '3600'))  # seconds
+EMAIL_OUTBOX_LEASE = int(os.environ.get('EMAIL_OUTBOX_LEASE', '300'))  # seconds
+EMAIL_OUTBOX_RETENTION_DAYS = int(os.environ.get('EMAIL_OUTBOX_RETENTION_DAYS', '30'))
+
 # Rest Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.ProfileTokenAuthentication',
         'api.firebase_auth.FirebaseAuthentication',  # Add Firebase authentication
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -494,8 +510,65 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed JSON (api/renderers.py); plain DRF behaviour without orjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Cache Configuration
+# Defaults to an in-process cache. Point CACHE_BACKEND/CACHE_LOCATION at Redis or
+# memcached in production so every worker shares cached responses, invalidation
+# versions and verification codes (see check api.W001), e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+# CACHE_LOCATION=redis://127.0.0.1:6379/1
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'safetap-default'),
+    }
+}
+API_CACHE_ALIAS = os.environ.get('API_CACHE_ALIAS', 'default')
+CITY_PAGE_CACHE_TIMEOUT = int(os.environ.get('CITY_PAGE_CACHE_TIMEOUT', '86400'))  # seconds
+ASSIGNMENT_STATS_CACHE_TIMEOUT = int(os.environ.get('ASSIGNMENT_STATS_CACHE_TIMEOUT', '30'))  # seconds
+
+# Background worker pool (api/tasks.py) used for QR code rendering and other
+# work that shouldn't hold up a request. Eager mode runs jobs inline on commit.
+BACKGROUND_TASK_WORKERS = int(os.environ.get('BACKGROUND_TASK_WORKERS', '4'))
+BACKGROUND_TASKS_EAGER = os.environ.get('BACKGROUND_TASKS_EAGER', 'False').lower() in ('true', '1', 't')
+# A profile whose QR image is missing is queued for regeneration at most once per interval
+QR_RETRY_INTERVAL = int(os.environ.get('QR_RETRY_INTERVAL', '300'))  # seconds
+QR_SVG_CACHE_TIMEOUT = int(os.environ.get('QR_SVG_CACHE_TIMEOUT', '3600'))  # seconds
+
+# Verified Firebase ID tokens are cached (per process, and in the cache alias
+# below when set) so repeat requests skip signature verification. Entries
+# never outlive the token's own expiry.
+FIREBASE_TOKEN_CACHE_SIZE = int(os.environ.get('FIREBASE_TOKEN_CACHE_SIZE', '2048'))
+FIREBASE_TOKEN_CACHE_TTL = int(os.environ.get('FIREBASE_TOKEN_CACHE_TTL', '300'))  # seconds
+FIREBASE_TOKEN_CACHE_ALIAS = os.environ.get('FIREBASE_TOKEN_CACHE_ALIAS') or None
+
+# Per-request performance accounting (api/middleware.py PerfMiddleware).
+# Requests over budget are logged to the "api.perf" logger; per-endpoint
+# overrides go in API_PERF_ENDPOINT_BUDGETS, keyed by URL name, e.g.
+# {'get_all_users': {'queries': 5}}. Percentiles are served at /api/_perf/.
+API_PERF_ENABLED = os.environ.get('API_PERF_ENABLED', 'True').lower() in ('true', '1', 't')
+API_PERF_SERVER_TIMING = os.environ.get('API_PERF_SERVER_TIMING', 'True').lower() in ('true', '1', 't')
+API_PERF_SAMPLES = int(os.environ.get('API_PERF_SAMPLES', '500'))  # per endpoint
+API_PERF_SLOW_QUERY_MS = int(os.environ.get('API_PERF_SLOW_QUERY_MS', '100'))
+API_PERF_BUDGETS = {
+    'queries': int(os.environ.get('API_PERF_MAX_QUERIES', '50')),
+    'db_ms': int(os.environ.get('API_PERF_MAX_DB_MS', '250')),
+    'total_ms': int(os.environ.get('API_PERF_MAX_TOTAL_MS', '1000')),
+    'bytes': int(os.environ.get('API_PERF_MAX_BYTES', str(1024 * 1024))),
+}
+API_PERF_ENDPOINT_BUDGETS = {}
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -574,6 +647,22 @@ TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
 TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', '')
 
+# SMS dispatch (api/sms.py). SMS_PROVIDER is auto (Twilio when configured,
+# else console), twilio, http, console, locmem or a dotted provider class.
+SMS_PROVIDER = os.environ.get('SMS_PROVIDER', 'auto')
+SMS_HTTP_URL = os.environ.get('SMS_HTTP_URL', '')
+SMS_HTTP_TOKEN = os.environ.get('SMS_HTTP_TOKEN', '')
+SMS_HTTP_SENDER = os.environ.get('SMS_HTTP_SENDER', '')
+SMS_MAX_ATTEMPTS = int(os.environ.get('SMS_MAX_ATTEMPTS', '3'))
+SMS_RETRY_DELAY = float(os.environ.get('SMS_RETRY_DELAY', '1'))  # seconds, doubled per retry
+SMS_RATE_LIMIT = int(os.environ.get('SMS_RATE_LIMIT', '5'))  # messages per number per window
+SMS_RATE_LIMIT_WINDOW = int(os.environ.get('SMS_RATE_LIMIT_WINDOW', '3600'))  # seconds
+
+# Phone verification codes (api/otp.py) live in the API cache, which must be
+# shared by all workers in production (see check api.W001).
+OTP_TTL = int(os.environ.get('OTP_TTL', '600'))  # seconds
+OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS', '5'))  # wrong guesses per code
+
 # Create logs directory if it doesn't exist
 LOGS_DIR = os.path.join(BASE_DIR, 'logs')
 if not os.path.exists(LOGS_DIR):